@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, Response, jsonify
 from app.config import Config  # 导入配置
 
 from flask_apispec import FlaskApiSpec  # 引入 Flask-APISpec
@@ -13,6 +13,12 @@ app.config.from_object(Config)
 # 加载配置
 app.config.from_object(Config)
 
+def format_apispec_response(output):
+    """
+    use_kwargs 包装的接口返回 (jsonify(...), 状态码) 时，已是 Response 的结果不再重复 jsonify
+    """
+    return output if isinstance(output, Response) else jsonify(output)
+
 # 配置 Swagger
 app.config.update({
     "APISPEC_SPEC": APISpec(
@@ -23,6 +29,7 @@ app.config.update({
     ),
     "APISPEC_SWAGGER_URL": Config.APISPEC_SWAGGER_URL,
     "APISPEC_SWAGGER_UI_URL": Config.APISPEC_SWAGGER_UI_URL,
+    "APISPEC_FORMAT_RESPONSE": format_apispec_response,
 })
 app.secret_key = Config.SECRET_KEY if hasattr(Config, 'SECRET_KEY') else "default_secret_key"
 
@@ -31,12 +38,88 @@ app.secret_key = Config.SECRET_KEY if hasattr(Config, 'SECRET_KEY') else "defaul
 logger.add(Config.LOG_FILE, level=Config.LOG_LEVEL, rotation="10 MB", retention="10 days")
 logger.add(lambda msg: print(msg), level=Config.LOG_LEVEL)
 
+# 在创建数据库连接、启动后台线程前创建密码加密进程池，子进程在单线程状态下 fork
+from .utils.hashing import hashing_service
+hashing_service.start()
+
 # 初始化数据库
-from .models import Base, engine
+from .models import Base, engine, db_session
 
 # 初始化数据库表
 Base.metadata.create_all(bind=engine)
 
+# 升级已有数据库的表结构
+from .utils.migrate import upgrade_schema
+upgrade_schema(engine, Base.metadata)
+
+# 补齐存量项目事件的物化路径
+from .models import SessionLocal
+from .utils.event_tree import rebuild_paths
+rebuild_paths(SessionLocal)
+
+# 补齐全文索引并开始跟踪事件、项目的写入
+from .utils.search import search_index
+search_index.start(engine)
+
+# 建立名称列二元组索引（由触发器随写入维护），加速 ilike 模糊查询
+from .utils.ngram import ngram_index
+ngram_index.start(engine)
+
+# 跟踪各表写入版本号，查询结果缓存据此失效
+from .utils.result_cache import table_versions, result_cache
+table_versions.start()
+
+# 增量维护项目汇总表，首次升级时全量重算
+from .utils.project_summary import project_summary
+project_summary.start()
+
+# 增量维护事件按日统计，首次升级时在后台分批重算
+from .utils.event_stats import event_stats
+event_stats.start()
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """
+    请求结束时回滚未提交的事务并归还请求级会话的连接
+    """
+    db_session.remove()
+
+# 启动时解析一次 RSA 密钥，后续请求复用
+from .utils.crypto import rsa_key_manager
+rsa_key_manager.load_from_config()
+
+# 使用服务端会话存储，Cookie 中只保存会话id
+from .utils.session_store import ServerSessionInterface, session_store
+app.session_interface = ServerSessionInterface(session_store)
+session_store.start_sweeper(Config.SESSION_SWEEP_INTERVAL)
+
+# 启动验证码预生成线程
+from .auth import captcha_pool
+captcha_pool.start()
+
+# 汇总各组件统计（运行监控 component_stats 接口与 /metrics 共用），并采集各接口耗时与 SQL 指标
+from .utils.metrics import request_metrics
+from .utils.cache import all_cache_stats
+from .utils.audit import audit_writer
+from .utils.rate_limit import login_limiter
+request_metrics.register_collector("cache", all_cache_stats)
+request_metrics.register_collector("audit", audit_writer.stats)
+request_metrics.register_collector("hashing", hashing_service.stats)
+request_metrics.register_collector("captcha", captcha_pool.stats)
+request_metrics.register_collector("session", session_store.stats)
+request_metrics.register_collector("login_limit", login_limiter.stats)
+request_metrics.register_collector("search", search_index.stats)
+request_metrics.register_collector("ngram", ngram_index.stats)
+request_metrics.register_collector("result_cache", result_cache.stats)
+request_metrics.register_collector("project_summary", project_summary.stats)
+request_metrics.register_collector("event_stats", event_stats.stats)
+if Config.METRICS_ENABLED:
+    request_metrics.init_app(app)
+
+# 管理员按请求开启的性能分析
+from .utils.profiler import request_profiler
+request_profiler.init_app(app)
+
 # 初始化 FlaskApiSpec
 docs = FlaskApiSpec(app)
 
@@ -50,6 +133,9 @@ from .api.v1.project_api import project_bp  # 导入项目管理接口
 from .api.v1.event_api import event_bp  # 导入事件管理接口
 from .api.v1.company_api import company_bp
 from .api.v1.project_event_api import project_event_bp
+from .api.v1.monitor_api import monitor_bp, metrics_bp
+from .api.v1.import_api import import_bp
+from .api.v1.export_api import export_bp
 
 app.register_blueprint(user_bp, url_prefix="/api/v1.0/MST")
 #app.register_blueprint(event_bp, url_prefix="/prjeventsys/v1")
@@ -61,6 +147,10 @@ app.register_blueprint(event_bp, url_prefix="/api/v1.0/BUS")  # 注册事件管
 app.register_blueprint(project_bp, url_prefix="/api/v1.0/BUS")  # 注册项目管理接口
 app.register_blueprint(company_bp, url_prefix="/api/v1.0/MST")  # 注册公司管理接口
 app.register_blueprint(project_event_bp, url_prefix="/api/v1.0/BUS")  # 注册项目事件管理接口
+app.register_blueprint(monitor_bp, url_prefix="/prjeventsys/v1")  # 注册运行监控接口
+app.register_blueprint(metrics_bp)  # 注册 Prometheus 指标接口 /metrics
+app.register_blueprint(import_bp, url_prefix="/prjeventsys/v1")  # 注册主数据导入接口
+app.register_blueprint(export_bp, url_prefix="/api/v1.0/BUS")  # 注册数据导出接口
 
 # 注册API文档
 from .api.v1.user_api import user_routes
@@ -69,6 +159,9 @@ from .api.v1.project_api import project_routes
 from .api.v1.event_api import event_routes
 from .api.v1.company_api import company_routes
 from .api.v1.project_event_api import project_event_routes
+from .api.v1.monitor_api import monitor_routes, metrics_routes
+from .api.v1.import_api import import_routes
+from .api.v1.export_api import export_routes
 
 # 注册用户相关API文档
 for route,path in user_routes:
@@ -93,3 +186,30 @@ for route,path in company_routes:
 # # 注册项目事件相关API文档
 for route,path in project_event_routes:
     docs.register(route, endpoint=path, blueprint='project_event')
+
+# # 注册运行监控相关API文档
+for route,path in monitor_routes:
+    docs.register(route, endpoint=path, blueprint='monitor')
+
+for route,path in metrics_routes:
+    docs.register(route, endpoint=path, blueprint='metrics')
+
+# # 注册主数据导入相关API文档
+for route,path in import_routes:
+    docs.register(route, endpoint=path, blueprint='import')
+
+# # 注册数据导出相关API文档
+for route,path in export_routes:
+    docs.register(route, endpoint=path, blueprint='export')
+
+# 注册命令行: flask --app run import-data users users.xlsx
+from .utils.importer import import_data_command
+app.cli.add_command(import_data_command)
+
+# 注册命令行: flask --app run rebuild-project-summary
+from .utils.project_summary import rebuild_summary_command
+app.cli.add_command(rebuild_summary_command)
+
+# 注册命令行: flask --app run rebuild-event-stats
+from .utils.event_stats import rebuild_event_stats_command
+app.cli.add_command(rebuild_event_stats_command)
@@ -1,16 +1,16 @@
 from flask import Blueprint, session, make_response, jsonify, request
-from app.models import SessionLocal,User  # 导入 SessionLocal
-from app.utils.crypto import PasswordService
+from app.models import db_session, User  # 导入请求级会话
+from app.utils.crypto import PasswordService, rsa_key_manager
+from app.utils.hashing import hashing_service
+from app.utils.cache import user_cache
+from app.utils.rate_limit import login_limiter
 import datetime
 import base64
 from app.config import Config  # 导入配置类
-
-# 加载 RSA 密钥
-PRIVATE_KEY, PUBLIC_KEY = Config.load_rsa_keys()  # 获取私钥
 from loguru import logger
 from app.auth import login, logout
-from app.utils.decorators import login_required
-from app.auth import generate_captcha_text, generate_captcha_image
+from app.utils.decorators import login_required, admin_required
+from app.auth import captcha_pool
 # 创建Blueprint
 auth_bp = Blueprint("auth", __name__)
 
@@ -44,23 +44,28 @@ def get_captcha():
                     example: Internal server error
     """
     try:
-        # 生成验证码文本
-        captcha_text = generate_captcha_text()
+        # 从预生成池中取出验证码文本与图片
+        captcha_text, image_bytes = captcha_pool.get()
 
         # 将验证码文本存储到session中
         session["captcha"] = captcha_text
-        
-        # 生成验证码图片
-        image_buffer = generate_captcha_image(captcha_text)
 
         # 返回验证码图片
-        response = make_response(image_buffer.getvalue())
+        response = make_response(image_bytes)
         response.headers['Content-Type'] = 'image/png'
         return response
     except Exception as e:
         logger.error(f"生成验证码失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
 
+def too_many_attempts(retry_after):
+    """
+    登录尝试超限时的 429 响应
+    """
+    response = jsonify({"error": "登录尝试过于频繁，请稍后重试", "retry_after": retry_after})
+    response.headers["Retry-After"] = str(retry_after)
+    return response, 429
+
 @auth_bp.route("/login", methods=["POST"])
 def login():
     """
@@ -76,7 +81,14 @@ def login():
     """
     try:
         data = request.json
-        db = SessionLocal()
+        db = db_session()
+
+        # 按 IP 限流在验证码校验之前执行，超限直接拒绝
+        empcode = data.get("empcode")
+        client_ip = request.remote_addr
+        allowed, retry_after = login_limiter.check_ip(empcode, client_ip)
+        if not allowed:
+            return too_many_attempts(retry_after)
 
         # 验证验证码
         if "captcha" not in session:
@@ -88,27 +100,39 @@ def login():
         if not user_captcha.lower() == session["captcha"].lower():
             return jsonify({"error": "验证码错误"}), 400
 
+        # 按工号限流在验证码通过之后、RSA 解密与密码校验之前执行
+        allowed, retry_after = login_limiter.check_user(empcode, client_ip)
+        if not allowed:
+            return too_many_attempts(retry_after)
+
         # 验证用户是否存在
-        empcode = data.get("empcode")
         user = db.query(User).filter(User.empcode == empcode).first()
         if not user:
+            login_limiter.record_failure(empcode, client_ip)
             return jsonify({"error": "用户不存在"}), 404
 
-        # 验证密码
+        # 验证密码（使用密钥管理器中缓存的私钥，kid 为空时依次尝试当前与保留的旧密钥）
         encrypted_password = data.get("password")
-        logger.debug('web encrypted password is: ')
-        logger.debug(encrypted_password)
-        logger.debug('============================')
         try:
-            decrypted_password = PasswordService.decrypt_rsa(encrypted_password, PRIVATE_KEY)  # 使用密钥字符串
+            decrypted_password = PasswordService.decrypt_rsa(encrypted_password, kid=data.get("kid"))
         except Exception as e:
             logger.error(f"RSA解密失败: {e}")
+            login_limiter.record_failure(empcode, client_ip)
             return jsonify({"error": "密码解密失败"}), 400
 
-        if not PasswordService.verify_password(decrypted_password, user.passwd):
+        if not hashing_service.verify_password(decrypted_password, user.passwd):
+            login_limiter.record_failure(empcode, client_ip)
             return jsonify({"error": "密码错误"}), 401
+        login_limiter.record_success(empcode, client_ip)
+
+        # 加密参数调整后，旧哈希在登录成功时按当前配置重新加密
+        if hashing_service.rehash_if_needed(user, decrypted_password):
+            db.commit()
+            user_cache.invalidate(user.empid)
+            logger.info(f"用户 {empcode} 的密码已按当前加密参数重新加密")
 
-        # 登录成功，设置 session
+        # 登录成功，更换会话id后设置 session
+        session.regenerate()
         session["login_status"] = True
         session["empcode"] = user.empcode
         session["empid"] = user.empid
@@ -118,8 +142,6 @@ def login():
     except Exception as e:
         logger.error(f"登录错误: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close()
 
 # @auth_bp.route("/simple_login", methods=["POST"])
 # def simple_login():
@@ -136,7 +158,7 @@ def login():
 #     """
 #     try:
 #         data = request.json
-#         db = SessionLocal()
+#         db = db_session()
 
 #         # 验证验证码
 #         if "captcha" not in session:
@@ -227,9 +249,70 @@ def user_logout():
         logger.error(f"登出错误: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
 
+@auth_bp.route("/public_key", methods=["GET"])
+def get_public_key():
+    """
+    获取 RSA 公钥接口
+    ---
+    get:
+      tags:
+        - 认证管理
+      summary: 获取当前 RSA 公钥
+      description: 返回当前密钥的 key id 与公钥 PEM，前端加密密码后可随请求回传 kid
+      responses:
+        200:
+          description: 查询成功
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  kid:
+                    type: string
+                  public_key:
+                    type: string
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        kid = rsa_key_manager.active_kid
+        return jsonify({"kid": kid, "public_key": rsa_key_manager.public_pem(kid)})
+    except Exception as e:
+        logger.error(f"获取公钥失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@auth_bp.route("/reload_rsa_keys", methods=["POST"])
+@admin_required
+def reload_rsa_keys():
+    """
+    热加载 RSA 密钥接口
+    ---
+    post:
+      tags:
+        - 认证管理
+      summary: 重新读取密钥文件
+      description: 重新读取配置的密钥文件并设为当前密钥，旧密钥保留用于解密过渡期内的密文（仅管理员）
+      responses:
+        200:
+          description: 加载成功
+        403:
+          description: 非管理员
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        kid = rsa_key_manager.reload()
+        logger.info(f"RSA 密钥热加载完成, 当前 kid: {kid}")
+        return jsonify({"message": "密钥加载成功", "kid": kid})
+    except Exception as e:
+        logger.error(f"RSA 密钥热加载失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
 # 定义需要生成文档的路由
 auth_routes = [
     (get_captcha, "get_captcha"),
     (login, "login"),
-    (user_logout, "user_logout")
+    (user_logout, "user_logout"),
+    (get_public_key, "get_public_key"),
+    (reload_rsa_keys, "reload_rsa_keys")
 ]
\ No newline at end of file
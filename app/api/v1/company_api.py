@@ -1,7 +1,12 @@
 from flask import Blueprint, request, jsonify, session
-from app.models import SessionLocal, Company
+from app.models import db_session, Company
 from app.schemas.company_schema import CompanyCreateSchema, CompanyUpdateSchema, CompanyQuerySchema
 from app.utils.decorators import login_required
+from app.utils.errors import BusinessError
+from app.utils.pagination import keyset_paginate, paginated_response, stream_json
+from app.utils.batch import load_batch, BatchResult, validate_items, reject_duplicates, bulk_insert
+from app.utils.ngram import ngram_index
+from app.utils.result_cache import result_cache
 from datetime import datetime
 from loguru import logger
 from flask_apispec import use_kwargs
@@ -9,6 +14,21 @@ from flask_apispec import use_kwargs
 # 创建Blueprint
 company_bp = Blueprint("company", __name__)
 
+def company_to_dict(company):
+    """
+    公司记录转查询结果字典
+    """
+    return {
+        "compid": company.compid,
+        "compcode": company.compcode,
+        "compname": company.compname,
+        "compadd": company.compadd,
+        "uscicode": company.uscicode,
+        "createuser": company.createuser,
+        "createdate": company.createdate.isoformat() if company.createdate else None,
+        "status": company.status
+    }
+
 @company_bp.route("/create_company", methods=["POST"])
 @login_required
 def create_company():
@@ -33,7 +53,7 @@ def create_company():
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 验证输入参数
         data = request.json
@@ -63,8 +83,6 @@ def create_company():
         db.rollback()
         logger.error(f"公司创建失败: {e}")
         return jsonify({"error": "公司创建失败", "details": str(e)}), 500
-    finally:
-        db.close()
 
 @company_bp.route("/edit_company/<int:company_id>", methods=["POST"])
 @login_required
@@ -98,7 +116,7 @@ def edit_company(company_id):
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 验证输入参数
         data = request.json
@@ -138,12 +156,11 @@ def edit_company(company_id):
         db.rollback()
         logger.error(f"公司信息修改失败: {e}")
         return jsonify({"error": "公司信息修改失败", "details": str(e)}), 500
-    finally:
-        db.close()
 
 @company_bp.route("/query_companies", methods=["POST"])
 @login_required
 @use_kwargs(CompanyQuerySchema)
+@result_cache.cached("query_companies", Company)
 def query_companies(**kwargs):
     """
     查询公司信息接口
@@ -152,7 +169,7 @@ def query_companies(**kwargs):
       tags:
         - 公司管理
       summary: 查询公司信息
-      description: 根据条件查询公司信息，支持模糊查询和时间范围查询
+      description: 根据条件查询公司信息，支持模糊查询和时间范围查询，按 compid 游标分页
       requestBody:
         required: true
         content:
@@ -160,27 +177,36 @@ def query_companies(**kwargs):
             schema: CompanyQuerySchema
       responses:
         200:
-          description: 查询成功
+          description: 查询成功，返回 data 与 pagination（stream 为 true 时仅返回 data）
           content:
             application/json:
               schema:
-                type: array
-                items:
-                  $ref: '#/components/schemas/Company'
+                type: object
+                properties:
+                  data:
+                    type: array
+                    items:
+                      $ref: '#/components/schemas/Company'
+                  pagination:
+                    $ref: '#/components/schemas/Pagination'
+        304:
+          description: 结果未变化（请求头 If-None-Match 与上次响应的 ETag 一致）
+        400:
+          description: 游标无效
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         query = db.query(Company)
         
         # 处理模糊查询条件
         if kwargs.get("compcode"):
-            query = query.filter(Company.compcode.ilike(f"%{kwargs['compcode']}%"))
+            query = query.filter(ngram_index.contains(query.session, Company.compcode, kwargs['compcode']))
         if kwargs.get("compname"):
-            query = query.filter(Company.compname.ilike(f"%{kwargs['compname']}%"))
+            query = query.filter(ngram_index.contains(query.session, Company.compname, kwargs['compname']))
         if kwargs.get("compadd"):
-            query = query.filter(Company.compadd.ilike(f"%{kwargs['compadd']}%"))
+            query = query.filter(ngram_index.contains(query.session, Company.compadd, kwargs['compadd']))
             
         # 处理精确查询条件
         if kwargs.get("uscicode"):
@@ -198,27 +224,98 @@ def query_companies(**kwargs):
                 )
             )
             
-        companies = query.all()
-        return jsonify([{
-            "compid": company.compid,
-            "compcode": company.compcode,
-            "compname": company.compname,
-            "compadd": company.compadd,
-            "uscicode": company.uscicode,
-            "createuser": company.createuser,
-            "createdate": company.createdate.isoformat() if company.createdate else None,
-            "status": company.status
-        } for company in companies])
+        # 按主键做游标分页，或分块流式输出全部结果
+        order_columns = [Company.compid]
+        if kwargs.get("stream"):
+            return stream_json(query, order_columns, company_to_dict)
+
+        companies, next_cursor = keyset_paginate(query, order_columns, kwargs["limit"], kwargs.get("cursor"))
+        return paginated_response([company_to_dict(company) for company in companies], kwargs["limit"], next_cursor)
         
+    except BusinessError as e:
+        logger.warning(f"查询公司信息参数错误: {e}")
+        return jsonify({"error": e.message}), 400
     except Exception as e:
         logger.error(f"查询公司信息失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close() 
+
+@company_bp.route("/batch_create_companies", methods=["POST"])
+@login_required
+def batch_create_companies():
+    """
+    批量创建公司接口
+    ---
+    post:
+      tags:
+        - 公司管理
+      summary: 批量创建公司
+      description: 使用 CompanyCreateSchema 逐条校验，公司编码与库中或同批重复的条目判为失败，其余条目在一个事务内批量插入
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                items:
+                  type: array
+                  items: CompanyCreateSchema
+                atomic:
+                  type: boolean
+                  description: 为 true 时任一条目失败则整批不提交
+      responses:
+        200:
+          description: 至少一条成功，results 中逐条给出 status（created/failed/skipped）与 company_id 及失败原因
+        400:
+          description: 请求体无效或全部条目失败
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        items, atomic = load_batch(request.get_json(silent=True))
+        result = BatchResult(len(items))
+        valid = validate_items(items, CompanyCreateSchema(), result)
+
+        # 一次查询库中已存在的公司编码
+        codes = [data["compcode"] for _, data in valid]
+        existing = {row.compcode for row in db.query(Company.compcode).filter(Company.compcode.in_(codes))} if codes else set()
+        valid = reject_duplicates(valid, "compcode", existing, result, "公司编码")
+
+        if atomic and result.failed:
+            result.abort("同批存在失败条目，整批未提交")
+            return result.response()
+
+        now = datetime.now()
+        rows = [{
+            "compcode": data["compcode"],
+            "compname": data["compname"],
+            "compadd": data.get("compadd"),
+            "uscicode": data.get("uscicode"),
+            "createuser": session["empid"],
+            "createdate": now,
+            "status": 0
+        } for _, data in valid]
+        bulk_insert(db, Company, rows)
+        db.commit()
+
+        for (index, _), row in zip(valid, rows):
+            result.succeed(index, company_id=row["compid"])
+        logger.info(f"批量创建公司: 共 {len(items)} 条，成功 {len(rows)} 条")
+        return result.response()
+
+    except BusinessError as e:
+        logger.warning(f"批量创建公司参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        db.rollback()
+        logger.error(f"批量创建公司失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
 
 # 定义需要生成文档的路由
 company_routes = [
     (create_company, "create_company"),
     (edit_company, "edit_company"),
-    (query_companies, "query_companies")
+    (query_companies, "query_companies"),
+    (batch_create_companies, "batch_create_companies")
 ]
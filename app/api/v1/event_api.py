@@ -1,14 +1,54 @@
 from flask import Blueprint, session, request, jsonify
-from app.models import SessionLocal, Event
-from app.schemas.event_schema import EventCreateSchema, EventUpdateSchema, EventQuerySchema
+from app.models import db_session, Event, ProjectEvent
+from app.schemas.event_schema import EventCreateSchema, EventUpdateSchema, EventQuerySchema, EventStatsSchema
 from loguru import logger
 from app.utils.decorators import login_required
+from app.utils.errors import BusinessError
+from app.utils.pagination import keyset_paginate, paginated_response, stream_json
+from app.utils.batch import load_batch, BatchResult, validate_items, bulk_insert, parse_date
+from app.utils.search import search_index
+from app.schemas.search_schema import SearchSchema
+from app.utils.event_stats import event_stats
+from app.utils.result_cache import result_cache
 from datetime import datetime
 from flask_apispec import use_kwargs
 
 # 创建Blueprint
 event_bp = Blueprint("event", __name__)
 
+def event_to_dict(event):
+    """
+    事件记录转查询结果字典
+    """
+    return {
+        "eventid": event.eventid,
+        "reporter": event.reporter,
+        "reportertime": event.reportertime.isoformat() if event.reportertime else None,
+        "event": event.event,
+        "status": event.status
+    }
+
+def filter_events(query, kwargs):
+    """
+    按事件查询参数追加过滤条件，查询与导出接口共用
+    """
+    # 处理精确查询条件
+    if kwargs.get("reporter"):
+        query = query.filter(Event.reporter == kwargs["reporter"])
+    if kwargs.get("status") is not None:
+        query = query.filter(Event.status == kwargs["status"])
+
+    # 处理时间范围查询
+    if kwargs.get("reportertime_start"):
+        # 如果未传结束时间，使用当前时间作为结束时间
+        end_time = kwargs.get("reportertime_end") or datetime.now().strftime("%Y-%m-%d")
+        query = query.filter(
+            Event.reportertime.between(
+                kwargs["reportertime_start"], end_time
+            )
+        )
+    return query
+
 @event_bp.route("/CreateEvent", methods=["POST"])
 def create_event():
     """
@@ -29,7 +69,7 @@ def create_event():
         validated_data = schema.load(data)
 
         # 创建数据库会话
-        db = SessionLocal()
+        db = db_session()
 
         # 创建事件记录
         new_event = Event(
@@ -48,9 +88,6 @@ def create_event():
         logger.error(f"事件创建失败: {e}")
         return jsonify({"error": "事件创建失败", "details": str(e)}), 500
 
-    finally:
-        db.close()
-
 @event_bp.route("/update_event/<int:event_id>", methods=["POST"])
 @login_required
 def update_event(event_id):
@@ -83,7 +120,7 @@ def update_event(event_id):
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 验证输入参数
         data = request.json
@@ -117,8 +154,6 @@ def update_event(event_id):
         db.rollback()
         logger.error(f"事件信息修改失败: {e}")
         return jsonify({"error": "事件信息修改失败", "details": str(e)}), 500
-    finally:
-        db.close()
 
 @event_bp.route("/query_events", methods=["POST"])
 @login_required
@@ -131,7 +166,7 @@ def query_events(**kwargs):
       tags:
         - 事件管理
       summary: 查询事件信息
-      description: 根据条件查询事件信息，支持组合查询和时间范围查询
+      description: 根据条件查询事件信息，支持组合查询和时间范围查询，按 (reportertime, eventid) 游标分页
       requestBody:
         required: true
         content:
@@ -139,55 +174,223 @@ def query_events(**kwargs):
             schema: EventQuerySchema
       responses:
         200:
-          description: 查询成功
+          description: 查询成功，返回 data 与 pagination（stream 为 true 时仅返回 data）
           content:
             application/json:
               schema:
-                type: array
-                items:
-                  $ref: '#/components/schemas/Event'
+                type: object
+                properties:
+                  data:
+                    type: array
+                    items:
+                      $ref: '#/components/schemas/Event'
+                  pagination:
+                    $ref: '#/components/schemas/Pagination'
+        400:
+          description: 游标无效
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         query = db.query(Event)
+        query = filter_events(query, kwargs)
+
+        # 按 (报告时间, 事件id) 做游标分页，或分块流式输出全部结果
+        order_columns = [Event.reportertime, Event.eventid]
+        if kwargs.get("stream"):
+            return stream_json(query, order_columns, event_to_dict)
+
+        events, next_cursor = keyset_paginate(query, order_columns, kwargs["limit"], kwargs.get("cursor"))
+        return paginated_response([event_to_dict(event) for event in events], kwargs["limit"], next_cursor)
         
-        # 处理精确查询条件
-        if kwargs.get("reporter"):
-            query = query.filter(Event.reporter == kwargs["reporter"])
-        if kwargs.get("status") is not None:
-            query = query.filter(Event.status == kwargs["status"])
-            
-        # 处理时间范围查询
-        if kwargs.get("reportertime_start"):
-            # 如果未传结束时间，使用当前时间作为结束时间
-            end_time = kwargs.get("reportertime_end") or datetime.now().strftime("%Y-%m-%d")
-            query = query.filter(
-                Event.reportertime.between(
-                    kwargs["reportertime_start"], end_time
-                )
-            )
-            
-        events = query.all()
-        return jsonify([{
-            "eventid": event.eventid,
-            "reporter": event.reporter,
-            "reportertime": event.reportertime.isoformat() if event.reportertime else None,
-            "event": event.event,
-            "status": event.status
-        } for event in events])
-        
+    except BusinessError as e:
+        logger.warning(f"查询事件信息参数错误: {e}")
+        return jsonify({"error": e.message}), 400
     except Exception as e:
         logger.error(f"查询事件信息失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close()
+
+@event_bp.route("/search_events", methods=["POST"])
+@login_required
+@use_kwargs(SearchSchema)
+def search_events(**kwargs):
+    """
+    事件全文检索接口
+    ---
+    post:
+      tags:
+        - 事件管理
+      summary: 按事件内容全文检索事件
+      description: 中文按二元组分词，多个关键字以空格分隔需同时命中；结果按相关度（BM25）排序，附带摘要与高亮区间
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema: SearchSchema
+      responses:
+        200:
+          description: 查询成功，data 中每项在事件字段外附带 score、snippet 与 highlights（摘要内的 [起, 止) 下标）
+        400:
+          description: 关键字无可检索内容或游标无效
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        terms, hits, next_cursor = search_index.search_page(db, "event", kwargs)
+        events = {}
+        if hits:
+            events = {e.eventid: e for e in db.query(Event).filter(Event.eventid.in_([eventid for eventid, _ in hits]))}
+
+        data = []
+        for eventid, score in hits:
+            event = events.get(eventid)
+            if event is None:
+                continue
+            item = event_to_dict(event)
+            item["score"] = round(score, 4)
+            item["snippet"], item["highlights"] = search_index.snippet(event.event, terms)
+            data.append(item)
+        return paginated_response(data, kwargs["limit"], next_cursor)
+
+    except BusinessError as e:
+        logger.warning(f"事件全文检索参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        logger.error(f"事件全文检索失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@event_bp.route("/event_stats", methods=["POST"])
+@login_required
+@use_kwargs(EventStatsSchema)
+@result_cache.cached("event_stats", Event, ProjectEvent)
+def query_event_stats(**kwargs):
+    """
+    事件统计接口
+    ---
+    post:
+      tags:
+        - 事件管理
+      summary: 按日、周、月统计事件数
+      description: 对按日维护的事件统计求和，可按项目、报告人、状态分组或过滤。按项目分组或过滤时统计状态正常的项目关联，否则统计全部事件
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema: EventStatsSchema
+      responses:
+        200:
+          description: 查询成功，data 中每项为 period（周期第一天）、各分组维度与 count
+        304:
+          description: 结果未变化（请求头 If-None-Match 与上次响应的 ETag 一致）
+        400:
+          description: 日期区间无效
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        data = event_stats.rollup(
+            db,
+            parse_date(kwargs["date_start"]),
+            parse_date(kwargs["date_end"]),
+            granularity=kwargs["granularity"],
+            group_by=kwargs["group_by"],
+            prjid=kwargs.get("prjid"),
+            reporter=kwargs.get("reporter"),
+            status=kwargs.get("status")
+        )
+        return jsonify({
+            "granularity": kwargs["granularity"],
+            "data": data,
+            "total": sum(item["count"] for item in data)
+        })
+
+    except BusinessError as e:
+        logger.warning(f"事件统计参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        logger.error(f"事件统计查询失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@event_bp.route("/batch_create_events", methods=["POST"])
+@login_required
+def batch_create_events():
+    """
+    批量创建事件接口
+    ---
+    post:
+      tags:
+        - 事件管理
+      summary: 批量创建事件
+      description: 使用 EventCreateSchema 逐条校验，校验通过的条目在一个事务内批量插入
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                items:
+                  type: array
+                  items: EventCreateSchema
+                atomic:
+                  type: boolean
+                  description: 为 true 时任一条目失败则整批不提交
+      responses:
+        200:
+          description: 至少一条成功，results 中逐条给出 status（created/failed/skipped）与 event_id 及失败原因
+        400:
+          description: 请求体无效或全部条目失败
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        items, atomic = load_batch(request.get_json(silent=True))
+        result = BatchResult(len(items))
+        valid = validate_items(items, EventCreateSchema(), result)
+
+        if atomic and result.failed:
+            result.abort("同批存在失败条目，整批未提交")
+            return result.response()
+
+        rows = []
+        for _, data in valid:
+            row = {
+                "reporter": data["reporter"],
+                "event": data["event"],
+                "createuser": session["empid"],
+                "status": 0
+            }
+            # 未填写报告时间时使用数据库默认值
+            if data.get("reportertime"):
+                row["reportertime"] = parse_date(data["reportertime"])
+            rows.append(row)
+        bulk_insert(db, Event, rows)
+        db.commit()
+
+        for (index, _), row in zip(valid, rows):
+            result.succeed(index, event_id=row["eventid"])
+        logger.info(f"批量创建事件: 共 {len(items)} 条，成功 {len(rows)} 条")
+        return result.response()
+
+    except BusinessError as e:
+        logger.warning(f"批量创建事件参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        db.rollback()
+        logger.error(f"批量创建事件失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
 
 # 定义需要生成文档的路由
 event_routes = [
     (create_event, "create_event"),
     (update_event, "update_event"),
-    (query_events, "query_events")
+    (query_events, "query_events"),
+    (search_events, "search_events"),
+    (query_event_stats, "query_event_stats"),
+    (batch_create_events, "batch_create_events")
 ]
 
@@ -0,0 +1,253 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify
+from loguru import logger
+from flask_apispec import use_kwargs
+from app.models import db_session, Project, Event, ProjectEvent, OperationLog
+from app.schemas.export_schema import ProjectExportSchema, EventExportSchema, ProjectEventExportSchema, OperationLogExportSchema
+from app.utils.decorators import login_required, admin_required
+from app.utils.errors import BusinessError
+from app.utils.export import export_response
+from app.api.v1.project_api import project_to_dict, filter_projects
+from app.api.v1.event_api import event_to_dict, filter_events
+from app.api.v1.project_event_api import filter_project_events
+
+# 创建Blueprint
+export_bp = Blueprint("export", __name__)
+
+# 各导出的列：(字段名, 表头)
+PROJECT_COLUMNS = [
+    ("prjid", "项目id"), ("prjcode", "项目编码"), ("prjname", "项目名称"), ("ownerid", "项目经理"),
+    ("sponsorid", "项目发起人"), ("approvetime", "批准时间"), ("expectedtime", "预期结束时间"), ("status", "状态")
+]
+EVENT_COLUMNS = [
+    ("eventid", "事件id"), ("reporter", "报告人"), ("reportertime", "报告时间"), ("event", "事件内容"), ("status", "状态")
+]
+PROJECT_EVENT_COLUMNS = [
+    ("prjcode", "项目编码"), ("prjname", "项目名称"), ("leafid", "节点id"), ("parentid", "父节点id"),
+    ("depth", "深度"), ("path", "路径"), ("eventid", "事件id"), ("reporter", "报告人"),
+    ("reportertime", "报告时间"), ("event", "事件内容")
+]
+OPERATION_LOG_COLUMNS = [
+    ("id", "日志id"), ("operation_name", "操作名称"), ("api_path", "接口路径"), ("request_params", "请求参数"),
+    ("operation_time", "操作时间"), ("operator_id", "操作人"), ("response_status", "响应状态码"), ("duration_ms", "耗时(毫秒)")
+]
+
+def project_event_row_to_dict(row):
+    """
+    项目事件树导出行转字典
+    """
+    return {
+        "prjcode": row.prjcode,
+        "prjname": row.prjname,
+        "leafid": row.leafid,
+        "parentid": row.parentid,
+        "depth": row.depth,
+        "path": row.path,
+        "eventid": row.eventid,
+        "reporter": row.reporter,
+        "reportertime": row.reportertime.isoformat() if row.reportertime else None,
+        "event": row.event
+    }
+
+def operation_log_to_dict(log):
+    """
+    操作日志记录转字典
+    """
+    return {
+        "id": log.id,
+        "operation_name": log.operation_name,
+        "api_path": log.api_path,
+        "request_params": log.request_params,
+        "operation_time": log.operation_time.isoformat(sep=" ") if log.operation_time else None,
+        "operator_id": log.operator_id,
+        "response_status": log.response_status,
+        "duration_ms": log.duration_ms
+    }
+
+def _export_error(e, name):
+    """
+    导出参数错误或并发已满时的统一响应
+    """
+    logger.warning(f"导出{name}失败: {e}")
+    return jsonify({"error": e.message}), 429 if e.code == 2301 else 400
+
+@export_bp.route("/export_projects", methods=["GET"])
+@login_required
+@use_kwargs(ProjectExportSchema, location="query")
+def export_projects(**kwargs):
+    """
+    项目导出接口
+    ---
+    get:
+      tags:
+        - 数据导出
+      summary: 导出项目
+      description: 过滤条件与 query_projects 相同，按项目id顺序以 CSV/NDJSON/XLSX 流式下载
+      parameters:
+        - in: query
+          schema: ProjectExportSchema
+      responses:
+        200:
+          description: 文件流
+        400:
+          description: 参数错误
+        429:
+          description: 同时进行的导出过多
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        query = filter_projects(db_session().query(Project), kwargs)
+        return export_response(query, [Project.prjid], PROJECT_COLUMNS, project_to_dict, kwargs["format"], "projects")
+    except BusinessError as e:
+        return _export_error(e, "项目")
+    except Exception as e:
+        logger.error(f"导出项目失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@export_bp.route("/export_events", methods=["GET"])
+@login_required
+@use_kwargs(EventExportSchema, location="query")
+def export_events(**kwargs):
+    """
+    事件导出接口
+    ---
+    get:
+      tags:
+        - 数据导出
+      summary: 导出事件
+      description: 过滤条件与 query_events 相同，按 (reportertime, eventid) 顺序以 CSV/NDJSON/XLSX 流式下载
+      parameters:
+        - in: query
+          schema: EventExportSchema
+      responses:
+        200:
+          description: 文件流
+        400:
+          description: 参数错误
+        429:
+          description: 同时进行的导出过多
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        query = filter_events(db_session().query(Event), kwargs)
+        return export_response(query, [Event.reportertime, Event.eventid], EVENT_COLUMNS, event_to_dict,
+                               kwargs["format"], "events")
+    except BusinessError as e:
+        return _export_error(e, "事件")
+    except Exception as e:
+        logger.error(f"导出事件失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@export_bp.route("/export_project_events", methods=["GET"])
+@login_required
+@use_kwargs(ProjectEventExportSchema, location="query")
+def export_project_events(**kwargs):
+    """
+    项目事件树导出接口
+    ---
+    get:
+      tags:
+        - 数据导出
+      summary: 导出项目事件树
+      description: 过滤条件与 query_project_events 相同，按 (项目, 物化路径) 顺序输出，即逐个项目的先序遍历
+      parameters:
+        - in: query
+          schema: ProjectEventExportSchema
+      responses:
+        200:
+          description: 文件流
+        400:
+          description: 参数错误
+        429:
+          description: 同时进行的导出过多
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        query = db_session().query(
+            Project.prjcode,
+            Project.prjname,
+            ProjectEvent.leafid,
+            ProjectEvent.parentid,
+            ProjectEvent.depth,
+            ProjectEvent.path,
+            Event.eventid,
+            Event.reporter,
+            Event.reportertime,
+            Event.event
+        ).join(
+            ProjectEvent, Project.prjid == ProjectEvent.prjid
+        ).join(
+            Event, ProjectEvent.eventid == Event.eventid
+        ).filter(
+            ProjectEvent.status == 0  # 只导出状态正常的记录
+        )
+        query = filter_project_events(query, kwargs)
+        return export_response(query, [ProjectEvent.prjid, ProjectEvent.path], PROJECT_EVENT_COLUMNS,
+                               project_event_row_to_dict, kwargs["format"], "project_events")
+    except BusinessError as e:
+        return _export_error(e, "项目事件")
+    except Exception as e:
+        logger.error(f"导出项目事件失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@export_bp.route("/export_operation_logs", methods=["GET"])
+@admin_required
+@use_kwargs(OperationLogExportSchema, location="query")
+def export_operation_logs(**kwargs):
+    """
+    操作日志导出接口
+    ---
+    get:
+      tags:
+        - 数据导出
+      summary: 导出操作日志（仅管理员）
+      description: 按操作时间范围、操作名称、接口路径、操作人、响应状态码过滤，按日志id顺序流式下载
+      parameters:
+        - in: query
+          schema: OperationLogExportSchema
+      responses:
+        200:
+          description: 文件流
+        400:
+          description: 参数错误
+        403:
+          description: 非管理员
+        429:
+          description: 同时进行的导出过多
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        query = db_session().query(OperationLog)
+        if kwargs.get("operation_name"):
+            query = query.filter(OperationLog.operation_name.ilike(f"%{kwargs['operation_name']}%"))
+        if kwargs.get("api_path"):
+            query = query.filter(OperationLog.api_path == kwargs["api_path"])
+        if kwargs.get("operator_id"):
+            query = query.filter(OperationLog.operator_id == kwargs["operator_id"])
+        if kwargs.get("response_status") is not None:
+            query = query.filter(OperationLog.response_status == kwargs["response_status"])
+        if kwargs.get("operation_time_start"):
+            query = query.filter(OperationLog.operation_time >= datetime.strptime(kwargs["operation_time_start"], "%Y-%m-%d"))
+        if kwargs.get("operation_time_end"):
+            # 结束日期包含当天
+            end_time = datetime.strptime(kwargs["operation_time_end"], "%Y-%m-%d") + timedelta(days=1)
+            query = query.filter(OperationLog.operation_time < end_time)
+        return export_response(query, [OperationLog.id], OPERATION_LOG_COLUMNS, operation_log_to_dict,
+                               kwargs["format"], "operation_logs")
+    except BusinessError as e:
+        return _export_error(e, "操作日志")
+    except Exception as e:
+        logger.error(f"导出操作日志失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+# 定义需要生成文档的路由
+export_routes = [
+    (export_projects, "export_projects"),
+    (export_events, "export_events"),
+    (export_project_events, "export_project_events"),
+    (export_operation_logs, "export_operation_logs")
+]
@@ -0,0 +1,111 @@
+import os
+import tempfile
+from flask import Blueprint, request, jsonify, session
+from loguru import logger
+from app.utils.decorators import admin_required, operation_log
+from app.utils.errors import BusinessError
+from app.utils.importer import IMPORT_TARGETS, start_import_job, get_import_job
+
+# 创建Blueprint
+import_bp = Blueprint("import", __name__)
+
+@import_bp.route("/import/<target>", methods=["POST"])
+@admin_required
+@operation_log("导入主数据")
+def import_data(target):
+    """
+    主数据导入接口
+    ---
+    post:
+      tags:
+        - 数据导入
+      summary: 上传 CSV/XLSX 导入主数据
+      description: 按业务编码（empcode/compcode/prjcode）新增或更新用户、公司、项目。文件在后台分块导入，返回任务id供查询进度
+      parameters:
+        - name: target
+          in: path
+          required: true
+          schema:
+            type: string
+            enum: [users, companies, projects]
+      requestBody:
+        required: true
+        content:
+          multipart/form-data:
+            schema:
+              type: object
+              properties:
+                file:
+                  type: string
+                  format: binary
+      responses:
+        202:
+          description: 导入任务已开始
+        400:
+          description: 导入对象或文件无效
+        401:
+          description: 未登录
+        403:
+          description: 非管理员
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        if target not in IMPORT_TARGETS:
+            return jsonify({"error": f"不支持的导入对象: {target}"}), 400
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            return jsonify({"error": "请上传文件"}), 400
+        extension = os.path.splitext(upload.filename)[1].lower()
+        if extension not in (".csv", ".xlsx", ".xlsm"):
+            return jsonify({"error": "仅支持 .csv 与 .xlsx 文件"}), 400
+
+        # 上传内容先落盘，导入线程读取完成后删除
+        fd, path = tempfile.mkstemp(prefix="import-", suffix=extension)
+        with os.fdopen(fd, "wb") as f:
+            upload.save(f)
+
+        job_id = start_import_job(target, session["empid"], path, upload.filename)
+        logger.info(f"主数据导入任务 {job_id} 已开始: {target} {upload.filename}")
+        return jsonify({"message": "导入任务已开始", "job_id": job_id}), 202
+
+    except BusinessError as e:
+        logger.warning(f"主数据导入参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        logger.error(f"主数据导入失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@import_bp.route("/import_jobs/<job_id>", methods=["GET"])
+@admin_required
+def import_job_status(job_id):
+    """
+    导入任务进度查询接口
+    ---
+    get:
+      tags:
+        - 数据导入
+      summary: 查询导入任务进度
+      description: 返回已处理行数、新增/更新/失败条数、耗时与失败行明细，status 为 running/finished/failed
+      parameters:
+        - name: job_id
+          in: path
+          required: true
+          schema:
+            type: string
+      responses:
+        200:
+          description: 查询成功
+        404:
+          description: 任务不存在
+    """
+    report = get_import_job(job_id)
+    if report is None:
+        return jsonify({"error": "导入任务不存在"}), 404
+    return jsonify(report)
+
+# 定义需要生成文档的路由
+import_routes = [
+    (import_data, "import_data"),
+    (import_job_status, "import_job_status")
+]
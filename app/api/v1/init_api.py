@@ -2,9 +2,9 @@ import os
 import random
 import string
 from flask import Blueprint, jsonify
-from app.models import SessionLocal, User  # 使用绝对导入
+from app.models import db_session, User  # 使用绝对导入
 from app.config import Config  # 使用绝对导入
-from app.utils.crypto import PasswordService  # 使用绝对导入
+from app.utils.hashing import hashing_service  # 使用绝对导入
 from loguru import logger
 
 # 创建Blueprint
@@ -22,7 +22,7 @@ def init_admin():
     """
     初始化管理员用户接口
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 检查是否已经存在管理员用户
         admin_user = db.query(User).filter(User.empcode == "ADM0000").first()
@@ -35,7 +35,7 @@ def init_admin():
         logger.info(f"Generated admin password: {password}")
 
         # 对密码进行加盐加密
-        hashed_password = PasswordService.hash_password(password)  # 使用 crypto.py 中的方法
+        hashed_password = hashing_service.hash_password(password)  # 在加密进程池中计算
         logger.info(f"Hashed admin password: {hashed_password}")
 
         from datetime import datetime  # 导入datetime模块
@@ -70,8 +70,6 @@ def init_admin():
         db.rollback()
         logger.error(f"Error creating admin user: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        db.close()
 
 # 定义需要生成文档的路由
 init_routes = [
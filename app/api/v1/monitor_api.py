@@ -0,0 +1,198 @@
+import hmac
+from flask import Blueprint, Response, jsonify, request, send_from_directory
+from loguru import logger
+from app.utils.metrics import request_metrics
+from app.config import Config
+from app.utils.decorators import admin_required, operation_log
+from app.utils.profiler import request_profiler
+from app.utils.event_stats import event_stats
+from app.utils.errors import BusinessError
+
+# 创建Blueprint
+monitor_bp = Blueprint("monitor", __name__)
+# Prometheus 抓取地址不带业务前缀，单独注册
+metrics_bp = Blueprint("metrics", __name__)
+
+@monitor_bp.route("/component_stats", methods=["GET"])
+@admin_required
+def component_stats():
+    """
+    组件统计接口
+    ---
+    get:
+      tags:
+        - 运行监控
+      summary: 查询各组件运行统计（仅管理员）
+      description: 按组件名返回通过 request_metrics.register_collector 注册的全部统计，包括 cache、audit、hashing、captcha、session、login_limit、search、ngram、result_cache、project_summary、event_stats。传 name 时只返回该组件
+      parameters:
+        - name: name
+          in: query
+          required: false
+          schema:
+            type: string
+      responses:
+        200:
+          description: 查询成功
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  components:
+                    type: object
+        401:
+          description: 未登录
+        403:
+          description: 非管理员
+        404:
+          description: 组件不存在
+        500:
+          description: 服务器内部错误
+    """
+    name = request.args.get("name")
+    try:
+        components = request_metrics.collect(name)
+    except Exception as e:
+        logger.error(f"查询组件统计失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+    if name and not components:
+        return jsonify({"error": "组件不存在"}), 404
+    return jsonify({"components": components})
+
+@monitor_bp.route("/rebuild_event_stats", methods=["POST"])
+@admin_required
+@operation_log("重算事件统计")
+def rebuild_event_stats():
+    """
+    事件统计重算接口
+    ---
+    post:
+      tags:
+        - 运行监控
+      summary: 后台全量重算事件按日统计（仅管理员）
+      description: 按日期区间分批重算，重算期间业务写入不受影响，进度见 component_stats 中的 event_stats
+      responses:
+        202:
+          description: 重算已开始
+        401:
+          description: 未登录
+        403:
+          description: 非管理员
+        409:
+          description: 已有重算在执行
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        state = event_stats.start_rebuild()
+        logger.info("事件统计重算已开始")
+        return jsonify({"message": "重算已开始", "rebuild": state}), 202
+    except BusinessError as e:
+        logger.warning(f"事件统计重算未开始: {e}")
+        return jsonify({"error": e.message}), 409
+    except Exception as e:
+        logger.error(f"启动事件统计重算失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@monitor_bp.route("/profiles", methods=["GET"])
+@admin_required
+def list_profiles():
+    """
+    请求分析结果列表接口
+    ---
+    get:
+      tags:
+        - 运行监控
+      summary: 列出已保存的请求分析结果（仅管理员）
+      description: 按时间倒序返回文件名、大小与生成时间。.prof 为 cProfile 结果，.collapsed 为采样折叠栈
+      responses:
+        200:
+          description: 查询成功
+        403:
+          description: 非管理员
+        500:
+          description: 服务器内部错误
+    """
+    try:
+        return jsonify({"enabled": request_profiler.enabled, "profiles": request_profiler.list_profiles()})
+    except Exception as e:
+        logger.error(f"查询请求分析结果失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@monitor_bp.route("/profiles/<name>", methods=["GET"])
+@admin_required
+def download_profile(name):
+    """
+    请求分析结果下载接口
+    ---
+    get:
+      tags:
+        - 运行监控
+      summary: 下载请求分析结果（仅管理员）
+      parameters:
+        - name: name
+          in: path
+          required: true
+          schema:
+            type: string
+      responses:
+        200:
+          description: 分析结果文件
+        403:
+          description: 非管理员
+        404:
+          description: 文件不存在
+    """
+    return send_from_directory(request_profiler.directory, name, as_attachment=True)
+
+def render_metrics():
+    """
+    输出 Prometheus 文本格式的指标
+    """
+    try:
+        return Response(request_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+    except Exception as e:
+        logger.error(f"输出指标失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus 指标接口
+    ---
+    get:
+      tags:
+        - 运行监控
+      summary: 以 Prometheus 文本格式输出请求与组件指标
+      description: 各接口请求数、耗时直方图、SQL 条数与耗时、响应字节数，以及缓存、进程池等组件统计。需携带 [metrics] token 对应的 Authorization Bearer 令牌或以管理员登录，[metrics] public = True 时允许匿名访问
+      responses:
+        200:
+          description: 指标文本
+        401:
+          description: 未登录且令牌错误
+        403:
+          description: 非管理员
+        404:
+          description: 未启用指标采集
+    """
+    if not Config.METRICS_ENABLED:
+        return jsonify({"error": "未启用指标采集"}), 404
+    if Config.METRICS_PUBLIC:
+        return render_metrics()
+    if Config.METRICS_TOKEN:
+        expected = f"Bearer {Config.METRICS_TOKEN}"
+        if hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+            return render_metrics()
+    # 未开放匿名访问且没有有效令牌时，只允许管理员会话
+    return admin_required(render_metrics)()
+
+# 定义需要生成文档的路由
+monitor_routes = [
+    (component_stats, "component_stats"),
+    (rebuild_event_stats, "rebuild_event_stats"),
+    (list_profiles, "list_profiles"),
+    (download_profile, "download_profile")
+]
+metrics_routes = [
+    (metrics, "metrics")
+]
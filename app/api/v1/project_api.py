@@ -1,14 +1,83 @@
 from flask import Blueprint, request, jsonify, session
-from app.models import SessionLocal, Project, ProjectMember, User
-from app.schemas.project_schema import ProjectCreateSchema, ProjectUpdateSchema, ProjectQuerySchema, ProjectMemberCreateSchema, ProjectMemberRemoveSchema, ProjectMemberQuerySchema
+from app.models import db_session, Project, ProjectMember, User, ProjectEvent, Event, ProjectSummary
+from app.schemas.project_schema import ProjectCreateSchema, ProjectUpdateSchema, ProjectQuerySchema, ProjectMemberCreateSchema, ProjectMemberRemoveSchema, ProjectMemberQuerySchema, ProjectDashboardSchema
 from app.utils.crypto import PasswordService
 from loguru import logger
 from app.utils.decorators import login_required, operation_log
+from app.utils.errors import BusinessError
+from app.utils.pagination import keyset_paginate, paginated_response, stream_json
+from app.utils.batch import load_batch, BatchResult, validate_items, reject_duplicates, bulk_insert, parse_date
+from app.utils.search import search_index
+from app.utils.ngram import ngram_index
+from app.utils.result_cache import result_cache
+from app.schemas.search_schema import SearchSchema
 from flask_apispec import use_kwargs
-from datetime import datetime
+from sqlalchemy import and_, not_
+from datetime import datetime, date
 # 创建Blueprint
 project_bp = Blueprint("project", __name__, url_prefix="/api/v1.0/BUS")
 
+def project_to_dict(project):
+    """
+    项目记录转查询结果字典
+    """
+    return {
+        "prjid": project.prjid,
+        "prjcode": project.prjcode,
+        "prjname": project.prjname,
+        "ownerid": project.ownerid,
+        "sponsorid": project.sponsorid,
+        "approvetime": project.approvetime.isoformat() if project.approvetime else None,
+        "expectedtime": project.expectedtime.isoformat() if project.expectedtime else None,
+        "status": project.status
+    }
+
+def project_member_to_dict(result):
+    """
+    项目成员查询行转结果字典
+    """
+    return {
+        "prjid": result.prjid,
+        "prjcode": result.prjcode,
+        "prjname": result.prjname,
+        "empid": result.empid,
+        "empcode": result.empcode,
+        "empname": result.empname
+    }
+
+def filter_projects(query, kwargs):
+    """
+    按项目查询参数追加过滤条件，查询与导出接口共用
+    """
+    # 处理精确查询条件
+    if kwargs.get("prjcode"):
+        query = query.filter(Project.prjcode == kwargs["prjcode"])
+    if kwargs.get("ownerid"):
+        query = query.filter(Project.ownerid == kwargs["ownerid"])
+    if kwargs.get("sponsorid"):
+        query = query.filter(Project.sponsorid == kwargs["sponsorid"])
+    if kwargs.get("status") is not None:
+        query = query.filter(Project.status == kwargs["status"])
+
+    # 处理模糊查询条件
+    if kwargs.get("prjname"):
+        query = query.filter(ngram_index.contains(query.session, Project.prjname, kwargs['prjname']))
+
+    # 处理时间范围查询
+    if kwargs.get("approvetime_start") and kwargs.get("approvetime_end"):
+        query = query.filter(
+            Project.approvetime.between(
+                kwargs["approvetime_start"], kwargs["approvetime_end"]
+            )
+        )
+    if kwargs.get("expectedtime_start") and kwargs.get("expectedtime_end"):
+        query = query.filter(
+            Project.expectedtime.between(
+                kwargs["expectedtime_start"], kwargs["expectedtime_end"]
+            )
+        )
+    return query
+
 @project_bp.route("/create_project", methods=["POST"])
 @login_required
 def create_project():
@@ -51,7 +120,7 @@ def create_project():
         validated_data = schema.load(data)
 
         # 创建数据库会话
-        db = SessionLocal()
+        db = db_session()
 
         # 创建项目记录
         new_project = Project(
@@ -75,9 +144,6 @@ def create_project():
         logger.error(f"项目创建失败: {e}")
         return jsonify({"error": "项目创建失败", "details": str(e)}), 500
 
-    finally:
-        db.close()
-
 @project_bp.route("/update_project/<int:project_id>", methods=["POST"])
 @login_required
 @use_kwargs(ProjectUpdateSchema)
@@ -109,7 +175,7 @@ def update_project(project_id, **kwargs):
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 查询项目是否存在
         project = db.query(Project).filter(Project.prjid == project_id).first()
@@ -142,12 +208,11 @@ def update_project(project_id, **kwargs):
         db.rollback()
         logger.error(f"项目信息修改失败: {e}")
         return jsonify({"error": "项目信息修改失败", "details": str(e)}), 500
-    finally:
-        db.close()
 
 @project_bp.route("/query_projects", methods=["POST"])
 @login_required
 @use_kwargs(ProjectQuerySchema)
+@result_cache.cached("query_projects", Project)
 def query_projects(**kwargs):
     """
     查询项目信息接口
@@ -156,7 +221,7 @@ def query_projects(**kwargs):
       tags:
         - 项目管理
       summary: 查询项目信息
-      description: 根据条件查询项目信息，支持组合查询和模糊查询
+      description: 根据条件查询项目信息，支持组合查询和模糊查询，按 prjid 游标分页
       requestBody:
         required: true
         content:
@@ -164,65 +229,100 @@ def query_projects(**kwargs):
             schema: ProjectQuerySchema
       responses:
         200:
-          description: 查询成功
+          description: 查询成功，返回 data 与 pagination（stream 为 true 时仅返回 data）
           content:
             application/json:
               schema:
-                type: array
-                items:
-                  $ref: '#/components/schemas/Project'
+                type: object
+                properties:
+                  data:
+                    type: array
+                    items:
+                      $ref: '#/components/schemas/Project'
+                  pagination:
+                    $ref: '#/components/schemas/Pagination'
+        304:
+          description: 结果未变化（请求头 If-None-Match 与上次响应的 ETag 一致）
+        400:
+          description: 游标无效
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         query = db.query(Project)
+        query = filter_projects(query, kwargs)
+
+        # 按主键做游标分页，或分块流式输出全部结果
+        order_columns = [Project.prjid]
+        if kwargs.get("stream"):
+            return stream_json(query, order_columns, project_to_dict)
+
+        projects, next_cursor = keyset_paginate(query, order_columns, kwargs["limit"], kwargs.get("cursor"))
+        return paginated_response([project_to_dict(project) for project in projects], kwargs["limit"], next_cursor)
         
-        # 处理精确查询条件
-        if kwargs.get("prjcode"):
-            query = query.filter(Project.prjcode == kwargs["prjcode"])
-        if kwargs.get("ownerid"):
-            query = query.filter(Project.ownerid == kwargs["ownerid"])
-        if kwargs.get("sponsorid"):
-            query = query.filter(Project.sponsorid == kwargs["sponsorid"])
-        if kwargs.get("status") is not None:
-            query = query.filter(Project.status == kwargs["status"])
-            
-        # 处理模糊查询条件
-        if kwargs.get("prjname"):
-            query = query.filter(Project.prjname.ilike(f"%{kwargs['prjname']}%"))
-            
-        # 处理时间范围查询
-        if kwargs.get("approvetime_start") and kwargs.get("approvetime_end"):
-            query = query.filter(
-                Project.approvetime.between(
-                    kwargs["approvetime_start"], kwargs["approvetime_end"]
-                )
-            )
-        if kwargs.get("expectedtime_start") and kwargs.get("expectedtime_end"):
-            query = query.filter(
-                Project.expectedtime.between(
-                    kwargs["expectedtime_start"], kwargs["expectedtime_end"]
-                )
-            )
-            
-        projects = query.all()
-        return jsonify([{
-            "prjid": project.prjid,
-            "prjcode": project.prjcode,
-            "prjname": project.prjname,
-            "ownerid": project.ownerid,
-            "sponsorid": project.sponsorid,
-            "approvetime": project.approvetime.isoformat() if project.approvetime else None,
-            "expectedtime": project.expectedtime.isoformat() if project.expectedtime else None,
-            "status": project.status
-        } for project in projects])
-        
+    except BusinessError as e:
+        logger.warning(f"查询项目信息参数错误: {e}")
+        return jsonify({"error": e.message}), 400
     except Exception as e:
         logger.error(f"查询项目信息失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close()
+
+@project_bp.route("/search_projects", methods=["POST"])
+@login_required
+@use_kwargs(SearchSchema)
+def search_projects(**kwargs):
+    """
+    项目全文检索接口
+    ---
+    post:
+      tags:
+        - 项目管理
+      summary: 按项目说明与目标全文检索项目
+      description: 中文按二元组分词，多个关键字以空格分隔需同时命中；结果按相关度（BM25）排序，附带摘要与高亮区间
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema: SearchSchema
+      responses:
+        200:
+          description: 查询成功，data 中每项在项目字段外附带 score、snippet、snippet_field（desc/goal）与 highlights
+        400:
+          description: 关键字无可检索内容或游标无效
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        terms, hits, next_cursor = search_index.search_page(db, "project", kwargs)
+        projects = {}
+        if hits:
+            projects = {p.prjid: p for p in db.query(Project).filter(Project.prjid.in_([prjid for prjid, _ in hits]))}
+
+        data = []
+        for prjid, score in hits:
+            project = projects.get(prjid)
+            if project is None:
+                continue
+            item = project_to_dict(project)
+            item["score"] = round(score, 4)
+            # 摘要优先取自命中关键字的字段
+            item["snippet"], item["highlights"] = search_index.snippet(project.desc, terms)
+            item["snippet_field"] = "desc"
+            if not item["highlights"] and project.goal:
+                snippet, highlights = search_index.snippet(project.goal, terms)
+                if highlights:
+                    item["snippet"], item["highlights"], item["snippet_field"] = snippet, highlights, "goal"
+            data.append(item)
+        return paginated_response(data, kwargs["limit"], next_cursor)
+
+    except BusinessError as e:
+        logger.warning(f"项目全文检索参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        logger.error(f"项目全文检索失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
 
 @project_bp.route("/add_project_member", methods=["POST"])
 @login_required
@@ -250,7 +350,7 @@ def add_project_member():
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 校验输入参数
         data = request.json
@@ -302,8 +402,6 @@ def add_project_member():
         db.rollback()
         logger.error(f"新增项目成员失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close()
 
 @project_bp.route("/remove_project_member", methods=["POST"])
 @login_required
@@ -331,7 +429,7 @@ def remove_project_member(**kwargs):
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 查询项目成员记录
         member = db.query(ProjectMember).filter(
@@ -356,8 +454,85 @@ def remove_project_member(**kwargs):
         db.rollback()
         logger.error(f"移除项目成员失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close()
+
+def project_dashboard_to_dict(row, today):
+    """
+    项目看板查询行转结果字典，没有汇总行的项目（尚无成员和事件）按 0 计
+    """
+    normal, disabled = row.normalevents or 0, row.disabledevents or 0
+    return {
+        "prjid": row.prjid,
+        "prjcode": row.prjcode,
+        "prjname": row.prjname,
+        "ownerid": row.ownerid,
+        "expectedtime": row.expectedtime.isoformat() if row.expectedtime else None,
+        "status": row.status,
+        "member_count": row.membercount or 0,
+        "event_count": {"total": normal + disabled, "normal": normal, "disabled": disabled},
+        "tree_depth": row.treedepth or 0,
+        "latest_event_time": row.lasteventtime.isoformat() if row.lasteventtime else None,
+        "overdue": row.expectedtime is not None and row.expectedtime < today
+    }
+
+@project_bp.route("/project_dashboard", methods=["POST"])
+@login_required
+@use_kwargs(ProjectDashboardSchema)
+@result_cache.cached("project_dashboard", Project, ProjectMember, ProjectEvent, Event)
+def project_dashboard(**kwargs):
+    """
+    项目看板接口
+    ---
+    post:
+      tags:
+        - 项目管理
+      summary: 查询项目概览
+      description: 按项目返回成员数、按状态的事件数、事件树层数、最晚事件报告时间与是否过期，读取增量维护的项目汇总表，按 prjid 游标分页
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema: ProjectDashboardSchema
+      responses:
+        200:
+          description: 查询成功，返回 data 与 pagination
+        304:
+          description: 结果未变化（请求头 If-None-Match 与上次响应的 ETag 一致）
+        400:
+          description: 游标无效
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        today = date.today()
+        query = db.query(
+            Project.prjid,
+            Project.prjcode,
+            Project.prjname,
+            Project.ownerid,
+            Project.expectedtime,
+            Project.status,
+            ProjectSummary.membercount,
+            ProjectSummary.normalevents,
+            ProjectSummary.disabledevents,
+            ProjectSummary.treedepth,
+            ProjectSummary.lasteventtime
+        ).outerjoin(ProjectSummary, ProjectSummary.prjid == Project.prjid)
+        query = filter_projects(query, kwargs)
+
+        if kwargs.get("overdue") is not None:
+            overdue = and_(Project.expectedtime.isnot(None), Project.expectedtime < today)
+            query = query.filter(overdue if kwargs["overdue"] else not_(overdue))
+
+        rows, next_cursor = keyset_paginate(query, [Project.prjid], kwargs["limit"], kwargs.get("cursor"))
+        return paginated_response([project_dashboard_to_dict(row, today) for row in rows], kwargs["limit"], next_cursor)
+
+    except BusinessError as e:
+        logger.warning(f"查询项目看板参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        logger.error(f"查询项目看板失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
 
 @project_bp.route("/query_project_members", methods=["POST"])
 @login_required
@@ -370,7 +545,7 @@ def query_project_members(**kwargs):
       tags:
         - 项目管理
       summary: 查询项目成员
-      description: 根据条件查询项目成员信息，支持组合查询和模糊查询
+      description: 根据条件查询项目成员信息，支持组合查询和模糊查询，按 (prjid, empid) 游标分页
       requestBody:
         required: true
         content:
@@ -378,30 +553,37 @@ def query_project_members(**kwargs):
             schema: ProjectMemberQuerySchema
       responses:
         200:
-          description: 查询成功
+          description: 查询成功，返回 data 与 pagination（stream 为 true 时仅返回 data）
           content:
             application/json:
               schema:
-                type: array
-                items:
-                  type: object
-                  properties:
-                    prjid:
-                      type: integer
-                    prjcode:
-                      type: string
-                    prjname:
-                      type: string
-                    empid:
-                      type: integer
-                    empcode:
-                      type: string
-                    empname:
-                      type: string
+                type: object
+                properties:
+                  data:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        prjid:
+                          type: integer
+                        prjcode:
+                          type: string
+                        prjname:
+                          type: string
+                        empid:
+                          type: integer
+                        empcode:
+                          type: string
+                        empname:
+                          type: string
+                  pagination:
+                    $ref: '#/components/schemas/Pagination'
+        400:
+          description: 游标无效
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 构建基础查询
         query = db.query(
@@ -423,37 +605,217 @@ def query_project_members(**kwargs):
         if kwargs.get("empcode"):
             query = query.filter(User.empcode == kwargs["empcode"])
         if kwargs.get("empname"):
-            query = query.filter(User.empname.ilike(f"%{kwargs['empname']}%"))
+            query = query.filter(ngram_index.contains(query.session, User.empname, kwargs['empname']))
         if kwargs.get("prjcode"):
             query = query.filter(Project.prjcode == kwargs["prjcode"])
         if kwargs.get("prjname"):
-            query = query.filter(Project.prjname.ilike(f"%{kwargs['prjname']}%"))
+            query = query.filter(ngram_index.contains(query.session, Project.prjname, kwargs['prjname']))
             
-        # 执行查询
-        results = query.all()
-        
-        # 格式化返回结果
-        return jsonify([{
-            "prjid": result.prjid,
-            "prjcode": result.prjcode,
-            "prjname": result.prjname,
-            "empid": result.empid,
-            "empcode": result.empcode,
-            "empname": result.empname
-        } for result in results])
+        # 按 (项目id, 员工id) 复合主键做游标分页，或分块流式输出全部结果
+        order_columns = [ProjectMember.prjid, User.empid]
+        if kwargs.get("stream"):
+            return stream_json(query, order_columns, project_member_to_dict)
+
+        results, next_cursor = keyset_paginate(query, order_columns, kwargs["limit"], kwargs.get("cursor"))
+        return paginated_response([project_member_to_dict(result) for result in results], kwargs["limit"], next_cursor)
         
+    except BusinessError as e:
+        logger.warning(f"查询项目成员参数错误: {e}")
+        return jsonify({"error": e.message}), 400
     except Exception as e:
         logger.error(f"查询项目成员失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close()
+
+@project_bp.route("/batch_create_projects", methods=["POST"])
+@login_required
+def batch_create_projects():
+    """
+    批量创建项目接口
+    ---
+    post:
+      tags:
+        - 项目管理
+      summary: 批量创建项目
+      description: 使用 ProjectCreateSchema 逐条校验，项目编码与库中或同批重复的条目判为失败，其余条目在一个事务内批量插入
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                items:
+                  type: array
+                  items: ProjectCreateSchema
+                atomic:
+                  type: boolean
+                  description: 为 true 时任一条目失败则整批不提交
+      responses:
+        200:
+          description: 至少一条成功，results 中逐条给出 status（created/failed/skipped）与 project_id 及失败原因
+        400:
+          description: 请求体无效或全部条目失败
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        items, atomic = load_batch(request.get_json(silent=True))
+        result = BatchResult(len(items))
+        valid = validate_items(items, ProjectCreateSchema(), result)
+
+        # 一次查询库中已存在的项目编码
+        codes = [data["prjcode"] for _, data in valid]
+        existing = {row.prjcode for row in db.query(Project.prjcode).filter(Project.prjcode.in_(codes))} if codes else set()
+        valid = reject_duplicates(valid, "prjcode", existing, result, "项目编码")
+
+        if atomic and result.failed:
+            result.abort("同批存在失败条目，整批未提交")
+            return result.response()
+
+        rows = [{
+            "prjcode": data["prjcode"],
+            "prjname": data["prjname"],
+            "ownerid": data["ownerid"],
+            "sponsorid": data["sponsorid"],
+            "desc": data.get("desc"),
+            "goal": data.get("goal"),
+            "approvetime": parse_date(data["approvetime"]),
+            "expectedtime": parse_date(data["expectedtime"]),
+            "createuser": session["empid"],
+            "status": 0
+        } for _, data in valid]
+        bulk_insert(db, Project, rows)
+        db.commit()
+
+        for (index, _), row in zip(valid, rows):
+            result.succeed(index, project_id=row["prjid"])
+        logger.info(f"批量创建项目: 共 {len(items)} 条，成功 {len(rows)} 条")
+        return result.response()
+
+    except BusinessError as e:
+        logger.warning(f"批量创建项目参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        db.rollback()
+        logger.error(f"批量创建项目失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@project_bp.route("/batch_add_project_members", methods=["POST"])
+@login_required
+def batch_add_project_members():
+    """
+    批量新增项目成员接口
+    ---
+    post:
+      tags:
+        - 项目管理
+      summary: 批量新增项目成员
+      description: 使用 ProjectMemberCreateSchema 逐条校验，项目或成员不存在、成员已在项目中的条目判为失败；曾被移除的成员恢复状态，其余条目在一个事务内批量插入
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                items:
+                  type: array
+                  items: ProjectMemberCreateSchema
+                atomic:
+                  type: boolean
+                  description: 为 true 时任一条目失败则整批不提交
+      responses:
+        200:
+          description: 至少一条成功，results 中逐条给出 status（created/restored/failed/skipped）及失败原因
+        400:
+          description: 请求体无效或全部条目失败
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        items, atomic = load_batch(request.get_json(silent=True))
+        result = BatchResult(len(items))
+        valid = validate_items(items, ProjectMemberCreateSchema(), result)
+
+        # 一次性查询涉及的项目、用户与已有成员关系
+        prjids = {data["prjid"] for _, data in valid}
+        empids = {data["empid"] for _, data in valid}
+        known_projects = {row.prjid for row in db.query(Project.prjid).filter(Project.prjid.in_(prjids))} if prjids else set()
+        known_users = {row.empid for row in db.query(User.empid).filter(User.empid.in_(empids))} if empids else set()
+        memberships = {}
+        if prjids and empids:
+            for member in db.query(ProjectMember).filter(
+                ProjectMember.prjid.in_(prjids),
+                ProjectMember.empid.in_(empids)
+            ):
+                memberships[(member.prjid, member.empid)] = member
+
+        now = datetime.now()
+        new_rows = []
+        new_indexes = []
+        restored = []
+        seen = set()
+        for index, data in valid:
+            key = (data["prjid"], data["empid"])
+            if data["prjid"] not in known_projects:
+                result.fail(index, {"prjid": ["项目不存在"]})
+            elif data["empid"] not in known_users:
+                result.fail(index, {"empid": ["成员不存在"]})
+            elif key in seen or (key in memberships and memberships[key].status == 0):
+                result.fail(index, {"empid": ["成员已存在"]})
+            elif key in memberships:
+                restored.append((index, memberships[key]))
+            else:
+                new_indexes.append(index)
+                new_rows.append({
+                    "prjid": data["prjid"],
+                    "empid": data["empid"],
+                    "createuser": session["empid"],
+                    "createdate": now,
+                    "status": 0
+                })
+            seen.add(key)
+
+        if atomic and result.failed:
+            result.abort("同批存在失败条目，整批未提交")
+            return result.response()
+
+        # 曾经被移除的成员恢复其状态
+        for index, member in restored:
+            member.status = 0
+            member.modifyuser = session["empid"]
+            member.modifydate = now
+        # 复合主键已知，无需回填，直接 executemany
+        bulk_insert(db, ProjectMember, new_rows, return_ids=False)
+        db.commit()
+
+        for index, member in restored:
+            result.succeed(index, status="restored")
+        for index in new_indexes:
+            result.succeed(index)
+        logger.info(f"批量新增项目成员: 共 {len(items)} 条，新增 {len(new_rows)} 条，恢复 {len(restored)} 条")
+        return result.response()
+
+    except BusinessError as e:
+        logger.warning(f"批量新增项目成员参数错误: {e}")
+        return jsonify({"error": e.message}), 400
+    except Exception as e:
+        db.rollback()
+        logger.error(f"批量新增项目成员失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
 
 # 定义需要生成文档的路由
 project_routes = [
     (create_project, "create_project"),
     (update_project, "update_project"),
     (query_projects, "query_projects"),
+    (search_projects, "search_projects"),
     (add_project_member, "add_project_member"),
     (remove_project_member, "remove_project_member"),
-    (query_project_members, "query_project_members")
+    (query_project_members, "query_project_members"),
+    (project_dashboard, "project_dashboard"),
+    (batch_create_projects, "batch_create_projects"),
+    (batch_add_project_members, "batch_add_project_members")
 ]
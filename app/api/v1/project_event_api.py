@@ -1,15 +1,43 @@
 from flask import Blueprint, request, jsonify, session
-from app.models import SessionLocal, Project, Event, ProjectEvent
+from app.models import db_session, Project, Event, ProjectEvent
 from app.schemas.project_event_schema import ProjectEventCreateSchema
 from app.utils.decorators import login_required, operation_log
+from app.utils.errors import BusinessError
+from app.utils.pagination import keyset_paginate, paginated_response, stream_json
+from app.utils import event_tree
+from app.utils.ngram import ngram_index
+from app.utils.result_cache import result_cache
 from loguru import logger
 from datetime import datetime
-from app.schemas.project_event_schema import ProjectEventQuerySchema
+from app.schemas.project_event_schema import ProjectEventQuerySchema, ProjectEventTreeSchema, ProjectEventNodeSchema
 from flask_apispec import use_kwargs
 
 # 创建Blueprint
 project_event_bp = Blueprint("project_event", __name__, url_prefix="/api/v1.0/BUS")
 
+def project_event_to_dict(result):
+    """
+    项目事件查询行转结果字典
+    """
+    return {
+        "eventid": result.eventid,
+        "reporter": result.reporter,
+        "reportertime": result.reportertime.isoformat() if result.reportertime else None,
+        "event": result.event,
+        "leafid": result.leafid,
+        "depth": result.depth
+    }
+
+def filter_project_events(query, kwargs):
+    """
+    按项目编码/名称追加过滤条件（查询需已关联 Project），查询与导出接口共用
+    """
+    if kwargs.get("prjcode"):
+        query = query.filter(Project.prjcode == kwargs["prjcode"])
+    if kwargs.get("prjname"):
+        query = query.filter(ngram_index.contains(query.session, Project.prjname, kwargs['prjname']))
+    return query
+
 @project_event_bp.route("/add_event_to_project", methods=["POST"])
 @login_required
 @operation_log("添加事件到项目")
@@ -48,7 +76,7 @@ def add_event_to_project():
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 校验输入参数
         data = request.json
@@ -68,19 +96,20 @@ def add_event_to_project():
         # 如果parentid不为0，检查父节点是否存在
         if validated_data["parentid"] != 0:
             parent_event = db.query(ProjectEvent).filter(
-                ProjectEvent.leafid == validated_data["parentid"]
+                ProjectEvent.leafid == validated_data["parentid"],
+                ProjectEvent.prjid == validated_data["prjid"]  # 父节点必须属于同一项目
             ).first()
             if not parent_event:
                 return jsonify({"error": "父节点不存在"}), 404
             depth = parent_event.depth + 1
         else:
+            parent_event = None
             depth = 0
 
-        # 创建项目事件关联
+        # 创建项目事件关联，leafid 由数据库自增分配，并发插入不会冲突
         new_project_event = ProjectEvent(
             prjid=validated_data["prjid"],
             eventid=validated_data["eventid"],
-            leafid=ProjectEvent.get_next_leafid(db),  # 假设有一个获取下一个leafid的方法
             depth=depth,
             parentid=validated_data["parentid"],
             createuser=session["empid"],
@@ -88,6 +117,7 @@ def add_event_to_project():
             status=0
         )
         db.add(new_project_event)
+        event_tree.assign_path(db, new_project_event, parent_event)
         db.commit()
 
         logger.info(f"事件 {validated_data['eventid']} 成功添加到项目 {validated_data['prjid']}")
@@ -100,12 +130,11 @@ def add_event_to_project():
         db.rollback()
         logger.error(f"添加事件到项目失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close()
 
 @project_event_bp.route("/query_project_events", methods=["POST"])
 @login_required
 @use_kwargs(ProjectEventQuerySchema)
+@result_cache.cached("query_project_events", Project, ProjectEvent, Event)
 def query_project_events(**kwargs):
     """
     查询项目事件信息接口
@@ -114,7 +143,7 @@ def query_project_events(**kwargs):
       tags:
         - 项目管理
       summary: 查询项目事件信息
-      description: 根据项目编码或名称查询项目事件信息，返回主从结构数据
+      description: 根据项目编码或名称查询项目事件信息，返回主从结构数据，按 (depth, leafid) 游标分页
       requestBody:
         required: true
         content:
@@ -147,10 +176,20 @@ def query_project_events(**kwargs):
                           type: string
                         leafid:
                           type: integer
+                        depth:
+                          type: integer
+                  pagination:
+                    $ref: '#/components/schemas/Pagination'
+        304:
+          description: 结果未变化（请求头 If-None-Match 与上次响应的 ETag 一致）
+        400:
+          description: 游标无效
+        404:
+          description: 未找到相关项目事件信息
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 构建基础查询
         query = db.query(
@@ -160,7 +199,8 @@ def query_project_events(**kwargs):
             Event.reporter,
             Event.reportertime,
             Event.event,
-            ProjectEvent.leafid
+            ProjectEvent.leafid,
+            ProjectEvent.depth
         ).join(
             ProjectEvent, Project.prjid == ProjectEvent.prjid
         ).join(
@@ -170,41 +210,186 @@ def query_project_events(**kwargs):
         )
 
         # 处理查询条件
-        if kwargs.get("prjcode"):
-            query = query.filter(Project.prjcode == kwargs["prjcode"])
-        if kwargs.get("prjname"):
-            query = query.filter(Project.prjname.ilike(f"%{kwargs['prjname']}%"))
+        query = filter_project_events(query, kwargs)
 
-        # 执行查询并排序
-        results = query.order_by(ProjectEvent.depth.asc()).all()
+        # 按 (深度, 子叶id) 做游标分页，或分块流式输出全部结果
+        order_columns = [ProjectEvent.depth, ProjectEvent.leafid]
+        if kwargs.get("stream"):
+            # 流式输出时无法预先取得项目信息，逐行附带项目编码和名称
+            return stream_json(query, order_columns, lambda r: dict(
+                project_event_to_dict(r), prjcode=r.prjcode, prjname=r.prjname
+            ), key="events")
 
-        if not results:
+        results, next_cursor = keyset_paginate(query, order_columns, kwargs["limit"], kwargs.get("cursor"))
+
+        if not results and not kwargs.get("cursor"):
             return jsonify({"error": "未找到相关项目事件信息"}), 404
 
         # 格式化返回结果
-        response = {
-            "prjcode": results[0].prjcode,
-            "prjname": results[0].prjname,
-            "events": [{
-                "eventid": r.eventid,
-                "reporter": r.reporter,
-                "reportertime": r.reportertime.isoformat() if r.reportertime else None,
-                "event": r.event,
-                "leafid": r.leafid
-            } for r in results]
-        }
-
-        return jsonify(response)
+        return paginated_response(
+            [project_event_to_dict(r) for r in results],
+            kwargs["limit"],
+            next_cursor,
+            key="events",
+            prjcode=results[0].prjcode if results else kwargs.get("prjcode"),
+            prjname=results[0].prjname if results else kwargs.get("prjname")
+        )
 
+    except BusinessError as e:
+        logger.warning(f"查询项目事件参数错误: {e}")
+        return jsonify({"error": e.message}), 400
     except Exception as e:
         logger.error(f"查询项目事件信息失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close() 
+
+@project_event_bp.route("/project_event_tree", methods=["POST"])
+@login_required
+@use_kwargs(ProjectEventTreeSchema)
+def project_event_tree(**kwargs):
+    """
+    查询项目事件树接口
+    ---
+    post:
+      tags:
+        - 项目管理
+      summary: 查询项目事件树
+      description: 返回项目下嵌套结构的事件树；指定 leafid 时只返回以该节点为根的子树。每个节点附带子孙数 descendants
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema: ProjectEventTreeSchema
+      responses:
+        200:
+          description: 查询成功
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  prjid:
+                    type: integer
+                  prjcode:
+                    type: string
+                  prjname:
+                    type: string
+                  tree:
+                    type: array
+                    items:
+                      type: object
+                      properties:
+                        leafid:
+                          type: integer
+                        parentid:
+                          type: integer
+                        depth:
+                          type: integer
+                        eventid:
+                          type: integer
+                        event:
+                          type: string
+                        descendants:
+                          type: integer
+                        children:
+                          type: array
+                          items:
+                            type: object
+        404:
+          description: 项目或节点不存在
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        query = db.query(Project)
+        if kwargs.get("prjid"):
+            query = query.filter(Project.prjid == kwargs["prjid"])
+        elif kwargs.get("prjcode"):
+            query = query.filter(Project.prjcode == kwargs["prjcode"])
+        else:
+            return jsonify({"error": "prjid 或 prjcode 必须提供一个"}), 400
+        project = query.first()
+        if not project:
+            return jsonify({"error": "项目不存在"}), 404
+
+        if kwargs.get("leafid"):
+            tree = event_tree.subtree(db, kwargs["leafid"], project.prjid)
+        else:
+            tree = event_tree.project_tree(db, project.prjid)
+
+        return jsonify({
+            "prjid": project.prjid,
+            "prjcode": project.prjcode,
+            "prjname": project.prjname,
+            "tree": tree
+        })
+
+    except BusinessError as e:
+        logger.warning(f"查询项目事件树失败: {e}")
+        return jsonify({"error": e.message}), 404
+    except Exception as e:
+        logger.error(f"查询项目事件树失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
+
+@project_event_bp.route("/project_event_ancestors", methods=["POST"])
+@login_required
+@use_kwargs(ProjectEventNodeSchema)
+def project_event_ancestors(**kwargs):
+    """
+    查询项目事件祖先路径接口
+    ---
+    post:
+      tags:
+        - 项目管理
+      summary: 查询项目事件节点的祖先路径
+      description: 返回从根节点到指定节点的祖先列表（根节点在前，不含节点本身）以及该节点的子孙数
+      requestBody:
+        required: true
+        content:
+          application/json:
+            schema: ProjectEventNodeSchema
+      responses:
+        200:
+          description: 查询成功
+          content:
+            application/json:
+              schema:
+                type: object
+                properties:
+                  leafid:
+                    type: integer
+                  descendants:
+                    type: integer
+                  ancestors:
+                    type: array
+                    items:
+                      type: object
+        404:
+          description: 节点不存在
+        500:
+          description: 服务器内部错误
+    """
+    db = db_session()
+    try:
+        leafid = kwargs["leafid"]
+        return jsonify({
+            "leafid": leafid,
+            "descendants": event_tree.descendant_count(db, leafid),
+            "ancestors": event_tree.ancestors(db, leafid)
+        })
+
+    except BusinessError as e:
+        logger.warning(f"查询项目事件祖先路径失败: {e}")
+        return jsonify({"error": e.message}), 404
+    except Exception as e:
+        logger.error(f"查询项目事件祖先路径失败: {e}")
+        return jsonify({"error": "服务器内部错误"}), 500
 
 # 定义需要生成文档的路由
 project_event_routes = [
     (add_event_to_project, "add_event_to_project"),
-    (query_project_events, "query_project_events")
+    (query_project_events, "query_project_events"),
+    (project_event_tree, "project_event_tree"),
+    (project_event_ancestors, "project_event_ancestors")
 ]
 
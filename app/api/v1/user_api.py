@@ -1,12 +1,18 @@
 from flask import Blueprint, request, session, jsonify
 from datetime import datetime
-from app.models import SessionLocal, User
+from app.models import db_session, User
 from app.utils.crypto import PasswordService
 from app.schemas.user_schema import UserSchema, EditUserSchema, UpdatePasswdSchema, UserQuerySchema  # 引入所需Schema
 from flask import current_app  # 导入current_app以访问配置
 from app.utils.crypto import PasswordService  # 导入密码服务
+from app.utils.hashing import hashing_service  # 密码加密进程池
+from app.utils.session_store import session_store  # 服务端会话存储
 
 from app.utils.decorators import login_required  # 引入登录验证装饰器
+from app.utils.errors import BusinessError
+from app.utils.cache import user_cache
+from app.utils.ngram import ngram_index  # 名称模糊查询索引
+from app.utils.pagination import keyset_paginate, paginated_response, stream_json
 
 from flask_apispec import use_kwargs, marshal_with  # 引入 Flask-APISpec 装饰器
 from loguru import logger
@@ -14,6 +20,21 @@ from loguru import logger
 # 创建Blueprint
 user_bp = Blueprint("user", __name__)
 
+def user_to_dict(user):
+    """
+    用户记录转查询结果字典（不含密码）
+    """
+    return {
+        "empid": user.empid,
+        "empcode": user.empcode,
+        "empname": user.empname,
+        "sex": user.sex,
+        "mobile": user.mobile,
+        "status": user.status,
+        "admin": user.admin,
+        "createdate": user.createdate.isoformat() if user.createdate else None
+    }
+
 @user_bp.route("/register", methods=["POST"])
 @use_kwargs(UserSchema)  # 使用 UserSchema 校验请求参数
 def register(**kwargs):
@@ -52,7 +73,7 @@ def register(**kwargs):
           description: 服务器内部错误
     """
     data = request.json
-    db = SessionLocal()
+    db = db_session()
     try:
         # 检查当前用户是否已登录
         if "user_id" not in session:
@@ -62,7 +83,7 @@ def register(**kwargs):
         createuser = session["user_id"]
 
         # 对密码进行加盐加密
-        hashed_password = PasswordService.hash_password(data["password"])
+        hashed_password = hashing_service.hash_password(data["password"])
 
         # 创建用户
         new_user = User(
@@ -79,14 +100,13 @@ def register(**kwargs):
         )
         db.add(new_user)
         db.commit()
+        user_cache.invalidate(new_user.empid)
 
         return jsonify({"message": "User registered successfully", "user_id": new_user.empid})
     except Exception as e:
         db.rollback()
         logger.error(f"Error registering user: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        db.close()
 
 
 @user_bp.route("/UpdatePasswd", methods=["POST"])
@@ -100,7 +120,7 @@ def update_passwd(**kwargs):
       tags:
         - 用户管理
       summary: 修改用户密码
-      description: 允许用户修改密码，需提供当前密码和新密码。
+      description: 允许用户修改密码，需提供当前密码和新密码。修改成功后注销该用户在其他终端的会话。
       requestBody:
         required: true
         content:
@@ -126,27 +146,24 @@ def update_passwd(**kwargs):
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 获取当前用户
-        user_id = session["user_id"]
+        user_id = session["empid"]
         user = db.query(User).filter_by(empid=user_id).first()
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        # 从配置中获取私钥
-        private_key = current_app.config['RSA_PRIVATE_KEY']
-
-        # 解密当前密码和新密码
-        nowpasswd = PasswordService.decrypt_rsa(kwargs['nowpasswd'], private_key)
-        newpasswd = PasswordService.decrypt_rsa(kwargs['newpasswd'], private_key)
+        # 解密当前密码和新密码（使用密钥管理器中缓存的私钥）
+        nowpasswd = PasswordService.decrypt_rsa(kwargs['nowpasswd'], kid=kwargs.get('kid'))
+        newpasswd = PasswordService.decrypt_rsa(kwargs['newpasswd'], kid=kwargs.get('kid'))
 
         # 验证当前密码是否正确
-        if not PasswordService.verify_password(nowpasswd, user.passwd):
+        if not hashing_service.verify_password(nowpasswd, user.passwd):
             return jsonify({"error": "Current password is incorrect"}), 403
 
         # 对新密码进行加盐加密
-        hashed_password = PasswordService.hash_password(newpasswd)
+        hashed_password = hashing_service.hash_password(newpasswd)
 
         # 更新密码
         user.passwd = hashed_password
@@ -154,14 +171,17 @@ def update_passwd(**kwargs):
         user.modifydate = datetime.now()
 
         db.commit()
+        user_cache.invalidate(user_id)
+
+        # 注销该用户在其他终端的会话，当前会话保留
+        revoked = session_store.revoke_user(user_id, keep_sid=session.sid)
+        logger.info(f"User {user_id} changed password, {revoked} other session(s) revoked")
 
-        return jsonify({"message": "Password updated successfully"})
+        return jsonify({"message": "Password updated successfully", "revoked_sessions": revoked})
     except Exception as e:
         db.rollback()
         logger.error(f"Error updating password: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        db.close()
 
 
 
@@ -209,7 +229,7 @@ def edit_user(empid, **kwargs):
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 获取要修改的用户
         user = db.query(User).filter_by(empid=empid).first()
@@ -226,14 +246,13 @@ def edit_user(empid, **kwargs):
         user.modifydate = datetime.now()
 
         db.commit()
+        user_cache.invalidate(empid)
 
         return jsonify({"message": "User updated successfully"})
     except Exception as e:
         db.rollback()
         logger.error(f"Error updating user: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        db.close()
 
 
 @user_bp.route("/query_users", methods=["POST"])
@@ -247,20 +266,27 @@ def query_users(**kwargs):
       tags:
         - 用户管理
       summary: 查询用户信息
-      description: 根据条件查询用户信息，支持组合查询和模糊查询
+      description: 根据条件查询用户信息，支持组合查询和模糊查询，按 empid 游标分页
       responses:
         200:
-          description: 查询成功
+          description: 查询成功，返回 data 与 pagination（stream 为 true 时仅返回 data）
           content:
             application/json:
               schema:
-                type: array
-                items:
-                  $ref: '#/components/schemas/User'
+                type: object
+                properties:
+                  data:
+                    type: array
+                    items:
+                      $ref: '#/components/schemas/User'
+                  pagination:
+                    $ref: '#/components/schemas/Pagination'
+        400:
+          description: 游标无效
         500:
           description: 服务器内部错误
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         query = db.query(User)
         
@@ -268,7 +294,7 @@ def query_users(**kwargs):
         if kwargs.get("empcode"):
             query = query.filter(User.empcode == kwargs["empcode"])
         if kwargs.get("empname"):
-            query = query.filter(User.empname.ilike(f"%{kwargs['empname']}%"))
+            query = query.filter(ngram_index.contains(query.session, User.empname, kwargs['empname']))
         if kwargs.get("sex") is not None:
             query = query.filter(User.sex == kwargs["sex"])
         if kwargs.get("mobile"):
@@ -278,24 +304,20 @@ def query_users(**kwargs):
         if kwargs.get("admin") is not None:
             query = query.filter(User.admin == kwargs["admin"])
             
-        users = query.all()
-        
-        return jsonify([{
-            "empid": user.empid,
-            "empcode": user.empcode,
-            "empname": user.empname,
-            "sex": user.sex,
-            "mobile": user.mobile,
-            "status": user.status,
-            "admin": user.admin,
-            "createdate": user.createdate.isoformat() if user.createdate else None
-        } for user in users])
+        # 按主键做游标分页，或分块流式输出全部结果
+        order_columns = [User.empid]
+        if kwargs.get("stream"):
+            return stream_json(query, order_columns, user_to_dict)
+
+        users, next_cursor = keyset_paginate(query, order_columns, kwargs["limit"], kwargs.get("cursor"))
+        return paginated_response([user_to_dict(user) for user in users], kwargs["limit"], next_cursor)
         
+    except BusinessError as e:
+        logger.warning(f"查询用户信息参数错误: {e}")
+        return jsonify({"error": e.message}), 400
     except Exception as e:
         logger.error(f"查询用户信息失败: {e}")
         return jsonify({"error": "服务器内部错误"}), 500
-    finally:
-        db.close()
 
 # 定义需要生成文档的路由
 user_routes = [
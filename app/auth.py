@@ -3,17 +3,17 @@ import base64
 from PIL import Image, ImageDraw, ImageFont
 import random
 import io
+import math
 import string  # 导入 string 模块
-from .models import SessionLocal, User
+from .models import db_session, User
 from .utils.crypto import PasswordService
+from .utils.hashing import hashing_service
 from .utils.errors import BusinessError
+from .utils.captcha import CaptchaPool
 from loguru import logger
 from app.config import Config  # 导入配置类
 from app.utils.crypto import PasswordService
 
-# 加载 RSA 密钥
-PRIVATE_KEY, PUBLIC_KEY = Config.load_rsa_keys()  # 获取私钥
-
 def generate_captcha_text(length=4):
     """
     生成验证码文本（四位大写字母和数字）
@@ -21,17 +21,82 @@ def generate_captcha_text(length=4):
     characters = string.ascii_uppercase + string.digits  # 大写字母和数字
     return ''.join(random.choice(characters) for _ in range(length))
 
+# 验证码图片尺寸
+CAPTCHA_WIDTH = 120
+CAPTCHA_HEIGHT = 40
+
+_captcha_font = None
+
+def get_captcha_font():
+    """
+    加载并缓存验证码字体（Pillow 10.1 以下不支持指定字号时退回默认位图字体）
+    """
+    global _captcha_font
+    if _captcha_font is None:
+        try:
+            _captcha_font = ImageFont.load_default(size=28)
+        except TypeError:
+            _captcha_font = ImageFont.load_default()
+    return _captcha_font
+
+def _wave_distort(image):
+    """
+    按正弦曲线上下错动竖条，使字符整体扭曲
+    """
+    width, height = image.size
+    amplitude = random.uniform(2, 4)
+    period = random.uniform(30, 60)
+    phase = random.uniform(0, 2 * math.pi)
+    step = 6
+    mesh = []
+    for x0 in range(0, width, step):
+        x1 = min(x0 + step, width)
+        dy0 = amplitude * math.sin(phase + 2 * math.pi * x0 / period)
+        dy1 = amplitude * math.sin(phase + 2 * math.pi * x1 / period)
+        # 目标区域 -> 源四边形（左上、左下、右下、右上）
+        mesh.append(((x0, 0, x1, height), (x0, dy0, x0, height + dy0, x1, height + dy1, x1, dy1)))
+    return image.transform(image.size, Image.Transform.MESH, mesh, Image.Resampling.BILINEAR, fillcolor=(255, 255, 255))
+
 def generate_captcha_image(captcha_text):
     """
     生成验证码图片
+
+    说明:
+        逐字符随机偏移与颜色，叠加干扰点、干扰线并做波形扭曲。
+        由验证码池在后台线程调用，不占用请求时间。
     """
     # 创建图片
-    image = Image.new('RGB', (120, 40), color=(255, 255, 255))
+    image = Image.new('RGB', (CAPTCHA_WIDTH, CAPTCHA_HEIGHT), color=(255, 255, 255))
     draw = ImageDraw.Draw(image)
-    font = ImageFont.load_default()
+    font = get_captcha_font()
+
+    # 干扰点
+    for _ in range(150):
+        draw.point(
+            (random.randrange(CAPTCHA_WIDTH), random.randrange(CAPTCHA_HEIGHT)),
+            fill=tuple(random.randint(120, 220) for _ in range(3))
+        )
+
+    # 逐个绘制验证码字符
+    x = 8
+    for char in captcha_text:
+        draw.text(
+            (x + random.randint(-2, 2), random.randint(0, 6)),
+            char,
+            font=font,
+            fill=tuple(random.randint(0, 110) for _ in range(3))
+        )
+        x += (CAPTCHA_WIDTH - 16) // max(len(captcha_text), 1)
+
+    # 干扰线
+    for _ in range(3):
+        draw.line(
+            [(random.randrange(CAPTCHA_WIDTH), random.randrange(CAPTCHA_HEIGHT)) for _ in range(2)],
+            fill=tuple(random.randint(60, 160) for _ in range(3)),
+            width=1
+        )
 
-    # 绘制验证码文本
-    draw.text((10, 10), captcha_text, font=font, fill=(0, 0, 0))
+    image = _wave_distort(image)
 
     # 将图片转换为字节流
     buffer = io.BytesIO()
@@ -39,11 +104,20 @@ def generate_captcha_image(captcha_text):
     buffer.seek(0)
     return buffer
 
+def render_captcha_png(captcha_text):
+    """
+    生成验证码 PNG 字节，供验证码池使用
+    """
+    return generate_captcha_image(captcha_text).getvalue()
+
+# 全局预生成验证码池
+captcha_pool = CaptchaPool(generate_captcha_text, render_captcha_png, size=Config.CAPTCHA_POOL_SIZE)
+
 def login(username, encrypted_password, rsa_private_key):
     """
     用户登录逻辑
     """
-    db = SessionLocal()
+    db = db_session()
     try:
         # 解密 RSA 加密的密码
         try:
@@ -59,7 +133,7 @@ def login(username, encrypted_password, rsa_private_key):
             return False, "User not found"
 
         # 校验密码
-        if not PasswordService.verify_password(password, user.passwd):  # 使用新的密码校验逻辑
+        if not hashing_service.verify_password(password, user.passwd):  # 在加密进程池中校验
             logger.warning(f"Invalid password for user {username}")
             return False, "Invalid credentials"
 
@@ -70,8 +144,6 @@ def login(username, encrypted_password, rsa_private_key):
     except Exception as e:
         logger.error(f"Login error: {e}")
         return False, "Internal server error"
-    finally:
-        db.close()
 
 def logout():
     """
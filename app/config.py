@@ -5,9 +5,10 @@ from pathlib import Path
 # 获取项目根目录
 BASE_DIR = Path(__file__).resolve().parent.parent  # 指向 app 目录的上一级（项目根目录）
 
-# 读取 conf.ini 文件
+# 读取 conf.ini 文件（可用环境变量 PRJEVENTSYS_CONFIG 指定其他配置文件，如基准测试使用临时数据库）
+CONFIG_FILE = os.environ.get('PRJEVENTSYS_CONFIG') or os.path.join(BASE_DIR, 'conf.ini')
 config = configparser.ConfigParser()
-config.read(os.path.join(BASE_DIR, 'conf.ini'))
+config.read(CONFIG_FILE)
 
 class Config:
     # Flask配置
@@ -18,6 +19,109 @@ class Config:
     # 数据库配置
     SQLALCHEMY_DATABASE_URI = config.get('database', 'url')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DB_POOL_SIZE = config.getint('database', 'pool_size', fallback=5)  # 连接池常驻连接数
+    DB_MAX_OVERFLOW = config.getint('database', 'max_overflow', fallback=10)  # 超出常驻数后允许临时创建的连接数
+    DB_POOL_TIMEOUT = config.getint('database', 'pool_timeout', fallback=30)  # 获取连接最长等待（秒）
+    DB_POOL_RECYCLE = config.getint('database', 'pool_recycle', fallback=1800)  # 连接最长存活时间（秒），-1 不回收
+    DB_POOL_PRE_PING = config.getboolean('database', 'pool_pre_ping', fallback=True)  # 取出连接前检测可用性
+    DB_ECHO = config.getboolean('database', 'echo', fallback=False)  # 是否输出 SQL
+    SQLITE_JOURNAL_MODE = config.get('database', 'sqlite_journal_mode', fallback='WAL')  # SQLite 日志模式
+    SQLITE_SYNCHRONOUS = config.get('database', 'sqlite_synchronous', fallback='NORMAL')  # SQLite 同步级别
+    SQLITE_BUSY_TIMEOUT = config.getint('database', 'sqlite_busy_timeout', fallback=5000)  # SQLite 锁等待（毫秒）
+    SQLITE_CACHE_SIZE = config.getint('database', 'sqlite_cache_size', fallback=-20000)  # SQLite 页缓存，负数为 KiB
+
+    # 分页配置
+    PAGINATION_DEFAULT_LIMIT = config.getint('pagination', 'default_limit', fallback=100)  # 默认每页条数
+    PAGINATION_MAX_LIMIT = config.getint('pagination', 'max_limit', fallback=1000)  # 每页条数上限
+    PAGINATION_STREAM_CHUNK = config.getint('pagination', 'stream_chunk_size', fallback=500)  # 流式输出每批行数
+
+    # 缓存配置
+    USER_CACHE_TTL = config.getint('cache', 'user_ttl', fallback=300)  # 登录用户缓存有效期（秒）
+    USER_CACHE_MAXSIZE = config.getint('cache', 'user_maxsize', fallback=10000)  # 登录用户缓存最大条数
+    PERMISSION_REFRESH_INTERVAL = config.getint('cache', 'permission_refresh', fallback=300)  # 权限矩阵全量刷新间隔（秒）
+
+    # 操作日志异步写入配置
+    AUDIT_QUEUE_SIZE = config.getint('audit', 'queue_size', fallback=10000)  # 待写入队列长度上限
+    AUDIT_BATCH_SIZE = config.getint('audit', 'batch_size', fallback=200)  # 单批写入条数
+    AUDIT_FLUSH_INTERVAL = config.getfloat('audit', 'flush_interval', fallback=1.0)  # 最长攒批时间（秒）
+    AUDIT_OVERFLOW = config.get('audit', 'overflow', fallback='sync')  # 队列满时策略: drop/block/sync
+    AUDIT_BLOCK_TIMEOUT = config.getfloat('audit', 'block_timeout', fallback=0.5)  # block 策略最长等待（秒）
+
+    # 批量接口配置
+    BATCH_MAX_ITEMS = config.getint('batch', 'max_items', fallback=1000)  # 单次请求最大条目数
+
+    # 主数据导入配置
+    IMPORT_CHUNK_SIZE = config.getint('import', 'chunk_size', fallback=1000)  # 每块行数
+    IMPORT_MAX_ERRORS = config.getint('import', 'max_errors', fallback=100)  # 最多保留的错误明细条数
+
+    # 数据导出配置
+    EXPORT_CHUNK_SIZE = config.getint('export', 'chunk_size', fallback=1000)  # 每批拉取并输出的行数
+    EXPORT_MAX_CONCURRENT = config.getint('export', 'max_concurrent', fallback=4)  # 同时进行的导出数上限
+
+    # 密码加密配置
+    PASSWORD_HASH_METHOD = config.get('hashing', 'method', fallback='scrypt')  # werkzeug 加密方式
+    PASSWORD_SALT_LENGTH = config.getint('hashing', 'salt_length', fallback=16)  # 盐长度
+    PASSWORD_HASH_WORKERS = config.getint('hashing', 'workers', fallback=0)  # 加密进程数，0 为 CPU 核数，1 不使用进程池
+    PASSWORD_HASH_TIMEOUT = config.getfloat('hashing', 'timeout', fallback=10.0)  # 等待单次结果的最长时间（秒）
+
+    # 验证码配置
+    CAPTCHA_POOL_SIZE = config.getint('captcha', 'pool_size', fallback=200)  # 预生成验证码数量，0 表示不预生成
+
+    # 会话配置
+    SESSION_BACKEND = config.get('session', 'backend', fallback='memory')  # 会话存储: memory/database
+    SESSION_IDLE_TIMEOUT = config.getint('session', 'idle_timeout', fallback=1800)  # 空闲超时（秒）
+    SESSION_ANONYMOUS_TIMEOUT = config.getint('session', 'anonymous_timeout', fallback=300)  # 未登录会话空闲超时（秒）
+    SESSION_MAX_SESSIONS = config.getint('session', 'max_sessions', fallback=100000)  # memory 存储最多保留的会话数
+    SESSION_SWEEP_INTERVAL = config.getint('session', 'sweep_interval', fallback=60)  # 空闲会话清理间隔（秒）
+    SESSION_TOUCH_INTERVAL = config.getint('session', 'touch_interval', fallback=60)  # database 存储最后访问时间的最小更新间隔（秒）
+
+    # 登录限流配置
+    LOGIN_LIMIT_ENABLED = config.getboolean('rate_limit', 'enabled', fallback=True)  # 是否启用登录限流
+    LOGIN_LIMIT_BACKEND = config.get('rate_limit', 'backend', fallback='memory')  # 限流状态存储: memory/database
+    LOGIN_IP_MAX_ATTEMPTS = config.getint('rate_limit', 'ip_max_attempts', fallback=30)  # 每个 IP 窗口内最大尝试次数
+    LOGIN_IP_WINDOW = config.getint('rate_limit', 'ip_window', fallback=60)  # IP 限流窗口（秒）
+    LOGIN_USER_MAX_ATTEMPTS = config.getint('rate_limit', 'user_max_attempts', fallback=10)  # 每个工号窗口内最大尝试次数
+    LOGIN_USER_WINDOW = config.getint('rate_limit', 'user_window', fallback=300)  # 工号限流窗口（秒）
+    LOGIN_LOCKOUT_THRESHOLD = config.getint('rate_limit', 'lockout_threshold', fallback=5)  # 工号连续失败锁定阈值
+    LOGIN_IP_LOCKOUT_THRESHOLD = config.getint('rate_limit', 'ip_lockout_threshold', fallback=20)  # IP 连续失败锁定阈值
+    LOGIN_LOCKOUT_BASE = config.getint('rate_limit', 'lockout_base', fallback=60)  # 首次锁定时长（秒）
+    LOGIN_LOCKOUT_MAX = config.getint('rate_limit', 'lockout_max', fallback=3600)  # 锁定时长上限（秒）
+    LOGIN_FAILURE_WINDOW = config.getint('rate_limit', 'failure_window', fallback=900)  # 无新失败多久后清零失败次数（秒）
+    LOGIN_LOCKOUT_DECAY = config.getint('rate_limit', 'lockout_decay', fallback=3600)  # 锁定结束后每安静多久锁定次数减一（秒）
+
+    # 请求指标配置
+    METRICS_ENABLED = config.getboolean('metrics', 'enabled', fallback=True)  # 是否采集请求与 SQL 指标
+    METRICS_TOKEN = config.get('metrics', 'token', fallback='')  # /metrics 访问令牌，为空时只允许管理员会话
+    METRICS_PUBLIC = config.getboolean('metrics', 'public', fallback=False)  # 是否允许匿名访问 /metrics
+    METRICS_SLOW_REQUEST_MS = config.getfloat('metrics', 'slow_request_ms', fallback=1000)  # 慢请求阈值（毫秒），0 不记录
+    METRICS_SLOW_SQL_STATEMENTS = config.getint('metrics', 'slow_sql_statements', fallback=20)  # 慢请求日志最多列出的 SQL 条数
+
+    # 请求性能分析配置
+    PROFILER_ENABLED = config.getboolean('profiler', 'enabled', fallback=False)  # 是否允许管理员按请求开启分析
+    PROFILER_MODE = config.get('profiler', 'mode', fallback='cprofile')  # 默认分析方式: cprofile/sampling
+    PROFILER_DIR = os.path.join(BASE_DIR, config.get('profiler', 'dir', fallback='app/profiles'))  # 分析结果目录
+    PROFILER_MAX_PROFILES = config.getint('profiler', 'max_profiles', fallback=50)  # 最多保留的结果份数
+    PROFILER_SAMPLE_INTERVAL = config.getfloat('profiler', 'sample_interval', fallback=0.005)  # 采样间隔（秒）
+
+    # 全文检索配置
+    SEARCH_BACKEND = config.get('search', 'backend', fallback='auto')  # 检索索引: auto/fts5/memory
+    SEARCH_SNIPPET_LENGTH = config.getint('search', 'snippet_length', fallback=80)  # 结果摘要长度（字符）
+    SEARCH_DEFAULT_LIMIT = config.getint('search', 'default_limit', fallback=20)  # 默认每页条数
+    SEARCH_MAX_LIMIT = config.getint('search', 'max_limit', fallback=100)  # 每页条数上限
+
+    # 名称模糊查询索引配置
+    NGRAM_ENABLED = config.getboolean('ngram', 'enabled', fallback=True)  # 是否启用二元组索引
+    NGRAM_MIN_LENGTH = config.getint('ngram', 'min_length', fallback=2)  # 使用索引的最短关键字长度
+    NGRAM_MAX_CANDIDATES = config.getint('ngram', 'max_candidates', fallback=2000)  # 候选行上限，超出时直接 ilike
+
+    # 查询结果缓存配置
+    RESULT_CACHE_ENABLED = config.getboolean('result_cache', 'enabled', fallback=True)  # 是否缓存查询接口结果
+    RESULT_CACHE_TTL = config.getint('result_cache', 'ttl', fallback=30)  # 查询结果缓存有效期（秒）
+    RESULT_CACHE_MAXSIZE = config.getint('result_cache', 'maxsize', fallback=512)  # 查询结果缓存最大条数
+
+    # 事件按日统计配置
+    EVENT_STATS_BATCH_DAYS = config.getint('event_stats', 'rebuild_batch_days', fallback=31)  # 全量重算每批天数
+    EVENT_STATS_MAX_RANGE_DAYS = config.getint('event_stats', 'max_range_days', fallback=1100)  # 单次查询最大日期跨度（天）
 
     # 日志配置
     LOG_LEVEL = config.get('logging', 'level')
@@ -1,21 +1,101 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, Table, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, Table, JSON, DateTime, Float, Index
 from sqlalchemy.sql import func  # 导入 func 模块
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from flask import has_app_context
+from flask.globals import app_ctx
+import threading
 from .config import Config
+from .utils.metrics import instrument_engine
 
 # 创建基类
 Base = declarative_base()
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    SQLite 新连接建立时设置日志模式、同步级别、锁等待与页缓存
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA cache_size={int(Config.SQLITE_CACHE_SIZE)}")
+    finally:
+        cursor.close()
+
+def create_db_engine(url):
+    """
+    按 conf.ini [database] 配置创建数据库引擎
+
+    说明:
+        SQLAlchemy 对文件型 SQLite 默认使用 NullPool，每个会话都重新打开文件并重复执行 PRAGMA，
+        这里显式改用 QueuePool 复用连接；内存库保持方言默认的连接池。
+
+    参数:
+        url (str): 数据库连接串
+
+    返回:
+        Engine: 数据库引擎
+    """
+    db_url = make_url(url)
+    is_sqlite = db_url.get_backend_name() == "sqlite"
+    is_memory = is_sqlite and db_url.database in (None, "", ":memory:")
+
+    options = {
+        "echo": Config.DB_ECHO,
+        "pool_pre_ping": Config.DB_POOL_PRE_PING
+    }
+    if not is_memory:
+        options.update(
+            pool_size=Config.DB_POOL_SIZE,
+            max_overflow=Config.DB_MAX_OVERFLOW,
+            pool_timeout=Config.DB_POOL_TIMEOUT,
+            pool_recycle=Config.DB_POOL_RECYCLE
+        )
+    if is_sqlite:
+        # 连接会在线程间复用，锁等待由 busy_timeout 控制
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": Config.SQLITE_BUSY_TIMEOUT / 1000
+        }
+        if not is_memory:
+            options["poolclass"] = QueuePool
+
+    db_engine = create_engine(url, **options)
+    if is_sqlite:
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    if Config.METRICS_ENABLED:
+        # SQL 条数与耗时计入当前请求的指标
+        instrument_engine(db_engine)
+    return db_engine
+
 # 创建数据库引擎和会话
-engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+engine = create_db_engine(Config.SQLALCHEMY_DATABASE_URI)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _session_scope():
+    """
+    请求级会话的作用域：应用上下文内按上下文对象区分，上下文外（脚本、后台线程）按线程区分
+    """
+    if has_app_context():
+        return id(app_ctx._get_current_object())
+    return threading.get_ident()
+
+# 请求级会话：同一请求内装饰器与处理函数共享一个会话（一个连接、一个 identity map），
+# 由 teardown_appcontext 统一释放；后台线程仍使用 SessionLocal 自行管理会话
+db_session = scoped_session(SessionLocal, scopefunc=_session_scope)
+
 # 用户表 (TMSTUSER)
 class User(Base):
     __tablename__ = "TMSTUSER"
+    __table_args__ = (
+        Index("UX_TMSTUSER_EMPCODE", "empcode", unique=True),  # 登录按工号查询
+    )
     empid = Column(Integer, primary_key=True, autoincrement=True)  # PK，用户内码
     empcode = Column(String(10), nullable=False)  # 用户工号
     empname = Column(String(15), nullable=False)  # 用户名
@@ -33,6 +113,9 @@ class User(Base):
 # 部门表 (TMSTDEPT)
 class Department(Base):
     __tablename__ = "TMSTDEPT"
+    __table_args__ = (
+        Index("UX_TMSTDEPT_DEPTCODE", "deptcode", unique=True),
+    )
     deptid = Column(Integer, primary_key=True, autoincrement=True)  # PK，部门内码
     deptcode = Column(String(10), nullable=False)  # 部门编码
     deptname = Column(String(15), nullable=False)  # 部门名
@@ -46,6 +129,9 @@ class Department(Base):
 # 公司表 (TMSTCOMP)
 class Company(Base):
     __tablename__ = "TMSTCOMP"
+    __table_args__ = (
+        Index("UX_TMSTCOMP_COMPCODE", "compcode", unique=True),
+    )
     compid = Column(Integer, primary_key=True, autoincrement=True)  # PK，公司内码
     compcode = Column(String(10), nullable=False)  # 公司编码
     compname = Column(String(15), nullable=False)  # 公司名
@@ -60,6 +146,9 @@ class Company(Base):
 # 系统菜单表 (TMSTMENU)
 class Menu(Base):
     __tablename__ = "TMSTMENU"
+    __table_args__ = (
+        Index("UX_TMSTMENU_MENUCODE", "menucode", unique=True),
+    )
     menuid = Column(Integer, primary_key=True, autoincrement=True)  # PK，菜单id
     menucode = Column(String(10), nullable=False)  # 菜单编码
     mununame = Column(String(30), nullable=False)  # 菜单名
@@ -75,6 +164,10 @@ class Menu(Base):
 # 权限组表 (TAUTPERMISSIONGROUP)
 class PermissionGroup(Base):
     __tablename__ = "TAUTPERMISSIONGROUP"
+    __table_args__ = (
+        Index("UX_TAUTPERMISSIONGROUP_PGROUPCODE", "pgroupcode", unique=True),
+        Index("IX_TAUTPERMISSIONGROUP_PGROUPNAME", "pgroupname"),  # 权限校验按组名查询
+    )
     pgroupid = Column(Integer, primary_key=True, autoincrement=True)  # PK,权限组id
     pgroupcode = Column(String(10), nullable=False)  # 权限组编码
     pgroupname = Column(String(15), nullable=False)  # 权限组名
@@ -110,6 +203,10 @@ class UserPermission(Base):
 # 项目表 (TBUSPROJECT)
 class Project(Base):
     __tablename__ = "TBUSPROJECT"
+    __table_args__ = (
+        Index("UX_TBUSPROJECT_PRJCODE", "prjcode", unique=True),
+        Index("IX_TBUSPROJECT_OWNERID", "ownerid"),
+    )
     prjid = Column(Integer, primary_key=True, autoincrement=True)  # PK,项目id
     prjcode = Column(String(20), nullable=False)  # 项目编码
     prjname = Column(String(50), nullable=False)  # 项目名
@@ -129,6 +226,10 @@ class Project(Base):
 # 事件表 (TBUSEVENT)
 class Event(Base):
     __tablename__ = "TBUSEVENT"
+    __table_args__ = (
+        Index("IX_TBUSEVENT_REPORTER", "reporter"),
+        Index("IX_TBUSEVENT_REPORTERTIME", "reportertime", "eventid"),  # 与 query_events 的分页排序一致
+    )
     eventid = Column(Integer, primary_key=True, autoincrement=True)  # PK,事件id
     reporter = Column(Integer, nullable=False)  # 事件报告人id
     reportertime = Column(Date, nullable=False, server_default=func.now())  # 事件报告时间
@@ -142,25 +243,30 @@ class Event(Base):
 # 项目关联事件表 (TBUSPRJEVENT)
 class ProjectEvent(Base):
     __tablename__ = "TBUSPRJEVENT"
+    __table_args__ = (
+        Index("IX_TBUSPRJEVENT_PRJID", "prjid", "depth", "leafid"),  # 与 query_project_events 的分页排序一致
+        Index("IX_TBUSPRJEVENT_PARENTID", "parentid"),
+        Index("IX_TBUSPRJEVENT_EVENTID", "eventid"),
+        Index("IX_TBUSPRJEVENT_PATH", "path"),  # 子树按路径前缀做范围扫描
+    )
     prjid = Column(Integer, nullable=False)  # 项目id
     eventid = Column(Integer, nullable=False)  # 事件id
-    leafid = Column(Integer, primary_key=True, nullable=False)  # PK，子叶id
+    leafid = Column(Integer, primary_key=True, autoincrement=True)  # PK，子叶id，由数据库自增分配
     depth = Column(Integer, nullable=False)  # 深度数
     parentid = Column(Integer, nullable=False)  # 父节点id
+    path = Column(String(500))  # 物化路径，如 /1/5/9/，根节点到本节点的 leafid 序列
     createuser = Column(Integer, nullable=False)  # 创建人内码
     createdate = Column(Date, nullable=False, server_default=func.now())  # 创建时间
     modifyuser = Column(Integer)  # 修改人内码
     modifydate = Column(Date)  # 修改时间
     status = Column(Integer, nullable=False, default=0)  # 状态位，0正常，1停用
 
-    @staticmethod
-    def get_next_leafid(db):
-        last_record = db.query(ProjectEvent).order_by(ProjectEvent.leafid.desc()).first()
-        return last_record.leafid + 1 if last_record else 1
-
 # 项目参与者表 (TBUSPRJMEMBER)
 class ProjectMember(Base):
     __tablename__ = "TBUSPRJMEMBER"
+    __table_args__ = (
+        Index("IX_TBUSPRJMEMBER_EMPID", "empid"),  # 主键以 prjid 开头，按成员查询需单独索引
+    )
     prjid = Column(Integer, primary_key=True, nullable=False)  # PK，项目id
     empid = Column(Integer, primary_key=True, nullable=False)  # PK，员工id
     createuser = Column(Integer, nullable=False)  # 创建人内码
@@ -169,14 +275,70 @@ class ProjectMember(Base):
     modifydate = Column(Date)  # 修改时间
     status = Column(Integer, nullable=False, default=0)  # 状态位，0正常，1停用
 
+# 项目汇总表 (TBUSPRJSUMMARY)，随成员与事件写入增量维护，没有成员和事件的项目可能没有记录
+class ProjectSummary(Base):
+    __tablename__ = "TBUSPRJSUMMARY"
+    prjid = Column(Integer, primary_key=True)  # PK，项目id
+    membercount = Column(Integer, nullable=False, default=0)  # 状态正常的成员数
+    normalevents = Column(Integer, nullable=False, default=0)  # 关联的正常事件数
+    disabledevents = Column(Integer, nullable=False, default=0)  # 关联的停用事件数
+    treedepth = Column(Integer, nullable=False, default=0)  # 事件树层数，根节点为第 1 层
+    lasteventtime = Column(Date)  # 关联事件的最晚报告时间
+
+# 事件按日统计表 (TBUSEVENTSTAT)，随事件与项目事件写入增量维护
+class EventDayStat(Base):
+    __tablename__ = "TBUSEVENTSTAT"
+    __table_args__ = (
+        Index("IX_TBUSEVENTSTAT_STATDAY", "statday"),  # 重算按日期区间删除
+    )
+    prjid = Column(Integer, primary_key=True)  # PK，项目id，0 表示全部事件（不区分项目）
+    statday = Column(Date, primary_key=True)  # PK，事件报告日期
+    reporter = Column(Integer, primary_key=True)  # PK，事件报告人id
+    status = Column(Integer, primary_key=True)  # PK，事件状态位，0正常，1停用
+    eventcount = Column(Integer, nullable=False, default=0)  # 事件数（按项目统计时为状态正常的关联数）
+
 # 操作日志表 (operation_logs)
 class OperationLog(Base):
     __tablename__ = 'operation_logs'
-    
+    __table_args__ = (
+        Index("IX_OPERATION_LOGS_OPERATION_TIME", "operation_time"),
+    )
 
     id = Column(Integer, primary_key=True)
     operation_name = Column(String(100), nullable=False)
     api_path = Column(String(200), nullable=False)
     request_params = Column(JSON, nullable=True)
     operation_time = Column(DateTime, nullable=False)
-    operator_id = Column(String(50), nullable=True)
\ No newline at end of file
+    operator_id = Column(String(50), nullable=True)
+    response_status = Column(Integer, nullable=True)  # 接口响应状态码
+    duration_ms = Column(Float, nullable=True)  # 业务处理耗时（毫秒）
+# 服务端会话表 (TSYSSESSION)
+class UserSession(Base):
+    __tablename__ = "TSYSSESSION"
+    __table_args__ = (
+        Index("IX_TSYSSESSION_EMPID", "empid"),  # 按用户批量注销
+        Index("IX_TSYSSESSION_LASTACCESS", "last_access"),  # 清理空闲会话
+    )
+
+    sid = Column(String(64), primary_key=True)  # 会话id，即 Cookie 中的值
+    empid = Column(Integer)  # 登录用户内码，未登录为空
+    data = Column(JSON, nullable=False)  # 会话内容
+    created_at = Column(DateTime, nullable=False)  # 创建时间
+    last_access = Column(DateTime, nullable=False)  # 最后访问时间
+
+# 登录限流状态表 (TSYSRATELIMIT)
+class RateLimitState(Base):
+    __tablename__ = "TSYSRATELIMIT"
+    __table_args__ = (
+        Index("IX_TSYSRATELIMIT_UPDATEDAT", "updated_at"),  # 清理长时间未更新的键
+    )
+
+    rkey = Column(String(200), primary_key=True)  # 限流键，如 ip:127.0.0.1、user:ADM0000
+    window_start = Column(Float, nullable=False, default=0)  # 当前计数窗口起点（时间戳）
+    count = Column(Integer, nullable=False, default=0)  # 当前窗口尝试次数
+    prev_count = Column(Integer, nullable=False, default=0)  # 上一窗口尝试次数
+    failures = Column(Integer, nullable=False, default=0)  # 连续失败次数
+    lockouts = Column(Integer, nullable=False, default=0)  # 已锁定次数，决定下次锁定时长
+    locked_until = Column(Float, nullable=False, default=0)  # 锁定截止时间（时间戳）
+    last_failure = Column(Float)  # 最后一次登录失败时间（时间戳）
+    updated_at = Column(Float)  # 最后更新时间（时间戳）
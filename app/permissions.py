@@ -1,7 +1,206 @@
-from .models import SessionLocal, UserPermission, PermissionGroup, User
+import threading
+import time
+from .models import SessionLocal, UserPermission, PermissionGroup, GroupMenu, User
 from .utils.errors import BusinessError
+from .config import Config
 from loguru import logger
 
+class PermissionMatrix:
+    """
+    权限矩阵
+
+    功能:
+        将 PermissionGroup、UserPermission、GroupMenu 预加载为内存索引
+        （empid -> 权限组名集合 / 菜单id集合），权限校验只做一次字典查找。
+        授权/撤销时增量更新单个用户，并按配置间隔全量刷新以同步其他进程的修改。
+
+    说明:
+        授权、撤销与失效都会递增版本号，全量加载读取期间版本号变化则丢弃快照重新读取，
+        避免较早的快照覆盖刚撤销的权限。同一时间只有一个请求执行刷新，其他请求继续使用当前矩阵。
+    """
+
+    # 读取期间持续有修改时的最多重试次数，之后在锁内读取
+    MAX_LOAD_RETRIES = 3
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()  # 保证同一时间只有一个线程在刷新
+        self._generation = 0  # 授权、撤销、失效时递增
+        self._ready = False  # 是否已至少加载过一次
+        self._loaded_at = None
+        self._group_names = {}  # pgroupid -> pgroupname
+        self._group_ids = {}  # pgroupname -> pgroupid
+        self._group_menus = {}  # pgroupid -> set(menuid)
+        self._user_groups = {}  # empid -> set(pgroupid)
+        self._user_permissions = {}  # empid -> frozenset(pgroupname)
+        self._user_menus = {}  # empid -> frozenset(menuid)
+
+    def _read(self):
+        """
+        从数据库读取权限组、权限组菜单与用户权限（仅状态正常的记录）
+        """
+        db = SessionLocal()
+        try:
+            groups = db.query(PermissionGroup.pgroupid, PermissionGroup.pgroupname).filter(
+                PermissionGroup.status == 0
+            ).all()
+            group_menus = db.query(GroupMenu.pgroupid, GroupMenu.menuid).filter(
+                GroupMenu.status == 0
+            ).all()
+            user_permissions = db.query(UserPermission.empid, UserPermission.pgroupid).filter(
+                UserPermission.status == 0
+            ).all()
+        finally:
+            db.close()
+        return groups, group_menus, user_permissions
+
+    def _apply(self, groups, group_menus, user_permissions):
+        """
+        用读取结果替换整个矩阵（调用方持有锁）
+        """
+        self._group_names = {g.pgroupid: g.pgroupname for g in groups}
+        self._group_ids = {g.pgroupname: g.pgroupid for g in groups}
+        self._group_menus = {}
+        for row in group_menus:
+            self._group_menus.setdefault(row.pgroupid, set()).add(row.menuid)
+        self._user_groups = {}
+        for row in user_permissions:
+            self._user_groups.setdefault(row.empid, set()).add(row.pgroupid)
+        self._user_permissions = {}
+        self._user_menus = {}
+        for empid in self._user_groups:
+            self._rebuild_user(empid)
+        self._loaded_at = time.monotonic()
+        self._ready = True
+
+    def load(self):
+        """
+        从数据库全量加载权限矩阵
+
+        说明:
+            读取在锁外进行；读取期间发生授权、撤销或失效（版本号变化）时丢弃快照重新读取，
+            连续 MAX_LOAD_RETRIES 次仍有修改时在锁内读取，期间的授权、撤销等待读取完成后再应用。
+        """
+        for _ in range(self.MAX_LOAD_RETRIES):
+            with self._lock:
+                generation = self._generation
+            snapshot = self._read()
+            with self._lock:
+                if self._generation == generation:
+                    self._apply(*snapshot)
+                    break
+            logger.debug("权限矩阵加载期间有修改，重新读取")
+        else:
+            with self._lock:
+                self._apply(*self._read())
+
+        logger.info(f"权限矩阵加载完成: {len(self._group_names)} 个权限组, {len(self._user_groups)} 个用户")
+
+    def _rebuild_user(self, empid):
+        """
+        根据用户所属权限组重新生成该用户的权限名集合与菜单集合（调用方持有锁）
+        """
+        pgroupids = [g for g in self._user_groups.get(empid, ()) if g in self._group_names]
+        if not pgroupids:
+            self._user_permissions.pop(empid, None)
+            self._user_menus.pop(empid, None)
+            return
+        self._user_permissions[empid] = frozenset(self._group_names[g] for g in pgroupids)
+        menus = set()
+        for g in pgroupids:
+            menus |= self._group_menus.get(g, set())
+        self._user_menus[empid] = frozenset(menus)
+
+    def _stale(self):
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval
+
+    def _ensure_loaded(self):
+        """
+        首次使用或超过刷新间隔时全量加载
+
+        说明:
+            只有取得刷新锁的请求执行加载，其他请求继续使用当前矩阵；从未加载过时等待加载完成。
+        """
+        while self._stale():
+            if self._reload_lock.acquire(blocking=False):
+                try:
+                    if self._stale():
+                        self.load()
+                finally:
+                    self._reload_lock.release()
+                return
+            if self._ready:
+                return
+            # 首次加载进行中，等待完成后重新判断（加载失败时由等待者重试）
+            with self._reload_lock:
+                pass
+
+    def group_exists(self, permission_name):
+        """
+        判断权限组是否存在
+        """
+        self._ensure_loaded()
+        return permission_name in self._group_ids
+
+    def has_permission(self, empid, permission_name):
+        """
+        判断用户是否拥有指定权限组
+        """
+        self._ensure_loaded()
+        return permission_name in self._user_permissions.get(empid, ())
+
+    def permissions_of(self, empid):
+        """
+        返回用户拥有的权限组名集合
+        """
+        self._ensure_loaded()
+        return self._user_permissions.get(empid, frozenset())
+
+    def menus_of(self, empid):
+        """
+        返回用户可访问的菜单id集合
+        """
+        self._ensure_loaded()
+        return self._user_menus.get(empid, frozenset())
+
+    def grant(self, empid, pgroupid, pgroupname):
+        """
+        增量授权：将权限组加入用户索引
+        """
+        with self._lock:
+            self._generation += 1
+            if not self._ready:
+                return
+            # 加载之后新建的权限组同步登记
+            self._group_names[pgroupid] = pgroupname
+            self._group_ids[pgroupname] = pgroupid
+            self._user_groups.setdefault(empid, set()).add(pgroupid)
+            self._rebuild_user(empid)
+
+    def revoke(self, empid, pgroupid):
+        """
+        增量撤销：将权限组移出用户索引
+        """
+        with self._lock:
+            self._generation += 1
+            if not self._ready:
+                return
+            self._user_groups.get(empid, set()).discard(pgroupid)
+            self._rebuild_user(empid)
+
+    def invalidate(self):
+        """
+        标记矩阵失效，下次校验时全量重新加载
+        """
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = None
+
+# 全局权限矩阵实例
+permission_matrix = PermissionMatrix(refresh_interval=Config.PERMISSION_REFRESH_INTERVAL)
+
 def assign_permission_to_user(user_id, permission_name):
     """
     为用户分配权限
@@ -24,19 +223,25 @@ def assign_permission_to_user(user_id, permission_name):
             UserPermission.empid == user_id,
             UserPermission.pgroupid == permission_group.pgroupid
         ).first()
-        if existing_permission:
+        if existing_permission and existing_permission.status == 0:
             logger.warning(f"User {user_id} already has permission {permission_name}")
             return False, "Permission already assigned"
 
-        # 分配权限
-        new_permission = UserPermission(
-            empid=user_id,
-            pgroupid=permission_group.pgroupid,
-            createuser=user_id,  # 假设创建人是当前用户
-            status=0  # 状态位，0正常
-        )
-        db.add(new_permission)
+        if existing_permission:
+            # 曾经被撤销的权限，恢复其状态
+            existing_permission.status = 0
+            existing_permission.modifyuser = user_id
+        else:
+            # 分配权限
+            new_permission = UserPermission(
+                empid=user_id,
+                pgroupid=permission_group.pgroupid,
+                createuser=user_id,  # 假设创建人是当前用户
+                status=0  # 状态位，0正常
+            )
+            db.add(new_permission)
         db.commit()
+        permission_matrix.grant(user_id, permission_group.pgroupid, permission_group.pgroupname)
         logger.info(f"Permission {permission_name} assigned to user {user_id}")
         return True, "Permission assigned successfully"
     except Exception as e:
@@ -44,4 +249,37 @@ def assign_permission_to_user(user_id, permission_name):
         logger.error(f"Error assigning permission: {e}")
         return False, "Internal server error"
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def revoke_permission_from_user(user_id, permission_name):
+    """
+    撤销用户权限（逻辑删除）
+    """
+    db = SessionLocal()
+    try:
+        permission_group = db.query(PermissionGroup).filter(PermissionGroup.pgroupname == permission_name).first()
+        if not permission_group:
+            logger.warning(f"Permission group {permission_name} not found")
+            return False, "Permission group not found"
+
+        existing_permission = db.query(UserPermission).filter(
+            UserPermission.empid == user_id,
+            UserPermission.pgroupid == permission_group.pgroupid,
+            UserPermission.status == 0
+        ).first()
+        if not existing_permission:
+            logger.warning(f"User {user_id} does not have permission {permission_name}")
+            return False, "Permission not assigned"
+
+        existing_permission.status = 1
+        existing_permission.modifyuser = user_id
+        db.commit()
+        permission_matrix.revoke(user_id, permission_group.pgroupid)
+        logger.info(f"Permission {permission_name} revoked from user {user_id}")
+        return True, "Permission revoked successfully"
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error revoking permission: {e}")
+        return False, "Internal server error"
+    finally:
+        db.close()
@@ -8,7 +8,9 @@ class LoginSchema(Schema):
         empcode (str): 用户工号
         password (str): 加密后的密码
         captcha (str): 验证码
+        kid (str): 加密所用公钥的 key id（可选）
     """
     empcode = fields.Str(required=True, validate=validate.Length(min=1, max=10))  # 用户工号
     password = fields.Str(required=True, validate=validate.Length(min=6))  # 密码
     captcha = fields.Str(required=True, validate=validate.Length(min=4, max=4))  # 验证码
+    kid = fields.Str(required=False)  # 公钥 key id
@@ -1,5 +1,6 @@
 from marshmallow import Schema, fields, validate, ValidationError
 from datetime import datetime
+from app.schemas.pagination_schema import PaginationSchema
 
 def validate_date_format(value):
     """
@@ -42,7 +43,7 @@ class CompanyUpdateSchema(Schema):
     uscicode = fields.Str(required=False, validate=validate.Length(max=20))
     status = fields.Int(required=False, validate=validate.OneOf([0, 1]))
 
-class CompanyQuerySchema(Schema):
+class CompanyQuerySchema(PaginationSchema):
     """
     公司查询参数校验 Schema
     
@@ -55,6 +56,7 @@ class CompanyQuerySchema(Schema):
         createdate_start (str): 创建时间范围查询开始日期，格式YYYY-MM-DD
         createdate_end (str): 创建时间范围查询结束日期，格式YYYY-MM-DD
         status (int): 状态位，0正常，1停用
+        limit/cursor/stream: 分页参数，继承自 PaginationSchema
     """
     compcode = fields.Str(required=False)
     compname = fields.Str(required=False)
@@ -1,5 +1,6 @@
 from marshmallow import Schema, fields, validate, ValidationError
 from datetime import datetime
+from app.schemas.pagination_schema import PaginationSchema
 
 def validate_date_format(value):
     """
@@ -34,7 +35,7 @@ class EventUpdateSchema(Schema):
     event = fields.Str(required=False, validate=validate.Length(max=2000))
     status = fields.Int(required=False, validate=validate.OneOf([0, 1]))
 
-class EventQuerySchema(Schema):
+class EventQuerySchema(PaginationSchema):
     """
     事件查询参数校验 Schema
     
@@ -43,8 +44,30 @@ class EventQuerySchema(Schema):
         reportertime_start (str): 事件报告时间范围查询开始日期，格式YYYY-MM-DD
         reportertime_end (str): 事件报告时间范围查询结束日期，格式YYYY-MM-DD
         status (int): 状态位，0正常，1停用
+        limit/cursor/stream: 分页参数，继承自 PaginationSchema
     """
     reporter = fields.Int(required=False, validate=validate.Range(min=1))
     reportertime_start = fields.Str(required=False, validate=validate_date_format)
     reportertime_end = fields.Str(required=False, validate=validate_date_format)
     status = fields.Int(required=False, validate=validate.OneOf([0, 1]))
+
+class EventStatsSchema(Schema):
+    """
+    事件统计查询参数校验 Schema
+
+    参数:
+        date_start (str): 报告日期范围开始，格式YYYY-MM-DD
+        date_end (str): 报告日期范围结束（含），格式YYYY-MM-DD
+        granularity (str): 汇总周期 day / week / month，默认 day
+        group_by (list): 分组维度，可选 prjid / reporter / status，不传时只按周期汇总
+        prjid (int): 项目ID，精确查询
+        reporter (int): 事件报告人ID，精确查询
+        status (int): 事件状态位，0正常，1停用
+    """
+    date_start = fields.Str(required=True, validate=validate_date_format)
+    date_end = fields.Str(required=True, validate=validate_date_format)
+    granularity = fields.Str(required=False, load_default="day", validate=validate.OneOf(["day", "week", "month"]))
+    group_by = fields.List(fields.Str(validate=validate.OneOf(["prjid", "reporter", "status"])), required=False, load_default=list)
+    prjid = fields.Int(required=False, validate=validate.Range(min=1))
+    reporter = fields.Int(required=False, validate=validate.Range(min=1))
+    status = fields.Int(required=False, validate=validate.OneOf([0, 1]))
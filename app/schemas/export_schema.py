@@ -0,0 +1,56 @@
+from marshmallow import Schema, fields, validate
+from app.schemas.project_schema import ProjectQuerySchema
+from app.schemas.event_schema import EventQuerySchema, validate_date_format
+from app.schemas.project_event_schema import ProjectEventQuerySchema
+
+# 支持的导出格式
+EXPORT_FORMATS = ("csv", "ndjson", "xlsx")
+
+class ExportFormatSchema(Schema):
+    """
+    导出格式参数
+
+    参数:
+        format (str): 导出格式，csv / ndjson / xlsx，默认 csv
+    """
+    format = fields.Str(required=False, load_default="csv", validate=validate.OneOf(EXPORT_FORMATS))
+
+class ProjectExportSchema(ProjectQuerySchema, ExportFormatSchema):
+    """
+    项目导出参数：与 ProjectQuerySchema 相同的过滤条件，去掉分页参数
+    """
+    class Meta:
+        exclude = ("limit", "cursor", "stream")
+
+class EventExportSchema(EventQuerySchema, ExportFormatSchema):
+    """
+    事件导出参数：与 EventQuerySchema 相同的过滤条件，去掉分页参数
+    """
+    class Meta:
+        exclude = ("limit", "cursor", "stream")
+
+class ProjectEventExportSchema(ProjectEventQuerySchema, ExportFormatSchema):
+    """
+    项目事件树导出参数：与 ProjectEventQuerySchema 相同的过滤条件，去掉分页参数
+    """
+    class Meta:
+        exclude = ("limit", "cursor", "stream")
+
+class OperationLogExportSchema(ExportFormatSchema):
+    """
+    操作日志导出参数
+
+    参数:
+        operation_name (str): 操作名称，模糊查询
+        api_path (str): 接口路径，精确查询
+        operator_id (str): 操作人，精确查询
+        response_status (int): 响应状态码，精确查询
+        operation_time_start (str): 操作时间范围开始日期，格式YYYY-MM-DD
+        operation_time_end (str): 操作时间范围结束日期（含当天），格式YYYY-MM-DD
+    """
+    operation_name = fields.Str(required=False)
+    api_path = fields.Str(required=False)
+    operator_id = fields.Str(required=False)
+    response_status = fields.Int(required=False)
+    operation_time_start = fields.Str(required=False, validate=validate_date_format)
+    operation_time_end = fields.Str(required=False, validate=validate_date_format)
@@ -0,0 +1,19 @@
+from marshmallow import Schema, fields, validate
+from app.config import Config
+
+class PaginationSchema(Schema):
+    """
+    游标分页参数校验 Schema，供各查询 Schema 继承
+
+    参数:
+        limit (int): 每页返回条数，默认取配置 pagination.default_limit
+        cursor (str): 上一页返回的 next_cursor，查询首页时不传
+        stream (bool): 为 true 时以分块流式 JSON 返回全部结果，忽略 limit 与 cursor
+    """
+    limit = fields.Int(
+        required=False,
+        load_default=Config.PAGINATION_DEFAULT_LIMIT,
+        validate=validate.Range(min=1, max=Config.PAGINATION_MAX_LIMIT)
+    )
+    cursor = fields.Str(required=False)
+    stream = fields.Bool(required=False, load_default=False)
@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields, validate
+from app.schemas.pagination_schema import PaginationSchema
 
 class ProjectEventCreateSchema(Schema):
     """
@@ -13,9 +14,33 @@ class ProjectEventCreateSchema(Schema):
     eventid = fields.Int(required=True, validate=validate.Range(min=1))
     parentid = fields.Int(required=True, validate=validate.Range(min=0)) 
 
-class ProjectEventQuerySchema(Schema):
+class ProjectEventQuerySchema(PaginationSchema):
     """
     项目事件查询Schema
+
+    分页参数 limit、cursor、stream 继承自 PaginationSchema
     """
     prjcode = fields.Str(required=False)  # 项目编码
-    prjname = fields.Str(required=False)  # 项目名称 
\ No newline at end of file
+    prjname = fields.Str(required=False)  # 项目名称 
+
+class ProjectEventTreeSchema(Schema):
+    """
+    项目事件树查询Schema
+
+    参数:
+        prjid (int): 项目ID，与 prjcode 二选一
+        prjcode (str): 项目编码
+        leafid (int): 子树根节点ID，不传时返回整个项目的事件树
+    """
+    prjid = fields.Int(required=False, validate=validate.Range(min=1))
+    prjcode = fields.Str(required=False)
+    leafid = fields.Int(required=False, validate=validate.Range(min=1))
+
+class ProjectEventNodeSchema(Schema):
+    """
+    项目事件节点Schema
+
+    参数:
+        leafid (int): 节点ID
+    """
+    leafid = fields.Int(required=True, validate=validate.Range(min=1))
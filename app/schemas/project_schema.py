@@ -1,5 +1,6 @@
 from marshmallow import Schema, fields, validate, ValidationError
 from datetime import datetime
+from app.schemas.pagination_schema import PaginationSchema
 
 def validate_date_format(value):
     """
@@ -52,7 +53,7 @@ class ProjectUpdateSchema(Schema):
     expectedtime = fields.Str(required=False, validate=validate_date_format)
     status = fields.Int(required=False, validate=validate.OneOf([0, 1]))
 
-class ProjectQuerySchema(Schema):
+class ProjectQuerySchema(PaginationSchema):
     """
     项目查询参数校验 Schema
     
@@ -66,6 +67,7 @@ class ProjectQuerySchema(Schema):
         expectedtime_start (str): 预期结束时间范围查询开始日期，格式YYYY-MM-DD
         expectedtime_end (str): 预期结束时间范围查询结束日期，格式YYYY-MM-DD
         status (int): 状态位，0正常，1停用
+        limit/cursor/stream: 分页参数，继承自 PaginationSchema
     """
     prjcode = fields.Str(required=False)
     prjname = fields.Str(required=False)
@@ -77,6 +79,19 @@ class ProjectQuerySchema(Schema):
     expectedtime_end = fields.Str(required=False, validate=validate_date_format)
     status = fields.Int(required=False, validate=validate.OneOf([0, 1]))
 
+class ProjectDashboardSchema(ProjectQuerySchema):
+    """
+    项目看板查询参数校验 Schema
+
+    参数:
+        与 ProjectQuerySchema 相同的过滤条件与 limit/cursor 分页参数，不支持 stream
+        overdue (bool): true 只查已过预期结束时间的项目，false 只查未过期的项目，不传时不过滤
+    """
+    overdue = fields.Bool(required=False)
+
+    class Meta:
+        exclude = ("stream",)
+
 class ProjectMemberCreateSchema(Schema):
     """
     项目成员创建接口的输入参数校验Schema
@@ -99,7 +114,7 @@ class ProjectMemberRemoveSchema(Schema):
     prjid = fields.Int(required=True, validate=validate.Range(min=1))
     empid = fields.Int(required=True, validate=validate.Range(min=1))
 
-class ProjectMemberQuerySchema(Schema):
+class ProjectMemberQuerySchema(PaginationSchema):
     """
     项目成员查询参数校验 Schema
     
@@ -108,6 +123,7 @@ class ProjectMemberQuerySchema(Schema):
         empname (str): 用户姓名，模糊查询
         prjcode (str): 项目编码，精确查询
         prjname (str): 项目名称，模糊查询
+        limit/cursor/stream: 分页参数，继承自 PaginationSchema
     """
     empcode = fields.Str(required=False)
     empname = fields.Str(required=False)
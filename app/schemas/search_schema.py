@@ -0,0 +1,21 @@
+from marshmallow import Schema, fields, validate
+from app.config import Config
+
+class SearchSchema(Schema):
+    """
+    全文检索参数校验 Schema
+
+    参数:
+        q (str): 搜索关键字，多个关键字以空格分隔，需同时命中
+        status (int): 状态位过滤，0正常，1停用，不传时不过滤
+        limit (int): 每页返回条数，默认取配置 search.default_limit
+        cursor (str): 上一页返回的 next_cursor，查询首页时不传
+    """
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    status = fields.Int(required=False, validate=validate.OneOf([0, 1]))
+    limit = fields.Int(
+        required=False,
+        load_default=Config.SEARCH_DEFAULT_LIMIT,
+        validate=validate.Range(min=1, max=Config.SEARCH_MAX_LIMIT)
+    )
+    cursor = fields.Str(required=False)
@@ -1,5 +1,6 @@
 from marshmallow import Schema, fields, validate, ValidationError
 from re import match
+from app.schemas.pagination_schema import PaginationSchema
 
 def validate_chinese_phone_number(value):
     """
@@ -49,15 +50,17 @@ class UpdatePasswdSchema(Schema):
     参数:
     - nowpasswd (str): 当前密码的RSA加密字符串
     - newpasswd (str): 新密码的RSA加密字符串
+    - kid (str): 加密所用公钥的 key id（可选）
     
     返回值:
     - None
     """
     nowpasswd = fields.Str(required=True)  # 当前密码(RSA加密)
     newpasswd = fields.Str(required=True)  # 新密码(RSA加密)
+    kid = fields.Str(required=False)  # 公钥 key id
 
 
-class UserQuerySchema(Schema):
+class UserQuerySchema(PaginationSchema):
     """
     用户查询Schema
     
@@ -68,6 +71,7 @@ class UserQuerySchema(Schema):
     - mobile (str): 手机号
     - status (int): 状态 0-正常 1-停用
     - admin (int): 是否管理员 0-否 1-是
+    - limit/cursor/stream: 分页参数，继承自 PaginationSchema
     """
     empcode = fields.Str(required=False)
     empname = fields.Str(required=False)
@@ -0,0 +1,161 @@
+import atexit
+import queue
+import threading
+import time
+from loguru import logger
+from app.config import Config
+from app.models import SessionLocal, OperationLog
+
+# 停止信号
+_STOP = object()
+
+class AuditWriter:
+    """
+    操作日志异步批量写入器
+
+    功能:
+        业务线程只把日志放入有界队列，由后台线程按条数或时间窗口攒批，
+        使用 bulk_insert_mappings 一次提交一批 OperationLog。
+
+    参数:
+        queue_size (int): 队列长度上限
+        batch_size (int): 单批写入条数
+        flush_interval (float): 最长攒批时间（秒）
+        overflow (str): 队列满时的策略，drop 丢弃 / block 阻塞等待 / sync 在调用线程同步写入
+        block_timeout (float): block 策略的最长等待时间（秒），超时后丢弃
+    """
+
+    def __init__(self, queue_size=10000, batch_size=200, flush_interval=1.0, overflow="sync", block_timeout=0.5):
+        if overflow not in ("drop", "block", "sync"):
+            raise ValueError(f"Unknown audit overflow policy: {overflow}")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+        self._stats_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.sync_writes = 0
+
+    def start(self):
+        """
+        启动后台写入线程（首次写入时自动调用），并注册进程退出时的刷盘
+        """
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def submit(self, entry):
+        """
+        提交一条操作日志
+
+        参数:
+            entry (dict): OperationLog 字段字典
+        """
+        if not (self._thread and self._thread.is_alive()):
+            self.start()
+
+        try:
+            if self.overflow == "block":
+                self._queue.put(entry, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            if self.overflow == "sync":
+                with self._stats_lock:
+                    self.sync_writes += 1
+                self._write_batch([entry])
+            else:
+                with self._stats_lock:
+                    self.dropped += 1
+                logger.warning(f"操作日志队列已满，丢弃日志: {entry.get('operation_name')} {entry.get('api_path')}")
+
+    def _run(self):
+        """
+        后台线程：按条数或时间窗口攒批写入，收到停止信号后写完剩余日志退出
+        """
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                self._queue.task_done()
+            except queue.Empty:
+                pass
+
+            if batch and (stopping or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+    def _write_batch(self, batch):
+        """
+        批量写入一批操作日志，失败时只记录日志，不影响业务
+        """
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(OperationLog, batch)
+            db.commit()
+            with self._stats_lock:
+                self.written += len(batch)
+        except Exception as e:
+            db.rollback()
+            with self._stats_lock:
+                self.failed += len(batch)
+            logger.error(f"操作日志批量写入失败({len(batch)}条): {e}")
+        finally:
+            db.close()
+
+    def shutdown(self, timeout=5.0):
+        """
+        发送停止信号并等待后台线程写完剩余日志
+        """
+        with self._start_lock:
+            thread = self._thread
+            if not (thread and thread.is_alive()):
+                return
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                logger.warning("操作日志队列已满，停止信号发送超时")
+            thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        """
+        返回写入统计，供监控使用
+        """
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "sync_writes": self.sync_writes,
+                "overflow": self.overflow
+            }
+
+# 全局操作日志写入器
+audit_writer = AuditWriter(
+    queue_size=Config.AUDIT_QUEUE_SIZE,
+    batch_size=Config.AUDIT_BATCH_SIZE,
+    flush_interval=Config.AUDIT_FLUSH_INTERVAL,
+    overflow=Config.AUDIT_OVERFLOW,
+    block_timeout=Config.AUDIT_BLOCK_TIMEOUT
+)
@@ -0,0 +1,175 @@
+from datetime import datetime
+from flask import jsonify
+from marshmallow import ValidationError
+from sqlalchemy import inspect
+from app.config import Config
+from app.utils.errors import BusinessError
+from app.utils.search import search_index
+from app.utils.result_cache import table_versions
+from app.utils.project_summary import project_summary
+from app.utils.event_stats import event_stats
+
+def parse_date(value):
+    """
+    将 YYYY-MM-DD 字符串转为 date，空值返回 None
+    """
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def load_batch(payload):
+    """
+    解析批量接口的请求体
+
+    参数:
+        payload (dict): 请求体，格式为 {"items": [...], "atomic": false}
+
+    返回:
+        tuple: (条目列表, 是否整批原子提交)
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("items"), list):
+        raise BusinessError(
+            code=2101,
+            module="Batch",
+            input_data=None,
+            message="请求体必须包含 items 数组"
+        )
+    items = payload["items"]
+    if not items:
+        raise BusinessError(code=2102, module="Batch", input_data=None, message="items 不能为空")
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        raise BusinessError(
+            code=2103,
+            module="Batch",
+            input_data={"count": len(items)},
+            message=f"单批最多 {Config.BATCH_MAX_ITEMS} 条"
+        )
+    return items, bool(payload.get("atomic", False))
+
+class BatchResult:
+    """
+    批量操作的逐条结果收集器
+
+    功能:
+        按请求中的下标记录每条数据的成功/失败，失败条目附带原因，
+        成功条目在插入后回填主键，最终生成统一的批量响应。
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self._results = {}
+
+    def fail(self, index, errors):
+        """
+        记录失败条目，errors 为字段错误字典或错误描述
+        """
+        self._results[index] = {"index": index, "status": "failed", "errors": errors}
+
+    def succeed(self, index, status="created", **extra):
+        """
+        记录成功条目
+        """
+        self._results[index] = dict({"index": index, "status": status}, **extra)
+
+    def is_failed(self, index):
+        """
+        判断条目是否已记为失败
+        """
+        return self._results.get(index, {}).get("status") == "failed"
+
+    @property
+    def failed(self):
+        """
+        已失败的条目数
+        """
+        return sum(1 for r in self._results.values() if r["status"] == "failed")
+
+    def abort(self, reason):
+        """
+        原子模式下整批放弃：尚未失败的条目标记为未执行
+        """
+        for index in range(self.total):
+            if not self.is_failed(index):
+                self._results[index] = {"index": index, "status": "skipped", "errors": reason}
+
+    def response(self):
+        """
+        生成批量响应：全部失败时返回 400，否则返回 200 并逐条说明结果
+        """
+        results = [self._results.get(i, {"index": i, "status": "skipped"}) for i in range(self.total)]
+        succeeded = sum(1 for r in results if r["status"] not in ("failed", "skipped"))
+        body = {
+            "total": self.total,
+            "succeeded": succeeded,
+            "failed": self.total - succeeded,
+            "results": results
+        }
+        return jsonify(body), (200 if succeeded else 400)
+
+def validate_items(items, schema, result):
+    """
+    使用单条接口的 Schema 逐条校验，校验失败的条目记入结果
+
+    返回:
+        list: [(下标, 校验后的数据)]
+    """
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.load(item if isinstance(item, dict) else {})))
+        except ValidationError as e:
+            result.fail(index, e.messages)
+    return valid
+
+def reject_duplicates(valid, key, existing, result, label):
+    """
+    剔除业务编码与库中已有数据或同批其他条目重复的条目
+
+    参数:
+        valid (list): [(下标, 数据)]
+        key (str): 业务编码字段名
+        existing (set): 库中已存在的编码
+        result (BatchResult): 结果收集器
+        label (str): 错误提示中的字段名称
+
+    返回:
+        list: 去重后的 [(下标, 数据)]
+    """
+    seen = set(existing)
+    kept = []
+    for index, data in valid:
+        code = data[key]
+        if code in seen:
+            result.fail(index, {key: [f"{label}已存在"]})
+            continue
+        seen.add(code)
+        kept.append((index, data))
+    return kept
+
+def bulk_insert(db, model, rows, return_ids=True):
+    """
+    在当前事务中批量插入
+
+    说明:
+        需要回填自增主键时使用 return_defaults，SQLAlchemy 会逐行执行 INSERT 以取得主键，
+        但仍在同一事务内、不经过 ORM 单元工作；不需要主键时以 executemany 一次提交。
+        回填主键时同时同步全文索引（事件、项目），名称索引由数据库触发器维护；
+        无论是否回填都标记表已写入，使查询结果缓存在提交后失效，并重算成员、项目事件所涉项目的汇总，
+        将事件、项目事件计入按日统计（事件需回填主键）。
+
+    参数:
+        db: 数据库会话
+        model: ORM 模型类
+        rows (list): 字段字典列表，return_ids 时插入后回填主键
+        return_ids (bool): 是否回填自增主键
+    """
+    if rows:
+        db.bulk_insert_mappings(model, rows, return_defaults=return_ids)
+        if return_ids:
+            # 批量插入不经过单元工作，不会触发全文索引与表版本号的会话事件，需显式同步
+            pk = inspect(model).primary_key[0]
+            search_index.refresh(db, model, pk.in_([row[pk.key] for row in rows]))
+        table_versions.touch(db, model)
+        project_summary.refresh(db, model, rows)
+        event_stats.refresh(db, model, rows)
+    return rows
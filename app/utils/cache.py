@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+
+# 已创建的缓存实例，供监控接口汇总命中率
+_registry = {}
+
+class TTLCache:
+    """
+    线程安全的 TTL + LRU 内存缓存
+
+    参数:
+        name (str): 缓存名称，用于监控输出
+        maxsize (int): 最大条数，超出后淘汰最久未使用的条目
+        ttl (int): 条目有效期（秒）
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=300):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, 过期时间)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        _registry[name] = self
+
+    def get(self, key, default=None):
+        """
+        读取缓存，未命中或已过期时返回 default
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        写入缓存，ttl 为空时使用实例默认有效期
+        """
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        删除指定条目
+        """
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self):
+        """
+        返回命中统计，供监控使用
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+def all_cache_stats():
+    """
+    汇总所有缓存实例的统计信息
+    """
+    return [cache.stats() for cache in _registry.values()]
+
+# 登录用户缓存：empid -> 用户基本信息字典
+user_cache = TTLCache("user", maxsize=Config.USER_CACHE_MAXSIZE, ttl=Config.USER_CACHE_TTL)
+
+def user_to_cache_entry(user):
+    """
+    提取用户记录中登录校验所需的字段，避免缓存脱离会话的 ORM 对象
+    """
+    return {
+        "empid": user.empid,
+        "empcode": user.empcode,
+        "empname": user.empname,
+        "status": user.status,
+        "admin": user.admin
+    }
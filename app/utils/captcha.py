@@ -0,0 +1,104 @@
+import threading
+from collections import deque
+from loguru import logger
+
+class CaptchaPool:
+    """
+    预生成验证码池
+
+    功能:
+        后台线程持续预生成 (文本, PNG 字节) 并保持池中有 size 个可用验证码，
+        请求线程只需出队，绘制与 PNG 编码不占用请求时间；池被取空时在请求线程中现场生成兜底。
+        每个验证码只出队一次，不会重复下发。
+
+    参数:
+        text_factory (callable): 生成验证码文本的函数
+        renderer (callable): 根据文本生成 PNG 字节的函数
+        size (int): 池中保持的验证码数量
+    """
+
+    def __init__(self, text_factory, renderer, size=200):
+        self.text_factory = text_factory
+        self.renderer = renderer
+        self.size = size
+        self._items = deque()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.failed = 0
+
+    def start(self):
+        """
+        启动后台生成线程（首次取用时自动调用）
+        """
+        if self.size <= 0:
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="captcha-pool", daemon=True)
+            self._thread.start()
+
+    def _generate(self):
+        """
+        生成一个验证码
+        """
+        text = self.text_factory()
+        return text, self.renderer(text)
+
+    def _run(self):
+        """
+        后台线程：补满验证码池后等待被取用时唤醒
+        """
+        while True:
+            while len(self._items) < self.size:
+                try:
+                    self._items.append(self._generate())
+                    with self._stats_lock:
+                        self.generated += 1
+                except Exception as e:
+                    with self._stats_lock:
+                        self.failed += 1
+                    logger.error(f"预生成验证码失败: {e}")
+                    break
+            self._wakeup.wait(timeout=1.0)
+            self._wakeup.clear()
+
+    def get(self):
+        """
+        取出一个验证码
+
+        返回:
+            tuple: (验证码文本, PNG 字节)
+        """
+        if not (self._thread and self._thread.is_alive()):
+            self.start()
+        try:
+            item = self._items.popleft()
+            with self._stats_lock:
+                self.hits += 1
+        except IndexError:
+            # 突发请求取空了池，现场生成
+            item = self._generate()
+            with self._stats_lock:
+                self.misses += 1
+        self._wakeup.set()
+        return item
+
+    def stats(self):
+        """
+        返回池内余量与命中统计，供监控使用
+        """
+        with self._stats_lock:
+            return {
+                "size": self.size,
+                "ready": len(self._items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "generated": self.generated,
+                "failed": self.failed
+            }
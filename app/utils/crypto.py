@@ -3,10 +3,154 @@ from Crypto.PublicKey import RSA
 from Crypto.Cipher import PKCS1_OAEP ,PKCS1_v1_5
 from Crypto.Hash import SHA256
 import base64
+import hashlib
+import threading
 import traceback
 from loguru import logger
+from app.config import Config
 from .errors import BusinessError
 
+class RSAKeyManager:
+    """
+    RSA 密钥管理器
+
+    功能:
+        启动时解析一次 PEM 密钥并缓存密钥对象与 OAEP 解密器，后续请求直接复用；
+        支持按 key id 热加载/轮换密钥，轮换后保留最近的旧密钥用于解密过渡期内的密文。
+
+    参数:
+        max_keys (int): 最多保留的密钥数量（含当前密钥）
+    """
+
+    def __init__(self, max_keys=2):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._keys = {}  # kid -> {"private_key", "public_pem", "cipher"}，按加载顺序排列
+        self._active_kid = None
+        self._pem_index = {}  # 私钥 PEM 摘要 -> kid，兼容直接传入 PEM 字符串的调用方
+
+    @staticmethod
+    def _pem_digest(pem):
+        if isinstance(pem, str):
+            pem = pem.encode("utf-8")
+        return hashlib.sha256(pem.strip()).hexdigest()
+
+    @staticmethod
+    def key_id(key):
+        """
+        以公钥 DER 的 SHA-256 前 16 位作为 key id
+        """
+        return hashlib.sha256(key.publickey().export_key(format="DER")).hexdigest()[:16]
+
+    def load(self, private_pem, public_pem=None, activate=True):
+        """
+        解析并登记一对密钥，默认设为当前密钥
+
+        参数:
+            private_pem (str): 私钥 PEM
+            public_pem (str): 公钥 PEM，为空时由私钥导出
+            activate (bool): 是否设为当前密钥
+
+        返回:
+            str: 密钥的 key id
+        """
+        key = RSA.import_key(private_pem.strip())  # 去掉私钥的多余换行符和空格
+        kid = self.key_id(key)
+        if public_pem is None:
+            public_pem = key.publickey().export_key().decode("utf-8")
+
+        with self._lock:
+            if kid not in self._keys:
+                # OAEP 解密不修改解密器内部状态，可在线程间复用
+                self._keys[kid] = {
+                    "private_key": key,
+                    "public_pem": public_pem,
+                    "size": key.size_in_bytes(),
+                    "cipher": PKCS1_OAEP.new(key, hashAlgo=SHA256)  # 指定哈希算法为 SHA-256
+                }
+                self._pem_index[self._pem_digest(private_pem)] = kid
+            if activate or self._active_kid is None:
+                if self._active_kid != kid:
+                    logger.info(f"RSA 密钥已切换: {self._active_kid} -> {kid}")
+                self._active_kid = kid
+
+            # 超出保留数量时淘汰最早加载的非当前密钥
+            while len(self._keys) > self.max_keys:
+                oldest = next(k for k in self._keys if k != kid)
+                self._keys.pop(oldest)
+                self._pem_index = {d: k for d, k in self._pem_index.items() if k != oldest}
+        return kid
+
+    def load_from_config(self):
+        """
+        从配置的密钥文件加载密钥（启动时与热加载时调用）
+        """
+        private_pem, public_pem = Config.load_rsa_keys()
+        return self.load(private_pem, public_pem)
+
+    reload = load_from_config
+
+    def _ensure_loaded(self):
+        if self._active_kid is None:
+            self.load_from_config()
+
+    @property
+    def active_kid(self):
+        self._ensure_loaded()
+        return self._active_kid
+
+    def public_pem(self, kid=None):
+        """
+        返回指定（默认当前）密钥的公钥 PEM
+        """
+        return self._get(kid)["public_pem"]
+
+    def private_key(self, kid=None):
+        """
+        返回指定（默认当前）密钥的私钥对象
+        """
+        return self._get(kid)["private_key"]
+
+    def ciphers(self, kid=None, private_pem=None):
+        """
+        返回用于解密的密钥条目列表
+
+        说明:
+            指定 kid 或私钥 PEM 时只返回对应密钥；否则当前密钥在前，
+            其余保留的旧密钥在后，供轮换过渡期回退尝试。
+        """
+        if private_pem is not None:
+            kid = self._pem_index.get(self._pem_digest(private_pem))
+            if kid is None:
+                # 调用方直接传入的 PEM 只解析一次，且不抢占当前密钥
+                self._ensure_loaded()
+                kid = self.load(private_pem, activate=False)
+        if kid is not None:
+            return [self._get(kid)]
+
+        self._ensure_loaded()
+        with self._lock:
+            active = self._active_kid
+            entries = [self._keys[active]]
+            entries += [v for k, v in reversed(list(self._keys.items())) if k != active]
+        return entries
+
+    def _get(self, kid=None):
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._keys.get(kid or self._active_kid)
+        if entry is None:
+            raise BusinessError(
+                code=1005,
+                module="RSAKeyManager",
+                input_data={"kid": kid},
+                message=f"Unknown RSA key id: {kid}"
+            )
+        return entry
+
+# 全局 RSA 密钥管理器
+rsa_key_manager = RSAKeyManager()
+
 class PasswordService:
     """
     密码服务类
@@ -15,7 +159,7 @@ class PasswordService:
     @staticmethod
     def hash_password(password):
         """
-        使用 werkzeug.security 对密码进行加盐加密
+        使用 werkzeug.security 按配置的加密方式对密码进行加盐加密
         """
         if not password:
             raise BusinessError(
@@ -24,7 +168,7 @@ class PasswordService:
                 input_data={"password": password},
                 message="Password cannot be empty"
             )
-        return generate_password_hash(password)
+        return generate_password_hash(password, Config.PASSWORD_HASH_METHOD, Config.PASSWORD_SALT_LENGTH)
 
     @staticmethod
     def verify_password(password, hashed_password):
@@ -52,17 +196,17 @@ class PasswordService:
         return private_key, public_key
 
     @staticmethod
-    def encrypt_rsa(plaintext, public_key):
+    def encrypt_rsa(plaintext, public_key=None):
         """
         使用 RSA 公钥加密
 
         :param plaintext: 待加密的明文字符串
-        :param public_key: RSA 公钥字符串
+        :param public_key: RSA 公钥字符串，为空时使用密钥管理器的当前公钥
         :return: 加密后的 Base64 编码字符串
         """
         try:
-            logger.debug(f"Loaded public key: {public_key}")  # 调试日志
-            logger.debug(f"Loaded private key: {public_key}")  # 调试日志
+            if public_key is None:
+                public_key = rsa_key_manager.public_pem()
             key = RSA.import_key(public_key)
             cipher = PKCS1_OAEP.new(key,hashAlgo=SHA256)
             encrypted = cipher.encrypt(plaintext.encode('utf-8'))
@@ -76,47 +220,51 @@ class PasswordService:
             )
 
     @staticmethod
-    def decrypt_rsa(ciphertext, private_key):
+    def decrypt_rsa(ciphertext, private_key=None, kid=None):
         """
         使用 RSA 私钥解密
 
         :param ciphertext: 待解密的 Base64 编码字符串
-        :param private_key: RSA 私钥字符串
+        :param private_key: RSA 私钥字符串，为空时使用密钥管理器中缓存的密钥
+        :param kid: 加密时使用的公钥 key id，为空时依次尝试当前密钥与保留的旧密钥
         :return: 解密后的明文字符串
         """
         try:
-            logger.debug(f"Loaded private key: {private_key}")  # 调试日志
-            key = RSA.import_key(private_key.strip())  # 去掉私钥的多余换行符和空格
-            cipher = PKCS1_OAEP.new(key, hashAlgo=SHA256)  # 指定哈希算法为 SHA-256
+            keys = rsa_key_manager.ciphers(kid=kid, private_pem=private_key)
 
             # 对 Base64 密文进行解码
             decoded_ciphertext = base64.b64decode(ciphertext)
-            logger.debug(f'Plain Base64 ciphertext is: {decoded_ciphertext.hex()}')  # 记录Base64转换后的十六进制密文
 
-            # 密文长度检查
-            if len(decoded_ciphertext) != key.size_in_bytes():
-                logger.error(f"Invalid ciphertext length: {len(decoded_ciphertext)}")
-                raise ValueError("Invalid ciphertext length")
+            decrypted = None
+            last_error = None
+            for entry in keys:
+                # 密文长度检查
+                if len(decoded_ciphertext) != entry["size"]:
+                    last_error = ValueError("Invalid ciphertext length")
+                    continue
+                try:
+                    decrypted = entry["cipher"].decrypt(decoded_ciphertext)
+                    break
+                except ValueError as e:
+                    last_error = e
+            if decrypted is None:
+                logger.error(f"RSA decryption failed with {len(keys)} key(s): {last_error}")
+                raise last_error
 
-            # 解密
-            decrypted = cipher.decrypt(decoded_ciphertext)
             try:
                 decrypted_text = decrypted.decode('utf-8')
             except UnicodeDecodeError:
                 logger.error("Decrypted data is not valid UTF-8")
                 raise
-            logger.debug(f"Decrypted text: {decrypted_text}")
             return decrypted_text
+        except BusinessError:
+            raise
         except Exception as e:
             error_traceback = traceback.format_exc()
             logger.error(f"Decryption error details: {str(e)}\nTraceback:\n{error_traceback}")
             raise BusinessError(
                 code=1004,
                 module="PasswordService",
-                input_data={
-                    "ciphertext": ciphertext,
-                    "private_key": private_key,
-                    "decoded_ciphertext": base64.b64decode(ciphertext).hex()  # 记录解码后的十六进制表示
-                },
+                input_data={"ciphertext": ciphertext, "kid": kid},
                 message=f"RSA decryption failed: {str(e)}"
             )
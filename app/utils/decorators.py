@@ -1,9 +1,37 @@
 from functools import wraps
 from flask import request, session, jsonify
-from ..models import SessionLocal, User, UserPermission, PermissionGroup, OperationLog  # 导入相关模型
+from ..models import db_session, User  # 导入相关模型
+from ..permissions import permission_matrix
 from ..utils.errors import BusinessError
+from ..utils.cache import user_cache, user_to_cache_entry
+from ..utils.audit import audit_writer
 from loguru import logger
 from datetime import datetime
+import time
+
+def _load_current_user(empid):
+    """
+    读取当前登录用户：优先从用户缓存读取，未命中时再查询数据库
+
+    返回:
+        tuple: (用户信息字典, 错误响应)，用户存在时错误响应为 None
+    """
+    entry = user_cache.get(empid)
+    if entry is not None:
+        return entry, None
+
+    db = db_session()
+    try:
+        user = db.query(User).filter(User.empid == empid).first()  # 使用 empid 作为用户内码
+        if not user:
+            logger.warning(f"User {empid} not found")
+            return None, (jsonify({"error": "User not found"}), 404)
+        entry = user_to_cache_entry(user)
+        user_cache.set(empid, entry)
+        return entry, None
+    except Exception as e:
+        logger.error(f"Error fetching user: {e}")
+        return None, (jsonify({"error": "Internal server error"}), 500)
 
 def login_required(f):
     """
@@ -20,17 +48,34 @@ def login_required(f):
             return jsonify({"error": "未授权"}), 401
 
         # 查询用户是否存在
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.empid == session["empid"]).first()  # 使用 empid 作为用户内码
-            if not user:
-                logger.warning(f"User {session['user_id']} not found")
-                return jsonify({"error": "User not found"}), 404
-        except Exception as e:
-            logger.error(f"Error fetching user: {e}")
-            return jsonify({"error": "Internal server error"}), 500
-        finally:
-            db.close()
+        _, error_response = _load_current_user(session.get("empid"))
+        if error_response:
+            return error_response
+
+        # 继续执行被装饰的函数
+        return f(*args, **kwargs)
+    return decorated_function
+
+def admin_required(f):
+    """
+    管理员校验装饰器
+
+    功能:
+        验证用户已登录且为管理员（admin=0），否则返回 401/403 错误。
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # 检查 Session 中是否存在登录状态
+        if "login_status" not in session or not session["login_status"]:
+            logger.warning("用户未登录")
+            return jsonify({"error": "未授权"}), 401
+
+        user, error_response = _load_current_user(session.get("empid"))
+        if error_response:
+            return error_response
+        if user["admin"] != 0:
+            logger.warning(f"User {user['empid']} is not an administrator")
+            return jsonify({"error": "Forbidden"}), 403
 
         # 继续执行被装饰的函数
         return f(*args, **kwargs)
@@ -54,41 +99,41 @@ def permission_required(permission_name):
                 logger.warning("用户未登录")
                 return jsonify({"error": "未授权"}), 401
 
-            db = SessionLocal()
+            # 查询用户
+            empid = session.get("empid")
+            _, error_response = _load_current_user(empid)
+            if error_response:
+                return error_response
+
             try:
-                # 查询用户
-                user = db.query(User).filter(User.empid == session["empid"]).first()  # 使用 empid 作为用户内码
-                if not user:
-                    logger.warning(f"User {session['user_id']} not found")
-                    return jsonify({"error": "User not found"}), 404
-
-                # 查询权限组
-                permission_group = db.query(PermissionGroup).filter(
-                    PermissionGroup.pgroupname == permission_name
-                ).first()
-                if not permission_group:
+                # 查询权限组（内存权限矩阵）
+                if not permission_matrix.group_exists(permission_name):
                     logger.warning(f"Permission group {permission_name} not found")
                     return jsonify({"error": "Permission group not found"}), 404
 
                 # 检查用户是否拥有该权限
-                user_permission = db.query(UserPermission).filter(
-                    UserPermission.empid == user.empid,
-                    UserPermission.pgroupid == permission_group.pgroupid
-                ).first()
-                if not user_permission:
-                    logger.warning(f"User {user.empid} does not have permission {permission_name}")
+                if not permission_matrix.has_permission(empid, permission_name):
+                    logger.warning(f"User {empid} does not have permission {permission_name}")
                     return jsonify({"error": "Forbidden"}), 403
-
-                # 继续执行被装饰的函数
-                return f(*args, **kwargs)
             except Exception as e:
                 logger.error(f"Error checking permission: {e}")
                 return jsonify({"error": "Internal server error"}), 500
-            finally:
-                db.close()
+
+            # 继续执行被装饰的函数
+            return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+def _response_status(rv):
+    """
+    从视图返回值中提取 HTTP 状态码
+    """
+    if isinstance(rv, tuple):
+        if len(rv) > 1 and isinstance(rv[1], int):
+            return rv[1]
+        rv = rv[0]
+    return getattr(rv, "status_code", 200)
+
 def operation_log(operation_name):
     """
     业务操作日志装饰器
@@ -97,34 +142,31 @@ def operation_log(operation_name):
         operation_name (str): 操作名称
         
     功能:
-        记录用户操作日志，包括API、操作用户、请求参数、访问时间
+        记录用户操作日志，包括API、操作用户、请求参数、访问时间、响应状态码与处理耗时。
+        日志交由后台写入器异步批量落库，写入失败不影响业务处理。
     """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            db = SessionLocal()
+            operation_time = datetime.now()
+            started = time.perf_counter()
+            status = 500
             try:
-                # 获取操作信息
-                log_data = {
-                    "operation_name": operation_name,
-                    "api_path": request.path,
-                    "request_params": request.get_json() if request.is_json else request.args,
-                    "operation_time": datetime.now(),
-                    "operator_id": session.get("empid")
-                }
-                
-                # 创建日志记录
-                log_entry = OperationLog(**log_data)
-                db.add(log_entry)
-                db.commit()
-                
-                # 继续执行被装饰的函数
-                return f(*args, **kwargs)
-            except Exception as e:
-                logger.error(f"Error recording operation log: {e}")
-                db.rollback()
-                return jsonify({"error": "Internal server error"}), 500
+                rv = f(*args, **kwargs)
+                status = _response_status(rv)
+                return rv
             finally:
-                db.close()
+                try:
+                    audit_writer.submit({
+                        "operation_name": operation_name,
+                        "api_path": request.path,
+                        "request_params": request.get_json(silent=True) if request.is_json else request.args.to_dict(),
+                        "operation_time": operation_time,
+                        "operator_id": session.get("empid"),
+                        "response_status": status,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 3)
+                    })
+                except Exception as e:
+                    logger.error(f"Error recording operation log: {e}")
         return decorated_function
     return decorator
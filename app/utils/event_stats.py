@@ -0,0 +1,378 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+import click
+from sqlalchemy import Date, and_, event, func, literal, select
+from loguru import logger
+from app.config import Config
+from app.models import SessionLocal, Event, ProjectEvent, EventDayStat
+from app.utils.errors import BusinessError
+from app.utils.project_summary import old_value, attr_changed, is_normal
+
+_TABLE = EventDayStat.__table__
+# 汇总周期
+GRANULARITIES = ("day", "week", "month")
+# 可分组的维度，与 TBUSEVENTSTAT 列名一致
+DIMENSIONS = ("prjid", "reporter", "status")
+# 事件报告日期：未填写时取服务端默认值 now()，SQLite 会存成带时分秒的文本，按日期部分归档
+_REPORT_DAY = func.date(Event.reportertime, type_=Date)
+
+def _reported_between(first, last):
+    """
+    报告日期落在 [first, last] 的条件：直接比较原列以利用 IX_TBUSEVENT_REPORTERTIME，
+    带时分秒的文本同样小于次日零点
+    """
+    return and_(Event.reportertime >= first, Event.reportertime < last + timedelta(days=1))
+
+def period_start(day, granularity):
+    """
+    返回日期所在周期的第一天：按周为周一，按月为 1 日
+    """
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def _bucket_key(prjid, day, reporter, status):
+    """
+    日桶主键条件
+    """
+    return and_(_TABLE.c.prjid == prjid, _TABLE.c.statday == day, _TABLE.c.reporter == reporter, _TABLE.c.status == status)
+
+class EventStatsTracker:
+    """
+    事件按日统计
+
+    功能:
+        按 (项目, 报告日期, 报告人, 状态) 维护事件数：项目为 0 的行统计全部事件，
+        其余行统计状态正常的项目关联。会话 flush 后在同一事务内按增量更新，
+        周、月及任意区间的统计对日桶求和。
+
+    说明:
+        全量重算在后台线程中按日期区间分批执行，每批在一个写事务内删除该区间的日桶并按明细重新汇总。
+        并发写入要么在该批之前提交（已计入重算），要么在之后提交（增量加在重算结果上），无需停写。
+        bulk_insert_mappings 不经过单元工作，批量插入事件或项目事件后需调用 refresh。
+
+    参数:
+        batch_days (int): 重算时每批处理的天数
+        max_range_days (int): 单次查询允许的最大日期跨度
+    """
+
+    def __init__(self, batch_days=31, max_range_days=1100):
+        self.batch_days = batch_days
+        self.max_range_days = max_range_days
+        self._session_factory = None
+        self._lock = threading.Lock()
+        self._rebuild = None  # 当前或最近一次重算的进度
+        self.updates = 0
+
+    def start(self, session_factory=SessionLocal):
+        """
+        注册会话事件；统计表为空而已有事件时（首次升级）在后台重算
+        """
+        if self._session_factory is not None:
+            return
+        self._session_factory = session_factory
+        event.listen(session_factory, "after_flush", self._after_flush)
+
+        db = session_factory()
+        try:
+            empty = db.query(EventDayStat.prjid).first() is None
+            if empty and db.query(Event.eventid).first() is not None:
+                self.start_rebuild()
+        except Exception as e:
+            logger.error(f"检查事件统计表失败: {e}")
+        finally:
+            db.close()
+
+    def _apply(self, conn, deltas):
+        """
+        将 {(项目, 日期, 报告人, 状态): 增量} 累加到日桶，计数归零的行删除
+        """
+        for (prjid, day, reporter, status), delta in deltas.items():
+            if not delta or day is None:
+                continue
+            key = _bucket_key(prjid, day, reporter, status)
+            result = conn.execute(_TABLE.update().where(key).values(eventcount=_TABLE.c.eventcount + delta))
+            if result.rowcount == 0:
+                # 日桶不存在时只补正数；负数说明该日尚未完成重算，由重算计入
+                if delta > 0:
+                    conn.execute(_TABLE.insert().values(
+                        prjid=prjid, statday=day, reporter=reporter, status=status, eventcount=delta
+                    ))
+            elif delta < 0:
+                conn.execute(_TABLE.delete().where(key, _TABLE.c.eventcount <= 0))
+            self._count_update()
+
+    def _count_update(self):
+        with self._lock:
+            self.updates += 1
+
+    def _after_flush(self, session, flush_context):
+        new_events = set()
+        old_events = {}  # eventid -> flush 前的 (报告日期, 报告人, 状态)
+        links = []  # (leafid, 原 (项目, 事件) 或 None, 新 (项目, 事件) 或 None)，只记状态正常的关联
+
+        for obj in session.new:
+            if isinstance(obj, Event):
+                new_events.add(obj.eventid)
+            elif isinstance(obj, ProjectEvent) and is_normal(obj.status):
+                links.append((obj.leafid, None, (obj.prjid, obj.eventid)))
+
+        for obj in session.dirty:
+            if isinstance(obj, Event):
+                if attr_changed(obj, "reportertime", "reporter", "status"):
+                    old_events[obj.eventid] = tuple(old_value(obj, attr) for attr in ("reportertime", "reporter", "status"))
+            elif isinstance(obj, ProjectEvent) and attr_changed(obj, "prjid", "eventid", "status"):
+                old = (old_value(obj, "prjid"), old_value(obj, "eventid")) if is_normal(old_value(obj, "status")) else None
+                new = (obj.prjid, obj.eventid) if is_normal(obj.status) else None
+                if old != new:
+                    links.append((obj.leafid, old, new))
+
+        for obj in session.deleted:
+            if isinstance(obj, Event):
+                old_events[obj.eventid] = tuple(old_value(obj, attr) for attr in ("reportertime", "reporter", "status"))
+            elif isinstance(obj, ProjectEvent) and is_normal(old_value(obj, "status")):
+                links.append((obj.leafid, (old_value(obj, "prjid"), old_value(obj, "eventid")), None))
+
+        if not (new_events or old_events or links):
+            return
+        conn = session.connection()
+
+        # flush 后的事件取值从数据库读取，报告时间等服务端默认值也能取到
+        eventids = new_events | set(old_events) | {pair[1] for _, old, new in links for pair in (old, new) if pair}
+        current = {row[0]: tuple(row[1:]) for row in conn.execute(
+            select(Event.eventid, Event.reportertime, Event.reporter, Event.status).where(Event.eventid.in_(eventids))
+        )}
+
+        deltas = defaultdict(int)
+
+        def add(prjid, values, delta):
+            if values is not None:
+                day, reporter, status = values
+                deltas[(prjid, day, reporter, status)] += delta
+
+        for eventid in new_events:
+            add(0, current.get(eventid), 1)
+        for eventid, old in old_events.items():
+            add(0, old, -1)
+            add(0, current.get(eventid), 1)
+        for _, old, new in links:
+            if old:
+                add(old[0], old_events.get(old[1], current.get(old[1])), -1)
+            if new:
+                add(new[0], current.get(new[1]), 1)
+
+        if old_events:
+            # 本次未改动的关联随事件的日期、报告人、状态一起迁移
+            touched = [leafid for leafid, _, _ in links]
+            query = select(ProjectEvent.prjid, ProjectEvent.eventid, func.count()).where(
+                ProjectEvent.eventid.in_(old_events), ProjectEvent.status == 0
+            )
+            if touched:
+                query = query.where(ProjectEvent.leafid.notin_(touched))
+            for prjid, eventid, count in conn.execute(query.group_by(ProjectEvent.prjid, ProjectEvent.eventid)):
+                add(prjid, old_events[eventid], -count)
+                add(prjid, current.get(eventid), count)
+
+        self._apply(conn, deltas)
+
+    def refresh(self, db, model, rows):
+        """
+        批量插入事件或项目事件后，在当前事务中计入日桶，其他模型直接返回
+
+        参数:
+            db: 数据库会话
+            model: ORM 模型类
+            rows (list): 已插入的字段字典列表，事件需已回填 eventid，项目事件需含 prjid、eventid
+        """
+        if self._session_factory is None or model not in (Event, ProjectEvent) or not rows:
+            return
+        conn = db.connection()
+        eventids = {row["eventid"] for row in rows}
+        current = {row[0]: tuple(row[1:]) for row in conn.execute(
+            select(Event.eventid, Event.reportertime, Event.reporter, Event.status).where(Event.eventid.in_(eventids))
+        )}
+        deltas = defaultdict(int)
+        for row in rows:
+            if model is ProjectEvent and not is_normal(row.get("status")):
+                continue
+            values = current.get(row["eventid"])
+            if values is not None:
+                deltas[(0 if model is Event else row["prjid"],) + values] += 1
+        self._apply(conn, deltas)
+
+    def _rebuild_range(self, conn, first, last):
+        """
+        重算 [first, last] 日期区间的日桶，调用方负责提交
+        """
+        conn.execute(_TABLE.delete().where(_TABLE.c.statday.between(first, last)))
+        columns = ["prjid", "statday", "reporter", "status", "eventcount"]
+        conn.execute(_TABLE.insert().from_select(columns, select(
+            literal(0), _REPORT_DAY, Event.reporter, Event.status, func.count()
+        ).where(_reported_between(first, last)).group_by(
+            _REPORT_DAY, Event.reporter, Event.status
+        )))
+        conn.execute(_TABLE.insert().from_select(columns, select(
+            ProjectEvent.prjid, _REPORT_DAY, Event.reporter, Event.status, func.count()
+        ).join(Event, Event.eventid == ProjectEvent.eventid).where(
+            _reported_between(first, last), ProjectEvent.status == 0
+        ).group_by(ProjectEvent.prjid, _REPORT_DAY, Event.reporter, Event.status)))
+
+    def rebuild(self, progress=None):
+        """
+        按日期区间分批全量重算，每批单独提交
+
+        参数:
+            progress (callable): 每批完成后以 (已处理天数, 总天数) 回调
+        """
+        db = self._session_factory()
+        try:
+            # 原列的最值可走索引，Date 类型取值时只解析日期部分
+            first, last = db.query(func.min(Event.reportertime), func.max(Event.reportertime)).one()
+            # 事件日期区间以外的日桶（事件已删除或改期）直接清除
+            query = db.query(EventDayStat)
+            if first is not None:
+                query = query.filter((EventDayStat.statday < first) | (EventDayStat.statday > last))
+            query.delete(synchronize_session=False)
+            db.commit()
+            if first is None:
+                return 0
+
+            total = (last - first).days + 1
+            day = first
+            while day <= last:
+                end = min(day + timedelta(days=self.batch_days - 1), last)
+                self._rebuild_range(db.connection(), day, end)
+                db.commit()
+                if progress:
+                    progress((end - first).days + 1, total)
+                day = end + timedelta(days=1)
+            return total
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def start_rebuild(self):
+        """
+        在后台线程中全量重算，已有重算在执行时抛出业务异常
+
+        返回:
+            dict: 重算进度
+        """
+        with self._lock:
+            if self._rebuild is not None and self._rebuild["status"] == "running":
+                raise BusinessError(
+                    code=2502,
+                    module="EventStats",
+                    input_data={},
+                    message="事件统计正在重算"
+                )
+            state = self._rebuild = {
+                "status": "running",
+                "days": 0,
+                "total_days": None,
+                "started": datetime.now().isoformat(timespec="seconds"),
+                "elapsed": None,
+                "error": None
+            }
+
+        def progress(days, total):
+            with self._lock:
+                state["days"], state["total_days"] = days, total
+
+        def run():
+            started = time.perf_counter()
+            try:
+                days = self.rebuild(progress)
+                status, error = "finished", None
+                logger.info(f"事件统计重算完成: {days} 天，耗时 {time.perf_counter() - started:.1f}s")
+            except Exception as e:
+                status, error = "failed", str(e)
+                logger.error(f"事件统计重算失败: {e}")
+            with self._lock:
+                state.update(status=status, error=error, elapsed=round(time.perf_counter() - started, 3))
+
+        threading.Thread(target=run, name="event-stats-rebuild", daemon=True).start()
+        return dict(state)
+
+    def rollup(self, db, date_start, date_end, granularity="day", group_by=(), prjid=None, reporter=None, status=None):
+        """
+        对日桶求和得到区间统计
+
+        参数:
+            db: 数据库会话
+            date_start (date): 开始日期（含）
+            date_end (date): 结束日期（含）
+            granularity (str): 汇总周期 day / week / month
+            group_by (list): 分组维度，取值见 DIMENSIONS，为空时只按周期汇总
+            prjid/reporter/status: 过滤条件，不传时不过滤
+
+        返回:
+            list: [{"period": 周期第一天, 各分组维度..., "count": 事件数}]，按周期与维度排序
+
+        说明:
+            按项目分组或过滤时统计状态正常的项目关联，否则统计全部事件。
+        """
+        if date_end < date_start or (date_end - date_start).days + 1 > self.max_range_days:
+            raise BusinessError(
+                code=2501,
+                module="EventStats",
+                input_data={"date_start": str(date_start), "date_end": str(date_end)},
+                message=f"日期区间无效，结束日期不能早于开始日期且跨度不超过 {self.max_range_days} 天"
+            )
+        dimensions = [dimension for dimension in DIMENSIONS if dimension in group_by]
+        columns = [getattr(EventDayStat, dimension) for dimension in dimensions]
+        query = db.query(EventDayStat.statday, *columns, func.sum(EventDayStat.eventcount)).filter(
+            EventDayStat.statday.between(date_start, date_end)
+        )
+        if "prjid" in dimensions or prjid is not None:
+            query = query.filter(EventDayStat.prjid == prjid if prjid is not None else EventDayStat.prjid > 0)
+        else:
+            query = query.filter(EventDayStat.prjid == 0)
+        if reporter is not None:
+            query = query.filter(EventDayStat.reporter == reporter)
+        if status is not None:
+            query = query.filter(EventDayStat.status == status)
+
+        totals = defaultdict(int)
+        for row in query.group_by(EventDayStat.statday, *columns):
+            totals[(period_start(row[0], granularity),) + tuple(row[1:-1])] += row[-1]
+        return [
+            dict(zip(dimensions, key[1:]), period=key[0].isoformat(), count=count)
+            for key, count in sorted(totals.items())
+        ]
+
+    def stats(self):
+        """
+        返回增量更新次数与最近一次重算进度，供监控使用
+        """
+        with self._lock:
+            return {
+                "name": "event_stats",
+                "updates": self.updates,
+                "rebuild": dict(self._rebuild) if self._rebuild else None
+            }
+
+# 全局事件按日统计
+event_stats = EventStatsTracker(
+    batch_days=Config.EVENT_STATS_BATCH_DAYS,
+    max_range_days=Config.EVENT_STATS_MAX_RANGE_DAYS
+)
+
+@click.command("rebuild-event-stats")
+def rebuild_event_stats_command():
+    """
+    按日期区间分批全量重算事件统计表（TBUSEVENTSTAT）
+    """
+    def progress(days, total):
+        click.echo(f"\r已重算 {days}/{total} 天", nl=False)
+
+    started = time.perf_counter()
+    days = event_stats.rebuild(progress)
+    click.echo()
+    click.echo(f"已重算 {days} 天的事件统计，耗时 {time.perf_counter() - started:.1f} 秒")
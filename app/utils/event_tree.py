@@ -0,0 +1,219 @@
+from sqlalchemy import func
+from loguru import logger
+from app.models import ProjectEvent, Event
+from app.utils.errors import BusinessError
+
+# 物化路径分隔符：路径形如 "/1/5/9/"，依次为根节点到当前节点的 leafid
+PATH_SEP = "/"
+
+def node_path(parent_path, leafid):
+    """
+    根据父节点路径与本节点 leafid 生成物化路径，根节点的父路径为空
+    """
+    return f"{parent_path or PATH_SEP}{leafid}{PATH_SEP}"
+
+def subtree_range(path):
+    """
+    返回子树在 path 列上的半开区间 [lower, upper)
+
+    说明:
+        子孙节点的路径都以本节点路径为前缀。分隔符 "/" 的下一个字符是 "0"，
+        因此前缀去掉末尾 "/" 再接 "0" 即是所有以该前缀开头的字符串的上界，
+        子树查询可走 path 索引做一次范围扫描。
+    """
+    return path, path[:-1] + chr(ord(PATH_SEP) + 1)
+
+def path_ids(path):
+    """
+    解析物化路径中的 leafid 列表（根节点在前）
+    """
+    return [int(part) for part in path.strip(PATH_SEP).split(PATH_SEP) if part]
+
+def assign_path(db, node, parent=None):
+    """
+    为新插入的项目事件节点生成物化路径
+
+    说明:
+        leafid 由数据库自增分配，需先 flush 取得主键后再拼接路径，调用方负责提交事务。
+
+    参数:
+        db: 数据库会话
+        node (ProjectEvent): 已 add 到会话的新节点
+        parent (ProjectEvent): 父节点，根节点传 None
+    """
+    if node.leafid is None:
+        db.flush()
+    node.path = node_path(parent.path if parent is not None else None, node.leafid)
+    return node.path
+
+def get_node(db, leafid, prjid=None):
+    """
+    读取状态正常的节点，不存在（或不属于指定项目）时抛出业务异常
+    """
+    query = db.query(ProjectEvent).filter(ProjectEvent.leafid == leafid, ProjectEvent.status == 0)
+    if prjid is not None:
+        query = query.filter(ProjectEvent.prjid == prjid)
+    node = query.first()
+    if node is None:
+        raise BusinessError(
+            code=3001,
+            module="EventTree",
+            input_data={"leafid": leafid, "prjid": prjid},
+            message="项目事件节点不存在"
+        )
+    return node
+
+def _node_query(db):
+    """
+    节点与事件内容的联合查询
+    """
+    return db.query(
+        ProjectEvent.prjid,
+        ProjectEvent.leafid,
+        ProjectEvent.parentid,
+        ProjectEvent.depth,
+        ProjectEvent.path,
+        Event.eventid,
+        Event.reporter,
+        Event.reportertime,
+        Event.event
+    ).join(
+        Event, ProjectEvent.eventid == Event.eventid
+    ).filter(
+        ProjectEvent.status == 0
+    )
+
+def _row_to_node(row):
+    """
+    节点查询行转树节点字典
+    """
+    return {
+        "leafid": row.leafid,
+        "parentid": row.parentid,
+        "depth": row.depth,
+        "eventid": row.eventid,
+        "reporter": row.reporter,
+        "reportertime": row.reportertime.isoformat() if row.reportertime else None,
+        "event": row.event,
+        "descendants": 0,
+        "children": []
+    }
+
+def build_tree(rows):
+    """
+    将按 path 排序的节点行组装为嵌套树，并计算每个节点的子孙数
+
+    说明:
+        按路径排序时父节点总在子节点之前，一次遍历即可挂接；
+        父节点不在结果集中（子树查询的根、或父节点已停用）的节点作为根返回。
+
+    返回:
+        list: 根节点列表，每个节点含 children 与 descendants
+    """
+    nodes = {}
+    roots = []
+    for row in rows:
+        node = _row_to_node(row)
+        nodes[row.leafid] = node
+        parent = nodes.get(row.parentid)
+        if parent is not None:
+            parent["children"].append(node)
+        else:
+            roots.append(node)
+
+    # 逆序累加子孙数：子节点总在父节点之后出现
+    for row in reversed(rows):
+        node = nodes[row.leafid]
+        parent = nodes.get(row.parentid)
+        if parent is not None and parent is not node:
+            parent["descendants"] += node["descendants"] + 1
+
+    # 路径按字符串排序（/10/ 在 /9/ 之前），同级节点再按 leafid 排序输出
+    for node in nodes.values():
+        node["children"].sort(key=lambda child: child["leafid"])
+    roots.sort(key=lambda root: root["leafid"])
+    return roots
+
+def project_tree(db, prjid):
+    """
+    读取项目下的完整事件树（按 prjid 一次索引扫描）
+    """
+    rows = _node_query(db).filter(ProjectEvent.prjid == prjid).order_by(ProjectEvent.path).all()
+    return build_tree(rows)
+
+def subtree(db, leafid, prjid=None):
+    """
+    读取以指定节点为根的子树（按 path 一次索引范围扫描）
+    """
+    node = get_node(db, leafid, prjid)
+    lower, upper = subtree_range(node.path)
+    rows = _node_query(db).filter(
+        ProjectEvent.path >= lower,
+        ProjectEvent.path < upper
+    ).order_by(ProjectEvent.path).all()
+    return build_tree(rows)
+
+def ancestors(db, leafid, prjid=None):
+    """
+    读取从根节点到指定节点的祖先路径（不含节点本身），根节点在前
+    """
+    node = get_node(db, leafid, prjid)
+    ids = path_ids(node.path)[:-1]
+    if not ids:
+        return []
+    rows = _node_query(db).filter(ProjectEvent.leafid.in_(ids)).all()
+    by_id = {row.leafid: row for row in rows}
+    result = []
+    for ancestor_id in ids:
+        row = by_id.get(ancestor_id)
+        if row is not None:
+            node_dict = _row_to_node(row)
+            del node_dict["children"], node_dict["descendants"]
+            result.append(node_dict)
+    return result
+
+def descendant_count(db, leafid, prjid=None):
+    """
+    统计指定节点状态正常的子孙数
+    """
+    node = get_node(db, leafid, prjid)
+    lower, upper = subtree_range(node.path)
+    total = db.query(func.count(ProjectEvent.leafid)).filter(
+        ProjectEvent.path >= lower,
+        ProjectEvent.path < upper,
+        ProjectEvent.status == 0
+    ).scalar()
+    return total - 1
+
+def rebuild_paths(session_factory):
+    """
+    为缺少物化路径的存量节点补齐 path（启动时执行）
+
+    说明:
+        按 depth 从浅到深处理，父节点路径总先于子节点生成；
+        父节点不存在的孤儿节点按根节点处理并记录告警。
+    """
+    db = session_factory()
+    try:
+        if not db.query(ProjectEvent.leafid).filter(ProjectEvent.path.is_(None)).first():
+            return 0
+
+        paths = dict(db.query(ProjectEvent.leafid, ProjectEvent.path).filter(ProjectEvent.path.isnot(None)).all())
+        pending = db.query(ProjectEvent).filter(ProjectEvent.path.is_(None)).order_by(
+            ProjectEvent.depth, ProjectEvent.leafid
+        ).all()
+        for node in pending:
+            parent_path = paths.get(node.parentid) if node.parentid else None
+            if node.parentid and parent_path is None:
+                logger.warning(f"项目事件节点 {node.leafid} 的父节点 {node.parentid} 不存在，按根节点处理")
+            node.path = node_path(parent_path, node.leafid)
+            paths[node.leafid] = node.path
+        db.commit()
+        logger.info(f"已补齐 {len(pending)} 个项目事件节点的物化路径")
+        return len(pending)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"补齐项目事件物化路径失败: {e}")
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime
+from flask import Response, stream_with_context
+from loguru import logger
+from app.config import Config
+from .errors import BusinessError
+
+# 同时进行的导出数上限，超出时直接拒绝，避免长时间占满工作线程
+_export_slots = threading.BoundedSemaphore(Config.EXPORT_MAX_CONCURRENT)
+
+_MIMETYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+}
+
+def _plain(value):
+    """
+    单元格取值转为可写入 CSV/XLSX 的简单类型
+    """
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def _json_default(value):
+    """
+    NDJSON 序列化日期等非 JSON 类型
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+def _csv_chunks(rows, columns, chunk_size):
+    """
+    逐块输出 CSV，首行为表头；带 BOM 以便 Excel 正确识别 UTF-8
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow([title for _, title in columns])
+    count = 0
+    for row in rows:
+        writer.writerow(["" if row.get(key) is None else _plain(row.get(key)) for key, _ in columns])
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _ndjson_chunks(rows, columns, chunk_size):
+    """
+    逐块输出 NDJSON，每行一个 JSON 对象
+    """
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({key: row.get(key) for key, _ in columns}, ensure_ascii=False, default=_json_default))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def _xlsx_chunks(rows, columns, chunk_size):
+    """
+    以 openpyxl 只写模式生成 XLSX 临时文件后分块输出
+
+    说明:
+        XLSX 是 zip 包，必须写完才能输出；只写模式逐行落盘，内存占用与行数无关。
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise BusinessError(
+            code=2302,
+            module="Export",
+            input_data=None,
+            message="导出 XLSX 需要安装 openpyxl"
+        )
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([title for _, title in columns])
+    for row in rows:
+        sheet.append([_plain(row.get(key)) for key, _ in columns])
+
+    fd, path = tempfile.mkstemp(prefix="export-", suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(64 * 1024)
+                if not data:
+                    break
+                yield data
+    finally:
+        os.remove(path)
+
+_WRITERS = {
+    "csv": _csv_chunks,
+    "ndjson": _ndjson_chunks,
+    "xlsx": _xlsx_chunks
+}
+
+def export_response(query, order_columns, columns, serialize, fmt, filename):
+    """
+    以分块传输流式导出查询的全部结果
+
+    说明:
+        查询使用 stream_results（服务端游标）+ yield_per 分批拉取，
+        行在生成器中逐块序列化输出，内存占用与结果总量无关；导出结束或客户端断开时关闭会话。
+
+    参数:
+        query: SQLAlchemy 查询对象
+        order_columns (list): 排序列
+        columns (list): [(字段名, 表头)]，决定输出的列及顺序
+        serialize (callable): 单行记录转 dict 的函数
+        fmt (str): csv / ndjson / xlsx
+        filename (str): 下载文件名（不含扩展名）
+
+    返回:
+        Response: 分块传输的下载响应
+    """
+    if not _export_slots.acquire(blocking=False):
+        raise BusinessError(
+            code=2301,
+            module="Export",
+            input_data={"format": fmt},
+            message="导出任务过多，请稍后重试"
+        )
+
+    chunk_size = Config.EXPORT_CHUNK_SIZE
+    db = query.session
+    writer = _WRITERS[fmt]
+
+    def generate():
+        try:
+            rows = (serialize(r) for r in query.order_by(*order_columns).execution_options(
+                stream_results=True
+            ).yield_per(chunk_size))
+            yield from writer(rows, columns, chunk_size)
+        except Exception as e:
+            # 响应头已发出，只能中断输出并记录日志
+            logger.error(f"导出 {filename}.{fmt} 失败: {e}")
+            raise
+        finally:
+            db.close()
+
+    def release():
+        # 响应关闭时释放（客户端未开始读取就断开时生成器不会执行 finally）
+        db.close()
+        _export_slots.release()
+
+    stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    headers = {"Content-Disposition": f"attachment; filename={filename}_{stamp}.{fmt}"}
+    response = Response(stream_with_context(generate()), mimetype=_MIMETYPES[fmt], headers=headers)
+    response.call_on_close(release)
+    return response
@@ -0,0 +1,324 @@
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from loguru import logger
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from app.config import Config
+from .errors import BusinessError
+
+def normalize_method(method):
+    """
+    将配置的加密方式补全为 werkzeug 写入哈希串的完整形式
+
+    说明:
+        "scrypt" 补全为 "scrypt:32768:8:1"，"pbkdf2" 补全为 "pbkdf2:sha256:<默认迭代次数>"，
+        与已存哈希串的前缀比较即可判断参数是否变化。
+    """
+    parts = method.split(":")
+    if parts[0] == "scrypt":
+        defaults = ["scrypt", "32768", "8", "1"]
+    elif parts[0] == "pbkdf2":
+        defaults = ["pbkdf2", "sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        raise ValueError(f"Unsupported password hash method: {method}")
+    if len(parts) > len(defaults):
+        raise ValueError(f"Invalid password hash method: {method}")
+    return ":".join(parts + defaults[len(parts):])
+
+def _run(op, args):
+    """
+    进程池中执行的加密/校验任务（模块级函数，便于子进程反序列化）
+
+    返回:
+        tuple: (结果, 错误信息, 开始时间戳, 计算耗时秒)；异常转为字符串返回，避免跨进程反序列化失败
+    """
+    started = time.time()
+    t0 = time.perf_counter()
+    try:
+        if op == "hash":
+            result = generate_password_hash(*args)
+        else:
+            result = check_password_hash(*args)
+        error = None
+    except Exception as e:
+        result = None
+        error = str(e)
+    return result, error, started, time.perf_counter() - t0
+
+class HashingService:
+    """
+    密码加密/校验服务
+
+    功能:
+        scrypt/pbkdf2 是纯 CPU 计算，在请求线程中执行会因 GIL 互相排队；
+        本服务把计算分发到进程池，请求线程只等待结果。同时统计排队等待与计算耗时，
+        并根据已存哈希串判断是否需要按当前参数重新加密。
+
+    参数:
+        method (str): werkzeug 加密方式，如 scrypt:32768:8:1、pbkdf2:sha256:600000
+        salt_length (int): 盐长度
+        workers (int): 进程数，0 表示 CPU 核数，1 表示在调用线程中直接计算；未调用 start 时同样直接计算
+        timeout (float): 等待单个任务结果的最长时间（秒）
+    """
+
+    def __init__(self, method="scrypt", salt_length=16, workers=0, timeout=10.0):
+        self.method = normalize_method(method)
+        self.salt_length = salt_length
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._atexit_registered = False
+        self._broken = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hash": 0,
+            "verify": 0,
+            "rehash": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "compute_total": 0.0,
+            "compute_max": 0.0
+        }
+
+    def start(self):
+        """
+        创建进程池并提交预热任务
+
+        说明:
+            应在主线程中、其他后台线程启动前调用，使子进程在单线程状态下 fork；workers 为 1 时不创建进程池。
+            不等待预热结果：在导入 app 包期间调用时，进程池的投递线程反序列化 _run 需要该包的导入锁，
+            等待会与主线程互相阻塞；预热任务在导入完成后自然执行。
+        """
+        if self.workers <= 1:
+            return
+        with self._pool_lock:
+            if self._pool is not None:
+                return
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+            for _ in range(self.workers):
+                self._pool.submit(_run, "verify", ("", ""))
+        logger.info(f"密码加密进程池已启动: {self.workers} 个进程，方式 {self.method}")
+
+    def shutdown(self):
+        """
+        关闭进程池
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def _discard_broken(self, pool):
+        """
+        丢弃已损坏的进程池，此后改为在调用线程中计算
+
+        说明:
+            不在请求线程中重建进程池：此时进程内已有多个线程，fork 并等待预热会阻塞请求，
+            进程池在下次重启服务时重新创建。
+        """
+        with self._pool_lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self._broken = True
+        logger.error("密码加密进程池已损坏，改为在调用线程中计算，重启服务后恢复")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, op, submitted, started, compute, error):
+        """
+        记录一个任务的排队等待与计算耗时
+        """
+        wait = max(0.0, started - submitted)
+        with self._stats_lock:
+            self._stats[op] += 1
+            self._stats["queue_wait_total"] += wait
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], wait)
+            self._stats["compute_total"] += compute
+            self._stats["compute_max"] = max(self._stats["compute_max"], compute)
+            if error is not None:
+                self._stats["errors"] += 1
+
+    def _execute(self, op, args):
+        """
+        执行一个任务并记录排队等待与计算耗时；进程池未创建或已损坏时在调用线程中计算
+        """
+        submitted = time.time()
+        with self._stats_lock:
+            self._stats["in_flight"] += 1
+        try:
+            pool = self._pool
+            if pool is None:
+                result, error, started, compute = _run(op, args)
+            else:
+                try:
+                    result, error, started, compute = pool.submit(_run, op, args).result(timeout=self.timeout)
+                except BrokenProcessPool:
+                    # 子进程异常退出后进程池不可再用，本次及以后的任务在调用线程中计算
+                    self._discard_broken(pool)
+                    submitted = time.time()
+                    result, error, started, compute = _run(op, args)
+        except FutureTimeoutError:
+            with self._stats_lock:
+                self._stats["errors"] += 1
+            raise BusinessError(
+                code=1006,
+                module="HashingService",
+                input_data={"op": op},
+                message=f"Password {op} timed out after {self.timeout}s"
+            )
+        except Exception:
+            with self._stats_lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self._stats["in_flight"] -= 1
+
+        self._record(op, submitted, started, compute, error)
+        return result, error
+
+    def hash_password(self, password):
+        """
+        按当前配置的方式对密码加盐加密
+        """
+        if not password:
+            raise BusinessError(
+                code=1001,
+                module="HashingService",
+                input_data=None,
+                message="Password cannot be empty"
+            )
+        result, error = self._execute("hash", (password, self.method, self.salt_length))
+        if error is not None:
+            raise BusinessError(
+                code=1001,
+                module="HashingService",
+                input_data=None,
+                message=f"Password hashing failed: {error}"
+            )
+        return result
+
+    def hash_passwords(self, passwords):
+        """
+        批量加密密码（导入等后台任务使用），按当前配置的方式加盐加密
+
+        说明:
+            数量较少或进程池不可用时在调用线程中计算，否则分块交给进程池并行计算。
+
+        参数:
+            passwords (list): 明文密码列表
+
+        返回:
+            list: 与输入顺序一致的哈希串列表
+        """
+        if not all(passwords):
+            raise BusinessError(
+                code=1001,
+                module="HashingService",
+                input_data=None,
+                message="Password cannot be empty"
+            )
+        args = [(password, self.method, self.salt_length) for password in passwords]
+        submitted = time.time()
+        pool = self._pool
+        outcomes = None
+        if pool is not None and len(args) >= 8:
+            chunksize = max(1, len(args) // (self.workers * 4))
+            try:
+                outcomes = list(pool.map(_run, ["hash"] * len(args), args, chunksize=chunksize))
+            except BrokenProcessPool:
+                self._discard_broken(pool)
+        if outcomes is None:
+            submitted = time.time()
+            outcomes = [_run("hash", arg) for arg in args]
+
+        hashed = []
+        for result, error, started, compute in outcomes:
+            self._record("hash", submitted, started, compute, error)
+            if error is not None:
+                raise BusinessError(
+                    code=1001,
+                    module="HashingService",
+                    input_data=None,
+                    message=f"Password hashing failed: {error}"
+                )
+            hashed.append(result)
+        return hashed
+
+    def verify_password(self, password, hashed_password):
+        """
+        校验密码是否与已存哈希一致
+        """
+        result, error = self._execute("verify", (hashed_password, password))
+        if error is not None:
+            raise BusinessError(
+                code=1002,
+                module="HashingService",
+                input_data=None,
+                message=f"Password verification failed: {error}"
+            )
+        return result
+
+    def needs_rehash(self, hashed_password):
+        """
+        判断已存哈希的加密方式或盐长度是否与当前配置不同
+        """
+        try:
+            method, salt, _ = hashed_password.split("$", 2)
+            return normalize_method(method) != self.method or len(salt) != self.salt_length
+        except ValueError:
+            return True
+
+    def rehash_if_needed(self, user, password):
+        """
+        登录校验通过后，参数已变化时按当前配置重新加密并写回用户对象（由调用方提交）
+
+        返回:
+            bool: 是否重新加密
+        """
+        if not self.needs_rehash(user.passwd):
+            return False
+        user.passwd = self.hash_password(password)
+        with self._stats_lock:
+            self._stats["rehash"] += 1
+        return True
+
+    def stats(self):
+        """
+        返回任务数与排队/计算耗时统计（毫秒），供监控使用
+        """
+        with self._stats_lock:
+            s = dict(self._stats)
+        done = s["hash"] + s["verify"]
+        return {
+            "method": self.method,
+            "workers": self.workers,
+            "mode": "process" if self._pool is not None else "inline",
+            "pool_broken": self._broken,
+            "hash": s["hash"],
+            "verify": s["verify"],
+            "rehash": s["rehash"],
+            "errors": s["errors"],
+            "in_flight": s["in_flight"],
+            "queue_wait_avg_ms": round(s["queue_wait_total"] / done * 1000, 2) if done else 0.0,
+            "queue_wait_max_ms": round(s["queue_wait_max"] * 1000, 2),
+            "compute_avg_ms": round(s["compute_total"] / done * 1000, 2) if done else 0.0,
+            "compute_max_ms": round(s["compute_max"] * 1000, 2)
+        }
+
+# 全局密码加密服务
+hashing_service = HashingService(
+    method=Config.PASSWORD_HASH_METHOD,
+    salt_length=Config.PASSWORD_SALT_LENGTH,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    timeout=Config.PASSWORD_HASH_TIMEOUT
+)
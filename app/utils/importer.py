@@ -0,0 +1,399 @@
+import csv
+import io
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, date
+import click
+from marshmallow import ValidationError, fields, validate
+from loguru import logger
+from app.config import Config
+from app.models import SessionLocal, User, Company, Project
+from app.schemas.user_schema import UserSchema
+from app.schemas.company_schema import CompanyCreateSchema
+from app.schemas.project_schema import ProjectCreateSchema
+from app.utils.batch import parse_date
+from app.utils.cache import user_cache
+from app.utils.errors import BusinessError
+from app.utils.hashing import hashing_service
+from app.utils.search import search_index
+from app.utils.result_cache import table_versions
+
+class UserImportSchema(UserSchema):
+    """
+    用户导入Schema
+
+    说明:
+        与注册接口的 UserSchema 相同，但密码为明文且可选：
+        新用户必须提供密码，已存在的用户不填密码时保留原密码。
+    """
+    password = fields.Str(required=False, validate=validate.Length(min=6))  # 明文密码
+
+
+def _user_row(data, operator, now):
+    """
+    用户导入数据转字段字典
+    """
+    row = {
+        "empcode": data["empcode"],
+        "empname": data["empname"],
+        "sex": data["sex"],
+        "admin": data["admin"],
+        "modifyuser": operator,
+        "modifydate": now
+    }
+    if data.get("mobile"):
+        row["mobile"] = data["mobile"]
+    return row
+
+def _company_row(data, operator, now):
+    """
+    公司导入数据转字段字典
+    """
+    row = {
+        "compcode": data["compcode"],
+        "compname": data["compname"],
+        "modifyuser": operator,
+        "modifydate": now
+    }
+    for key in ("compadd", "uscicode"):
+        if data.get(key):
+            row[key] = data[key]
+    return row
+
+def _project_row(data, operator, now):
+    """
+    项目导入数据转字段字典
+    """
+    row = {
+        "prjcode": data["prjcode"],
+        "prjname": data["prjname"],
+        "ownerid": data["ownerid"],
+        "sponsorid": data["sponsorid"],
+        "approvetime": parse_date(data["approvetime"]),
+        "expectedtime": parse_date(data["expectedtime"]),
+        "modifyuser": operator,
+        "modifydate": now
+    }
+    for key in ("desc", "goal"):
+        if data.get(key):
+            row[key] = data[key]
+    return row
+
+# 可导入的主数据：名称 -> (模型, 业务编码字段, 主键字段, 校验Schema, 行转换函数)
+IMPORT_TARGETS = {
+    "users": (User, "empcode", "empid", UserImportSchema, _user_row),
+    "companies": (Company, "compcode", "compid", CompanyCreateSchema, _company_row),
+    "projects": (Project, "prjcode", "prjid", ProjectCreateSchema, _project_row)
+}
+
+def _cell_to_str(value):
+    """
+    Excel 单元格值统一转为字符串，交给 Schema 按字段类型解析
+    """
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def iter_csv(stream):
+    """
+    逐行读取 CSV（首行为表头），空单元格视为未填写
+    """
+    if isinstance(stream, (bytes, bytearray)):
+        stream = io.BytesIO(stream)
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for record in csv.DictReader(stream):
+        yield {k.strip(): v.strip() for k, v in record.items() if k and v is not None and v.strip() != ""}
+
+def iter_xlsx(stream):
+    """
+    以只读模式逐行读取 XLSX 第一个工作表（首行为表头），内存占用与行数无关
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise BusinessError(
+            code=2201,
+            module="Importer",
+            input_data=None,
+            message="导入 XLSX 需要安装 openpyxl"
+        )
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        header = [str(h).strip() if h is not None else None for h in header]
+        for values in rows:
+            record = {}
+            for key, value in zip(header, values):
+                if key and value is not None and _cell_to_str(value) != "":
+                    record[key] = _cell_to_str(value)
+            if record:
+                yield record
+    finally:
+        workbook.close()
+
+def iter_rows(stream, filename):
+    """
+    按文件扩展名选择 CSV 或 XLSX 读取器
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension == ".csv":
+        return iter_csv(stream)
+    if extension in (".xlsx", ".xlsm"):
+        return iter_xlsx(stream)
+    raise BusinessError(
+        code=2202,
+        module="Importer",
+        input_data={"filename": filename},
+        message="仅支持 .csv 与 .xlsx 文件"
+    )
+
+class ImportReport:
+    """
+    导入进度与结果
+
+    参数:
+        target (str): 导入的主数据名称
+        max_errors (int): 最多保留的错误明细条数
+    """
+
+    def __init__(self, target, max_errors=100):
+        self.target = target
+        self.max_errors = max_errors
+        self.status = "running"
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.message = None
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    def add_error(self, line, errors):
+        """
+        记录失败行，line 为文件中的行号（含表头）
+        """
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "errors": errors})
+
+    def to_dict(self):
+        """
+        返回进度字典，供接口与命令行输出
+        """
+        end = self.finished_at or time.monotonic()
+        return {
+            "target": self.target,
+            "status": self.status,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "elapsed": round(end - self.started_at, 3),
+            "message": self.message,
+            "errors": self.errors
+        }
+
+class Importer:
+    """
+    主数据分块导入器
+
+    功能:
+        逐行读取 CSV/XLSX，使用接口同款 Schema 校验，按 chunk_size 分块：
+        一次 IN 查询取出已存在的业务编码，新记录 bulk_insert_mappings、已有记录
+        bulk_update_mappings（按业务编码 upsert），每块提交一次；
+        用户密码交给 hashing_service 的进程池并行加盐加密。同一文件中重复的业务编码按行合并，后出现的非空字段生效。
+
+    参数:
+        target (str): users / companies / projects
+        operator (int): 操作人内码，写入 createuser / modifyuser
+        chunk_size (int): 每块行数
+        progress (callable): 每块完成后回调，参数为 ImportReport
+    """
+
+    def __init__(self, target, operator, chunk_size=None, progress=None):
+        if target not in IMPORT_TARGETS:
+            raise BusinessError(
+                code=2203,
+                module="Importer",
+                input_data={"target": target},
+                message=f"不支持的导入对象: {target}"
+            )
+        self.target = target
+        self.model, self.key, self.pk, schema_class, self.to_row = IMPORT_TARGETS[target]
+        self.schema = schema_class()
+        self.operator = operator
+        self.chunk_size = chunk_size or Config.IMPORT_CHUNK_SIZE
+        self.progress = progress
+        self.report = ImportReport(target, Config.IMPORT_MAX_ERRORS)
+
+    def run(self, rows):
+        """
+        执行导入，返回 ImportReport
+        """
+        chunk = []
+        try:
+            # 行号从 2 开始（第 1 行为表头）
+            for line, record in enumerate(rows, start=2):
+                chunk.append((line, record))
+                if len(chunk) >= self.chunk_size:
+                    self._process_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._process_chunk(chunk)
+            self.report.status = "finished"
+        except BusinessError as e:
+            self.report.status = "failed"
+            self.report.message = e.message
+        except Exception as e:
+            logger.error(f"{self.target} 导入失败: {e}")
+            self.report.status = "failed"
+            self.report.message = str(e)
+        finally:
+            self.report.finished_at = time.monotonic()
+        logger.info(f"{self.target} 导入结束: 状态 {self.report.status}，处理 {self.report.processed} 行，"
+                    f"新增 {self.report.inserted}，更新 {self.report.updated}，失败 {self.report.failed}")
+        return self.report
+
+    def _process_chunk(self, chunk):
+        """
+        校验并 upsert 一块数据，整块在一个事务内提交
+        """
+        # 校验；同一块内重复编码逐行合并，后出现的非空字段覆盖前面的
+        valid = OrderedDict()
+        for line, record in chunk:
+            try:
+                data = self.schema.load(record)
+            except ValidationError as e:
+                self.report.add_error(line, e.messages)
+                continue
+            previous = valid.pop(data[self.key], None)
+            if previous is not None:
+                data = dict(previous[1], **data)
+            valid[data[self.key]] = (line, data)
+
+        if valid:
+            self._upsert(valid)
+        self.report.processed += len(chunk)
+        if self.progress:
+            self.progress(self.report)
+
+    def _upsert(self, valid):
+        """
+        按业务编码新增或更新一块已校验的数据
+        """
+        model, key_column, pk_column = self.model, getattr(self.model, self.key), getattr(self.model, self.pk)
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            existing = dict(db.query(key_column, pk_column).filter(key_column.in_(list(valid.keys()))).all())
+
+            inserts, updates = [], []
+            password_rows, passwords = [], []
+            for code, (line, data) in valid.items():
+                row = self.to_row(data, self.operator, now)
+                if code in existing:
+                    row[self.pk] = existing[code]
+                    updates.append(row)
+                else:
+                    if self.target == "users" and not data.get("password"):
+                        self.report.add_error(line, {"password": ["新用户必须提供密码"]})
+                        continue
+                    row.update(createuser=self.operator, createdate=now, status=0)
+                    inserts.append(row)
+                if data.get("password"):
+                    password_rows.append(row)
+                    passwords.append(data["password"])
+
+            for row, hashed in zip(password_rows, hashing_service.hash_passwords(passwords)):
+                row["passwd"] = hashed
+
+            if inserts:
+                db.bulk_insert_mappings(model, inserts)
+            if updates:
+                db.bulk_update_mappings(model, updates)
+            if inserts or updates:
+                # 批量写入不触发会话事件，按业务编码同步全文索引，并标记表已写入
+                codes = [row[self.key] for row in inserts + updates]
+                search_index.refresh(db, model, key_column.in_(codes))
+                table_versions.touch(db, model)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if self.target == "users":
+            for row in updates:
+                user_cache.invalidate(row[self.pk])
+        self.report.inserted += len(inserts)
+        self.report.updated += len(updates)
+
+# 后台导入任务：job_id -> ImportReport，只保留最近的任务
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+_MAX_JOBS = 50
+
+def start_import_job(target, operator, path, filename):
+    """
+    在后台线程中导入已上传的文件，返回任务id；导入完成后删除临时文件
+    """
+    importer = Importer(target, operator)
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = importer.report
+        while len(_jobs) > _MAX_JOBS:
+            _jobs.popitem(last=False)
+
+    def run():
+        try:
+            with open(path, "rb") as f:
+                importer.run(iter_rows(f, filename))
+        finally:
+            os.remove(path)
+
+    threading.Thread(target=run, name=f"import-{job_id[:8]}", daemon=True).start()
+    return job_id
+
+def get_import_job(job_id):
+    """
+    查询后台导入任务的进度，任务不存在时返回 None
+    """
+    with _jobs_lock:
+        report = _jobs.get(job_id)
+    return report.to_dict() if report else None
+
+@click.command("import-data")
+@click.argument("target", type=click.Choice(sorted(IMPORT_TARGETS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--operator", default=0, show_default=True, help="操作人内码，写入创建人/修改人")
+@click.option("--chunk-size", default=None, type=int, help="每块行数，默认取 conf.ini [import] chunk_size")
+def import_data_command(target, path, operator, chunk_size):
+    """
+    从 CSV/XLSX 导入主数据（users / companies / projects），按业务编码新增或更新
+    """
+    def progress(report):
+        click.echo(f"\r已处理 {report.processed} 行，新增 {report.inserted}，更新 {report.updated}，失败 {report.failed}", nl=False)
+
+    importer = Importer(target, operator, chunk_size=chunk_size, progress=progress)
+    with open(path, "rb") as f:
+        report = importer.run(iter_rows(f, path)).to_dict()
+    click.echo()
+    for error in report["errors"]:
+        click.echo(f"第 {error['line']} 行: {error['errors']}")
+    click.echo(f"{report['status']}: 新增 {report['inserted']}，更新 {report['updated']}，"
+               f"失败 {report['failed']}，耗时 {report['elapsed']} 秒")
+    if report["message"]:
+        click.echo(report["message"])
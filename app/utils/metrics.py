@@ -0,0 +1,267 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from flask import request, g
+from sqlalchemy import event
+from loguru import logger
+from app.config import Config
+
+# 请求耗时直方图的桶上界（秒），与 Prometheus 客户端默认值一致
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# 当前请求的 SQL 统计；后台线程中为空，计入 background
+_request_sql = contextvars.ContextVar("request_sql", default=None)
+
+class SqlCollector:
+    """
+    单个请求内的 SQL 执行次数、耗时与语句明细（明细仅在开启慢请求日志时保留）
+    """
+
+    def __init__(self, keep_statements=0):
+        self.count = 0
+        self.seconds = 0.0
+        self.keep_statements = keep_statements
+        self.statements = []
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if len(self.statements) < self.keep_statements:
+            self.statements.append((seconds, statement))
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    collector = _request_sql.get()
+    if collector is not None:
+        collector.add(statement, elapsed)
+    else:
+        request_metrics.record_background_sql(elapsed)
+
+def _handle_error(exception_context):
+    # 执行失败时 after_cursor_execute 不会触发，弹出对应的开始时间
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+def instrument_engine(db_engine):
+    """
+    在数据库引擎上注册 SQL 计时监听
+    """
+    event.listen(db_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(db_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(db_engine, "handle_error", _handle_error)
+
+def _escape(value):
+    """
+    转义 Prometheus 标签值
+    """
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+class RequestMetrics:
+    """
+    请求指标汇总
+
+    功能:
+        按 (方法, 路由模板) 汇总请求数（按状态码）、耗时直方图、SQL 条数与耗时、响应字节数，
+        以 Prometheus 文本格式输出；耗时超过阈值的请求连同其 SQL 写入日志。
+
+    参数:
+        slow_request_ms (float): 慢请求阈值（毫秒），0 表示不记录
+        slow_sql_statements (int): 慢请求日志中最多列出的 SQL 条数
+    """
+
+    def __init__(self, slow_request_ms=1000, slow_sql_statements=20):
+        self.slow_request_ms = slow_request_ms
+        self.slow_sql_statements = slow_sql_statements
+        self._lock = threading.Lock()
+        self._requests = {}  # (方法, 路由, 状态码) -> 次数
+        self._routes = {}  # (方法, 路由) -> 汇总字典
+        self._background_sql = [0, 0.0]
+        self._in_progress = 0
+        self._collectors = []  # (组件名, 返回统计字典的函数)
+
+    def register_collector(self, name, func):
+        """
+        注册组件统计（缓存、加密进程池等），输出为 prjeventsys_component_stat 仪表，
+        并由运行监控的 component_stats 接口返回
+        """
+        self._collectors.append((name, func))
+
+    def collect(self, name=None):
+        """
+        读取已注册组件的统计
+
+        参数:
+            name (str): 只读取该组件，为空时读取全部
+
+        返回:
+            dict: 组件名 -> 统计字典或列表，读取失败的组件为 {"error": 错误信息}
+        """
+        result = {}
+        for component, func in self._collectors:
+            if name and component != name:
+                continue
+            try:
+                result[component] = func()
+            except Exception as e:
+                logger.error(f"读取 {component} 统计失败: {e}")
+                result[component] = {"error": "读取统计失败"}
+        return result
+
+    def record_background_sql(self, seconds):
+        with self._lock:
+            self._background_sql[0] += 1
+            self._background_sql[1] += seconds
+
+    def before_request(self):
+        g._metrics_started = time.perf_counter()
+        g._metrics_sql_token = _request_sql.set(SqlCollector(self.slow_sql_statements if self.slow_request_ms else 0))
+        with self._lock:
+            self._in_progress += 1
+
+    def after_request(self, response):
+        started = g.pop("_metrics_started", None)
+        token = g.pop("_metrics_sql_token", None)
+        if started is None or token is None:
+            return response
+        elapsed = time.perf_counter() - started
+        collector = _request_sql.get()
+        _request_sql.reset(token)
+
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        size = response.content_length or 0
+        with self._lock:
+            self._in_progress -= 1
+            key = (request.method, route, response.status_code)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            stats = self._routes.get((request.method, route))
+            if stats is None:
+                stats = self._routes[(request.method, route)] = {
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                    "count": 0,
+                    "seconds": 0.0,
+                    "sql_count": 0,
+                    "sql_seconds": 0.0,
+                    "response_bytes": 0
+                }
+            index = bisect_left(LATENCY_BUCKETS, elapsed)
+            if index < len(LATENCY_BUCKETS):
+                stats["buckets"][index] += 1
+            stats["count"] += 1
+            stats["seconds"] += elapsed
+            stats["sql_count"] += collector.count
+            stats["sql_seconds"] += collector.seconds
+            stats["response_bytes"] += size
+
+        if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+            statements = "\n".join(f"  [{seconds * 1000:.1f}ms] {statement}"
+                                   for seconds, statement in collector.statements)
+            logger.warning(
+                f"慢请求 {request.method} {request.path} {response.status_code}: {elapsed * 1000:.1f}ms，"
+                f"SQL {collector.count} 条共 {collector.seconds * 1000:.1f}ms\n{statements}"
+            )
+        return response
+
+    def teardown_request(self, exception=None):
+        """
+        其他 after_request 钩子出错等导致本钩子未执行时，在此恢复上下文并补偿进行中计数
+        """
+        token = g.pop("_metrics_sql_token", None)
+        if token is not None:
+            _request_sql.reset(token)
+            g.pop("_metrics_started", None)
+            with self._lock:
+                self._in_progress -= 1
+
+    def init_app(self, app):
+        """
+        注册请求钩子
+        """
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+    def render(self):
+        """
+        以 Prometheus 文本格式输出全部指标
+        """
+        with self._lock:
+            requests = dict(self._requests)
+            routes = {key: dict(stats, buckets=list(stats["buckets"])) for key, stats in self._routes.items()}
+            background_sql = list(self._background_sql)
+            in_progress = self._in_progress
+
+        lines = [
+            "# HELP prjeventsys_http_requests_total HTTP requests by method, route and status.",
+            "# TYPE prjeventsys_http_requests_total counter"
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f"prjeventsys_http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        lines += [
+            "# HELP prjeventsys_http_request_duration_seconds Time until the response headers are ready.",
+            "# TYPE prjeventsys_http_request_duration_seconds histogram"
+        ]
+        for (method, route), stats in sorted(routes.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats["buckets"]):
+                cumulative += count
+                lines.append(f"prjeventsys_http_request_duration_seconds_bucket"
+                             f"{_labels(method=method, route=route, le=bound)} {cumulative}")
+            lines.append(f"prjeventsys_http_request_duration_seconds_bucket"
+                         f"{_labels(method=method, route=route, le='+Inf')} {stats['count']}")
+            lines.append(f"prjeventsys_http_request_duration_seconds_sum{_labels(method=method, route=route)} {stats['seconds']:.6f}")
+            lines.append(f"prjeventsys_http_request_duration_seconds_count{_labels(method=method, route=route)} {stats['count']}")
+
+        for name, field, help_text in (
+            ("prjeventsys_http_sql_queries_total", "sql_count", "SQL statements executed while handling requests."),
+            ("prjeventsys_http_sql_seconds_total", "sql_seconds", "Time spent in SQL while handling requests."),
+            ("prjeventsys_http_response_bytes_total", "response_bytes", "Response body bytes (streamed responses count as 0).")
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for (method, route), stats in sorted(routes.items()):
+                value = stats[field]
+                lines.append(f"{name}{_labels(method=method, route=route)} {value:.6f}" if isinstance(value, float)
+                             else f"{name}{_labels(method=method, route=route)} {value}")
+
+        lines += [
+            "# HELP prjeventsys_background_sql_queries_total SQL statements executed outside requests.",
+            "# TYPE prjeventsys_background_sql_queries_total counter",
+            f"prjeventsys_background_sql_queries_total {background_sql[0]}",
+            "# HELP prjeventsys_background_sql_seconds_total Time spent in SQL outside requests.",
+            "# TYPE prjeventsys_background_sql_seconds_total counter",
+            f"prjeventsys_background_sql_seconds_total {background_sql[1]:.6f}",
+            "# HELP prjeventsys_http_requests_in_progress Requests currently being handled.",
+            "# TYPE prjeventsys_http_requests_in_progress gauge",
+            f"prjeventsys_http_requests_in_progress {in_progress}",
+            "# HELP prjeventsys_component_stat Numeric statistics of caches, pools and other components.",
+            "# TYPE prjeventsys_component_stat gauge"
+        ]
+        for component, func in self._collectors:
+            try:
+                stats = func()
+            except Exception as e:
+                logger.error(f"读取 {component} 统计失败: {e}")
+                continue
+            for item in stats if isinstance(stats, list) else [stats]:
+                name = item.get("name", component)
+                for stat, value in item.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        lines.append(f"prjeventsys_component_stat{_labels(component=name, stat=stat)} {value}")
+        return "\n".join(lines) + "\n"
+
+# 全局请求指标
+request_metrics = RequestMetrics(
+    slow_request_ms=Config.METRICS_SLOW_REQUEST_MS,
+    slow_sql_statements=Config.METRICS_SLOW_SQL_STATEMENTS
+)
@@ -0,0 +1,76 @@
+from sqlalchemy import inspect, text
+from loguru import logger
+
+def add_missing_columns(engine, metadata):
+    """
+    为 create_all 建出的旧表补齐模型中新增的列
+
+    说明:
+        create_all 只创建缺失的表，不会修改已存在的表。这里对比模型与数据库，
+        对缺失且可空（或带服务端默认值）的列执行 ALTER TABLE ADD COLUMN；
+        缺失的非空且无默认值的列无法自动补齐，只记录告警。
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.warning(f"表 {table.name} 缺少非空列 {column.name}，无法自动补齐")
+                continue
+
+            ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} " \
+                  f"{column.type.compile(dialect=engine.dialect)}"
+            if column.server_default is not None:
+                default = column.server_default.arg
+                if isinstance(default, str):
+                    default = f"'{default}'"
+                else:
+                    default = str(default.compile(dialect=engine.dialect))
+                ddl += f" DEFAULT {default}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(ddl))
+                logger.info(f"表 {table.name} 已补齐列 {column.name}")
+            except Exception as e:
+                logger.warning(f"表 {table.name} 补齐列 {column.name} 失败: {e}")
+
+def create_missing_indexes(engine, metadata):
+    """
+    为 create_all 建出的旧表补建模型中声明的索引
+
+    说明:
+        唯一索引在存量数据存在重复业务编码时会创建失败，此时只记录告警，
+        需人工清理重复数据后重启补建。
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            try:
+                index.create(bind=engine)
+                logger.info(f"表 {table.name} 已创建索引 {index.name}")
+            except Exception as e:
+                logger.warning(f"表 {table.name} 创建索引 {index.name} 失败: {e}")
+
+def upgrade_schema(engine, metadata):
+    """
+    启动时执行的数据库结构升级入口
+    """
+    add_missing_columns(engine, metadata)
+    create_missing_indexes(engine, metadata)
@@ -0,0 +1,307 @@
+import string
+import threading
+import time
+from sqlalchemy import Column, Index, Integer, MetaData, Table, Text, and_, func, inspect, select, text
+from loguru import logger
+from app.config import Config
+from app.models import engine as default_engine, User, Company, Project
+
+# 建立索引的名称列：(模型, 列名) -> 倒排表中的列编号；编号已写入数据库，不可更改或复用
+INDEXED_COLUMNS = {
+    (User, "empname"): 1,
+    (Company, "compcode"): 2,
+    (Company, "compname"): 3,
+    (Company, "compadd"): 4,
+    (Project, "prjname"): 5
+}
+# 单个取值参与索引的最大字符数，超出部分的二元组不入索引
+MAX_VALUE_LENGTH = 1024
+# 从最少的二元组出发逐行确认时最多扫描的行数，超出时索引不比直接 ilike 快
+_DRIVER_LIMIT = 50000
+# 回填时每个事务处理的业务主键区间长度，控制单次持有写锁的时间
+_BUILD_CHUNK = 2000
+
+_metadata = MetaData()
+# 二元组倒排表：(列编号, 二元组) -> 主键；无 rowid 表按主键聚簇，取某二元组的主键只需一次范围扫描
+_GRAMS = Table(
+    "TBUSNGRAM", _metadata,
+    Column("colid", Integer, primary_key=True),  # INDEXED_COLUMNS 中的列编号
+    Column("gram", Text, primary_key=True),  # 小写后的相邻两字
+    Column("docid", Integer, primary_key=True),  # 业务表主键
+    Index("IX_TBUSNGRAM_DOC", "colid", "docid"),  # 触发器按业务主键删除旧二元组
+    sqlite_with_rowid=False
+)
+# 序号表 1..MAX_VALUE_LENGTH，触发器中以连接代替循环切分二元组（SQLite 触发器不支持 WITH）
+_SEQ = Table("TBUSNGRAMSEQ", _metadata, Column("n", Integer, primary_key=True))
+# 回填进度：列编号 -> 已回填到的业务主键，回填完成后删除该行；重启后从断点继续
+_BUILDS = Table(
+    "TBUSNGRAMBUILD", _metadata,
+    Column("colid", Integer, primary_key=True),
+    Column("donepk", Integer, nullable=False)
+)
+# SQLite 的 lower() 与 LIKE 只对 ASCII 字母做大小写折叠，查询端按相同规则切分
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def bigrams(value):
+    """
+    按 SQLite lower() 的规则转小写后按相邻两字切分，如 "华东分公司" -> {华东, 东分, 分公, 公司}
+    """
+    value = value.translate(_ASCII_LOWER)
+    return {value[i:i + 2] for i in range(len(value) - 1)}
+
+class NgramIndexer:
+    """
+    名称列模糊查询加速
+
+    功能:
+        为用户名、公司编码/名称/地址、项目名维护二元组倒排表 TBUSNGRAM，将 ilike('%x%') 的全表扫描
+        改写为“主键 IN 候选集 且 ilike”，最终匹配仍由数据库完成，结果与原查询一致。
+
+    说明:
+        倒排表由业务表上的 INSERT/UPDATE/DELETE 触发器维护，与业务数据在同一事务内提交或回滚，
+        ORM、批量写入、原生 SQL 以及其他进程的写入都会同步，无需会话事件或定期重建。
+        首次启用时先创建触发器，再在后台线程中按主键区间分批回填存量数据，每批单独提交，
+        回填与并发写入重叠的行以 INSERT OR IGNORE 去重；回填完成前该列直接 ilike。
+        触发器语法依赖 SQLite，其他数据库不启用索引；关闭时删除触发器与倒排数据。
+
+    参数:
+        min_length (int): 关键字达到该长度才使用索引，不足时直接 ilike
+        max_candidates (int): 候选行超过该数量时索引区分度不足，直接 ilike
+        enabled (bool): 为 False 时始终直接 ilike
+    """
+
+    def __init__(self, min_length=2, max_candidates=2000, enabled=True):
+        self.min_length = max(min_length, 2)
+        self.max_candidates = max_candidates
+        self.enabled = enabled
+        self._engine = None
+        self._ready = set()  # 倒排数据与触发器已就绪的列编号
+        self._lock = threading.Lock()
+        self.narrowed = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def _pk(model):
+        return inspect(model).primary_key[0]
+
+    def start(self, db_engine=default_engine):
+        """
+        建立倒排表；已有触发器的列直接可用，其余列在后台线程中回填
+        """
+        if self._engine is not None:
+            return
+        if db_engine.dialect.name != "sqlite":
+            if self.enabled:
+                logger.info(f"名称二元组索引依赖 SQLite 触发器，{db_engine.dialect.name} 下模糊查询直接 ilike")
+            return
+        self._engine = db_engine
+        if not self.enabled:
+            self._drop()
+            return
+
+        with db_engine.begin() as conn:
+            _metadata.create_all(conn)
+            if conn.execute(select(_SEQ.c.n).where(_SEQ.c.n == MAX_VALUE_LENGTH)).first() is None:
+                conn.execute(_SEQ.delete())
+                conn.execute(_SEQ.insert(), [{"n": n} for n in range(1, MAX_VALUE_LENGTH + 1)])
+            triggers = self._triggers(conn)
+            building = {row[0] for row in conn.execute(select(_BUILDS.c.colid))}
+
+        pending = []
+        for (model, column), colid in INDEXED_COLUMNS.items():
+            if self._trigger_names(model, column)[0] in triggers and colid not in building:
+                self._ready.add(colid)
+            else:
+                pending.append((model, column))
+        if pending:
+            threading.Thread(target=self._build_loop, args=(pending,), name="ngram-index", daemon=True).start()
+
+    @staticmethod
+    def _triggers(conn):
+        return {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+
+    @staticmethod
+    def _trigger_names(model, column):
+        prefix = f"TR_NGRAM_{model.__tablename__}_{column}".upper()
+        return prefix + "_I", prefix + "_U", prefix + "_D"
+
+    def _trigger_ddl(self, model, column):
+        """
+        生成维护一列倒排数据的插入、修改、删除触发器
+        """
+        table, pk = model.__tablename__, self._pk(model).name
+        colid = INDEXED_COLUMNS[(model, column)]
+        insert_name, update_name, delete_name = self._trigger_names(model, column)
+        insert_grams = (
+            f"INSERT INTO {_GRAMS.name} (colid, gram, docid) "
+            f"SELECT DISTINCT {colid}, lower(substr(NEW.{column}, n, 2)), NEW.{pk} "
+            f"FROM {_SEQ.name} WHERE n < length(NEW.{column});"
+        )
+        delete_grams = f"DELETE FROM {_GRAMS.name} WHERE colid = {colid} AND docid = OLD.{pk};"
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS {insert_name} AFTER INSERT ON {table} "
+            f"BEGIN {insert_grams} END",
+            f"CREATE TRIGGER IF NOT EXISTS {update_name} AFTER UPDATE OF {column}, {pk} ON {table} "
+            f"WHEN OLD.{column} IS NOT NEW.{column} OR OLD.{pk} IS NOT NEW.{pk} "
+            f"BEGIN {delete_grams} {insert_grams} END",
+            f"CREATE TRIGGER IF NOT EXISTS {delete_name} AFTER DELETE ON {table} "
+            f"BEGIN {delete_grams} END"
+        ]
+
+    def _prepare(self, model, column):
+        """
+        清空一列的倒排数据、创建触发器并登记回填进度，此后的写入由触发器同步
+
+        说明:
+            先执行写语句取得写锁，再确认其他进程没有抢先创建；已创建时沿用其回填进度。
+        """
+        colid = INDEXED_COLUMNS[(model, column)]
+        with self._engine.connect() as conn:
+            with conn.begin() as transaction:
+                conn.execute(_GRAMS.delete().where(_GRAMS.c.colid == colid))
+                if self._trigger_names(model, column)[0] in self._triggers(conn):
+                    transaction.rollback()
+                    return
+                for ddl in self._trigger_ddl(model, column):
+                    conn.execute(text(ddl))
+                conn.execute(_BUILDS.delete().where(_BUILDS.c.colid == colid))
+                conn.execute(_BUILDS.insert().values(colid=colid, donepk=0))
+
+    def _build(self, model, column):
+        """
+        按主键区间分批回填一列的存量数据，每批一个事务并推进回填进度
+
+        返回:
+            int: 本次回填的二元组条数
+        """
+        self._prepare(model, column)
+        table, pk = model.__tablename__, self._pk(model)
+        colid = INDEXED_COLUMNS[(model, column)]
+        with self._engine.connect() as conn:
+            with conn.begin():
+                done = conn.execute(select(_BUILDS.c.donepk).where(_BUILDS.c.colid == colid)).scalar()
+                # 之后插入的行由触发器写入，只需回填到当前最大主键
+                top = conn.execute(select(func.max(pk))).scalar() or 0
+            count = 0
+            while done is not None and done < top:
+                end = min(done + _BUILD_CHUNK, top)
+                with conn.begin():
+                    count += conn.execute(text(
+                        f"INSERT OR IGNORE INTO {_GRAMS.name} (colid, gram, docid) "
+                        f"SELECT DISTINCT {colid}, lower(substr(t.{column}, s.n, 2)), t.{pk.name} "
+                        f"FROM {table} t JOIN {_SEQ.name} s ON s.n < length(t.{column}) "
+                        f"WHERE t.{pk.name} > :done AND t.{pk.name} <= :end"
+                    ), {"done": done, "end": end}).rowcount
+                    conn.execute(_BUILDS.update().where(_BUILDS.c.colid == colid).values(donepk=end))
+                done = end
+            with conn.begin():
+                conn.execute(_BUILDS.delete().where(_BUILDS.c.colid == colid))
+        return count
+
+    def _build_loop(self, pending):
+        """
+        后台线程：逐列回填倒排数据并创建触发器，异常只记录日志
+        """
+        for model, column in pending:
+            name = f"{model.__tablename__}.{column}"
+            started = time.perf_counter()
+            try:
+                count = self._build(model, column)
+                logger.info(f"名称二元组索引 {name} 已建立: 回填 {count} 条，耗时 {time.perf_counter() - started:.1f}s")
+                with self._lock:
+                    self._ready.add(INDEXED_COLUMNS[(model, column)])
+            except Exception as e:
+                logger.error(f"建立名称二元组索引 {name} 失败: {e}")
+
+    def _drop(self):
+        """
+        关闭索引时删除触发器与倒排数据，避免写入继续承担维护开销
+        """
+        with self._engine.begin() as conn:
+            triggers = self._triggers(conn)
+            for model, column in INDEXED_COLUMNS:
+                for name in self._trigger_names(model, column):
+                    if name in triggers:
+                        conn.execute(text(f"DROP TRIGGER {name}"))
+            _metadata.drop_all(conn, checkfirst=True)
+
+    def _candidates(self, db, colid, grams):
+        """
+        返回同时包含全部二元组的主键，最多 max_candidates + 1 个；各二元组都过于常见时返回 None
+
+        说明:
+            先以有上限的计数估计各二元组的行数，从最少的二元组出发逐行按主键确认其余二元组，
+            取满上限即停止，避免对高频二元组（如编码中的 "00"）做整段求交。
+        """
+        counts = [select(func.count()).select_from(
+            select(_GRAMS.c.docid).where(_GRAMS.c.colid == colid, _GRAMS.c.gram == gram)
+            .limit(_DRIVER_LIMIT).subquery()
+        ).scalar_subquery() for gram in grams]
+        count, driver_gram = min(zip(db.execute(select(*counts)).one(), grams))
+        if count >= _DRIVER_LIMIT:
+            return None
+
+        driver = _GRAMS.alias("g")
+        query = select(driver.c.docid).where(driver.c.colid == colid, driver.c.gram == driver_gram)
+        for gram in grams:
+            if gram == driver_gram:
+                continue
+            other = _GRAMS.alias()
+            query = query.where(select(other.c.docid).where(
+                other.c.colid == colid, other.c.gram == gram, other.c.docid == driver.c.docid
+            ).exists())
+        return [row[0] for row in db.execute(query.limit(self.max_candidates + 1))]
+
+    def contains(self, db, column, value):
+        """
+        返回“column 包含 value”的过滤条件，可用索引时先按候选主键收窄
+
+        参数:
+            db: 数据库会话
+            column: 模型列，如 Project.prjname
+            value (str): 查询关键字
+
+        返回:
+            过滤条件，语义与 column.ilike('%value%') 相同
+        """
+        condition = column.ilike(f"%{value}%")
+        model = column.class_
+        # 含 LIKE 通配符的关键字按原语义交给数据库处理
+        if len(value) < self.min_length or "%" in value or "_" in value:
+            return condition
+        colid = INDEXED_COLUMNS.get((model, column.key))
+        with self._lock:
+            ready = colid in self._ready
+        if not ready:
+            return condition
+
+        candidates = self._candidates(db, colid, sorted(bigrams(value)))
+        if candidates is None or len(candidates) > self.max_candidates:
+            self.fallbacks += 1
+            return condition
+        self.narrowed += 1
+        return and_(self._pk(model).in_(candidates), condition)
+
+    def stats(self):
+        """
+        返回收窄与回退次数及各列索引是否就绪，供监控使用
+        """
+        with self._lock:
+            ready = set(self._ready)
+        columns = [{
+            "name": f"ngram:{model.__tablename__}.{column}",
+            "ready": colid in ready
+        } for (model, column), colid in INDEXED_COLUMNS.items()]
+        return [{
+            "name": "ngram",
+            "enabled": self.enabled and self._engine is not None,
+            "narrowed": self.narrowed,
+            "fallbacks": self.fallbacks
+        }] + columns
+
+# 全局名称二元组索引
+ngram_index = NgramIndexer(
+    min_length=Config.NGRAM_MIN_LENGTH,
+    max_candidates=Config.NGRAM_MAX_CANDIDATES,
+    enabled=Config.NGRAM_ENABLED
+)
@@ -0,0 +1,156 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import Response, jsonify, stream_with_context
+from sqlalchemy import and_, or_
+from loguru import logger
+from app.config import Config
+from .errors import BusinessError
+
+def encode_cursor(values):
+    """
+    将排序键的取值编码为游标字符串
+
+    参数:
+        values (list): 最后一行记录在各排序列上的取值
+
+    返回:
+        str: URL 安全的 Base64 游标
+    """
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor, order_columns):
+    """
+    解析游标字符串，并按排序列的类型还原取值
+
+    参数:
+        cursor (str): encode_cursor 生成的游标
+        order_columns (list): 排序列（与生成游标时一致）
+
+    返回:
+        list: 各排序列的取值
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(order_columns):
+            raise ValueError("cursor length mismatch")
+
+        decoded = []
+        for column, value in zip(order_columns, values):
+            python_type = column.type.python_type
+            if value is not None and python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif value is not None and python_type is date:
+                value = date.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+    except Exception as e:
+        raise BusinessError(
+            code=2001,
+            module="Pagination",
+            input_data={"cursor": cursor},
+            message=f"Invalid cursor: {str(e)}"
+        )
+
+def _keyset_filter(order_columns, values):
+    """
+    构造 (c1, c2, ...) > (v1, v2, ...) 的展开条件，便于走复合索引
+    """
+    conditions = []
+    for i, column in enumerate(order_columns):
+        equals = [order_columns[j] == values[j] for j in range(i)]
+        conditions.append(and_(*equals, column > values[i]))
+    return or_(*conditions)
+
+def keyset_paginate(query, order_columns, limit, cursor=None):
+    """
+    基于排序列 + 主键的游标（keyset）分页
+
+    参数:
+        query: SQLAlchemy 查询对象
+        order_columns (list): 排序列，最后一列必须唯一（通常为主键）
+        limit (int): 每页条数
+        cursor (str): 上一页返回的游标，首页为 None
+
+    返回:
+        tuple: (当前页记录列表, 下一页游标，无更多数据时为 None)
+    """
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        query = query.filter(_keyset_filter(order_columns, values))
+
+    # 多取一条用于判断是否还有下一页
+    rows = query.order_by(*order_columns).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor([getattr(last, column.key) for column in order_columns])
+    return rows, next_cursor
+
+def paginated_response(items, limit, next_cursor, key="data", **extra):
+    """
+    构造分页响应体，结构与 doc/intf_doc.py 中的 data + pagination 约定一致
+
+    参数:
+        items (list): 当前页数据
+        limit (int): 每页条数
+        next_cursor (str): 下一页游标
+        key (str): 数据数组在响应中的字段名
+        extra: 需要附加在响应顶层的其他字段
+
+    返回:
+        Response: JSON 响应
+    """
+    body = dict(extra)
+    body[key] = items
+    body["pagination"] = {
+        "limit": limit,
+        "count": len(items),
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
+    }
+    return jsonify(body)
+
+def stream_json(query, order_columns, serialize, key="data", chunk_size=None):
+    """
+    以分块流式 JSON 输出查询的全部结果，内存占用与结果总量无关
+
+    参数:
+        query: SQLAlchemy 查询对象
+        order_columns (list): 排序列
+        serialize (callable): 单行记录转 dict 的函数
+        key (str): 结果数组在响应中的字段名
+        chunk_size (int): 每批从数据库拉取并输出的行数
+
+    返回:
+        Response: 分块传输的 JSON 响应
+    """
+    chunk_size = chunk_size or Config.PAGINATION_STREAM_CHUNK
+    db = query.session
+
+    def generate():
+        try:
+            yield '{"%s":[' % key
+            first = True
+            buffer = []
+            for row in query.order_by(*order_columns).yield_per(chunk_size):
+                buffer.append(json.dumps(serialize(row)))
+                if len(buffer) >= chunk_size:
+                    yield ("" if first else ",") + ",".join(buffer)
+                    first = False
+                    buffer = []
+            if buffer:
+                yield ("" if first else ",") + ",".join(buffer)
+            yield "]}"
+        except Exception as e:
+            # 响应头已发出，只能中断输出并记录日志
+            logger.error(f"流式输出失败: {e}")
+            raise
+        finally:
+            db.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
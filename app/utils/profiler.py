@@ -0,0 +1,208 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from flask import request, session, g
+from loguru import logger
+from app.config import Config
+from app.utils.decorators import _load_current_user
+
+PROFILE_MODES = ("cprofile", "sampling")
+# 各模式的输出文件扩展名：cProfile 为 pstats 格式，采样为火焰图工具可直接读取的折叠栈
+_EXTENSIONS = {"cprofile": ".prof", "sampling": ".collapsed"}
+
+class StackSampler:
+    """
+    采样分析器：后台线程按固定间隔抓取目标线程的调用栈，按折叠栈格式计数
+
+    参数:
+        thread_id (int): 被采样的线程id
+        interval (float): 采样间隔（秒）
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name}({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def dump(self, path):
+        """
+        写出折叠栈：每行为 "调用栈 次数"，可直接交给 flamegraph.pl / speedscope
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class RequestProfiler:
+    """
+    按请求开启的性能分析钩子
+
+    功能:
+        配置开启后，管理员请求携带 X-Profile 请求头或 _profile 查询参数时，
+        以 cProfile 或采样方式分析该请求，结果写入分析目录并通过 X-Profile-Id 响应头返回文件名；
+        目录中只保留最近 max_profiles 份结果。
+
+    参数:
+        directory (str): 分析结果目录
+        max_profiles (int): 最多保留的结果份数
+        default_mode (str): 请求未指定时使用的模式，cprofile 或 sampling
+        sample_interval (float): 采样间隔（秒）
+        enabled (bool): 是否启用
+    """
+
+    def __init__(self, directory, max_profiles=50, default_mode="cprofile", sample_interval=0.005, enabled=False):
+        if default_mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {default_mode}")
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.default_mode = default_mode
+        self.sample_interval = sample_interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    def _requested_mode(self):
+        """
+        返回请求指定的分析模式，未请求分析时返回 None
+        """
+        flag = request.headers.get("X-Profile") or request.args.get("_profile")
+        if not flag or flag.lower() in ("0", "false", "off"):
+            return None
+        flag = flag.lower()
+        return flag if flag in PROFILE_MODES else self.default_mode
+
+    def _is_admin(self):
+        if not session.get("login_status"):
+            return False
+        user, error_response = _load_current_user(session.get("empid"))
+        return error_response is None and user["admin"] == 0
+
+    def before_request(self):
+        if not self.enabled:
+            return
+        mode = self._requested_mode()
+        if mode is None or not self._is_admin():
+            return
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # 同一线程已有其他分析器在运行
+                logger.warning("已有分析器在运行，跳过本次请求分析")
+                return
+        else:
+            profiler = StackSampler(threading.get_ident(), self.sample_interval)
+            profiler.start()
+        g._profiler = (mode, profiler, time.perf_counter())
+
+    def _finish(self):
+        """
+        停止分析并写出结果，返回文件名
+        """
+        mode, profiler, started = g.pop("_profiler")
+        if mode == "cprofile":
+            profiler.disable()
+        else:
+            profiler.stop()
+
+        endpoint = (request.endpoint or "unmatched").replace(".", "_")
+        name = f"{datetime.now():%Y%m%d%H%M%S%f}_{endpoint}_{uuid.uuid4().hex[:8]}{_EXTENSIONS[mode]}"
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        if mode == "cprofile":
+            profiler.dump_stats(path)
+        else:
+            profiler.dump(path)
+        self._enforce_cap()
+        logger.info(f"请求 {request.method} {request.path} 分析完成({mode}，{(time.perf_counter() - started) * 1000:.1f}ms): {name}")
+        return name
+
+    def after_request(self, response):
+        if "_profiler" not in g:
+            return response
+        try:
+            response.headers["X-Profile-Id"] = self._finish()
+        except Exception as e:
+            logger.error(f"保存请求分析结果失败: {e}")
+        return response
+
+    def teardown_request(self, exception=None):
+        """
+        after_request 未执行时停止仍在运行的分析器
+        """
+        if "_profiler" in g:
+            try:
+                self._finish()
+            except Exception as e:
+                logger.error(f"保存请求分析结果失败: {e}")
+
+    def init_app(self, app):
+        """
+        注册请求钩子
+        """
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+    def list_profiles(self):
+        """
+        按时间倒序列出已保存的分析结果
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):
+            if os.path.splitext(name)[1] not in _EXTENSIONS.values():
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            profiles.append({
+                "name": name,
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(sep=" ", timespec="seconds")
+            })
+        profiles.sort(key=lambda p: p["name"], reverse=True)
+        return profiles
+
+    def _enforce_cap(self):
+        """
+        删除超出保留份数的最旧结果
+        """
+        with self._lock:
+            for profile in self.list_profiles()[self.max_profiles:]:
+                try:
+                    os.remove(os.path.join(self.directory, profile["name"]))
+                except OSError as e:
+                    logger.warning(f"删除旧分析结果失败: {e}")
+
+# 全局请求分析钩子
+request_profiler = RequestProfiler(
+    Config.PROFILER_DIR,
+    max_profiles=Config.PROFILER_MAX_PROFILES,
+    default_mode=Config.PROFILER_MODE,
+    sample_interval=Config.PROFILER_SAMPLE_INTERVAL,
+    enabled=Config.PROFILER_ENABLED
+)
@@ -0,0 +1,294 @@
+import threading
+import time
+from collections import defaultdict
+import click
+from sqlalchemy import case, event, func, inspect, or_, select
+from loguru import logger
+from app.models import SessionLocal, Project, ProjectMember, ProjectEvent, Event, ProjectSummary
+
+_TABLE = ProjectSummary.__table__
+# 重算时每批处理的项目数
+_CHUNK = 500
+
+def old_value(obj, attr):
+    """
+    返回属性在本次 flush 前的取值
+    """
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(obj, attr)
+
+def attr_changed(obj, *attrs):
+    """
+    本次 flush 是否修改了任一属性
+    """
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+def is_normal(status):
+    # 未显式赋值的状态位在插入时取默认值 0
+    return (status or 0) == 0
+
+class ProjectSummaryTracker:
+    """
+    项目汇总表维护
+
+    功能:
+        在会话 flush 后、同一事务内按本次写入的成员与事件计算增量，以 UPDATE 自增的方式
+        更新 TBUSPRJSUMMARY，看板查询直接读取汇总表，不再对成员、事件做 GROUP BY。
+
+    说明:
+        成员增减、新增节点与事件状态变化按增量更新；节点停用、移动、删除或事件报告时间变化时，
+        树层数与最晚报告时间无法增量回退，改为重算所涉项目。汇总行不存在的项目也按重算处理。
+        汇总随业务数据在同一事务内提交或回滚，多进程写入同样有效。
+        bulk_insert_mappings 不经过单元工作，需调用 refresh。
+    """
+
+    def __init__(self):
+        self._session_factory = None
+        self._lock = threading.Lock()
+        self.incremental = 0
+        self.recounted = 0
+        self.rebuilds = 0
+
+    def _count(self, field, value=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + value)
+
+    def start(self, session_factory=SessionLocal):
+        """
+        注册会话事件；汇总表为空而已有项目时（首次升级）全量重算
+        """
+        if self._session_factory is not None:
+            return
+        self._session_factory = session_factory
+        event.listen(session_factory, "after_flush", self._after_flush)
+
+        db = session_factory()
+        try:
+            if db.query(ProjectSummary.prjid).first() is None and db.query(Project.prjid).first() is not None:
+                started = time.perf_counter()
+                count = self.rebuild(db)
+                db.commit()
+                logger.info(f"已重算 {count} 个项目的汇总，耗时 {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"重算项目汇总失败: {e}")
+        finally:
+            db.close()
+
+    def rebuild(self, db):
+        """
+        在当前事务中全量重算项目汇总，调用方负责提交
+
+        返回:
+            int: 重算的项目数
+        """
+        prjids = [row[0] for row in db.query(Project.prjid).order_by(Project.prjid)]
+        conn = db.connection()
+        conn.execute(_TABLE.delete())
+        for start in range(0, len(prjids), _CHUNK):
+            self._recount(conn, prjids[start:start + _CHUNK])
+        self._count("rebuilds")
+        return len(prjids)
+
+    def refresh(self, db, model, rows):
+        """
+        批量插入成员或项目事件节点后，在当前事务中重算所涉项目，其他模型直接返回
+
+        参数:
+            db: 数据库会话
+            model: ORM 模型类
+            rows (list): 已插入的字段字典列表，需含 prjid
+        """
+        if self._session_factory is None or model not in (ProjectMember, ProjectEvent) or not rows:
+            return
+        prjids = sorted({row["prjid"] for row in rows})
+        conn = db.connection()
+        for start in range(0, len(prjids), _CHUNK):
+            self._recount(conn, prjids[start:start + _CHUNK])
+
+    def _recount(self, conn, prjids):
+        """
+        从成员表与事件树重算一批项目的汇总并覆盖写入
+        """
+        rows = {prjid: {
+            "prjid": prjid,
+            "membercount": 0,
+            "normalevents": 0,
+            "disabledevents": 0,
+            "treedepth": 0,
+            "lasteventtime": None
+        } for prjid in prjids}
+
+        for prjid, count in conn.execute(
+            select(ProjectMember.prjid, func.count())
+            .where(ProjectMember.prjid.in_(prjids), ProjectMember.status == 0)
+            .group_by(ProjectMember.prjid)
+        ):
+            rows[prjid]["membercount"] = count
+
+        for prjid, status, count, depth, last in conn.execute(
+            select(ProjectEvent.prjid, Event.status, func.count(), func.max(ProjectEvent.depth), func.max(Event.reportertime))
+            .join(Event, Event.eventid == ProjectEvent.eventid)
+            .where(ProjectEvent.prjid.in_(prjids), ProjectEvent.status == 0)
+            .group_by(ProjectEvent.prjid, Event.status)
+        ):
+            row = rows[prjid]
+            row["normalevents" if status == 0 else "disabledevents"] += count
+            row["treedepth"] = max(row["treedepth"], depth + 1)
+            if last is not None and (row["lasteventtime"] is None or last > row["lasteventtime"]):
+                row["lasteventtime"] = last
+
+        conn.execute(_TABLE.delete().where(_TABLE.c.prjid.in_(prjids)))
+        conn.execute(_TABLE.insert(), list(rows.values()))
+        self._count("recounted", len(prjids))
+
+    def _bump(self, conn, prjid, members, normal, disabled, depth, last):
+        """
+        按增量更新一个项目的汇总行，汇总行不存在时改为重算
+        """
+        if conn.execute(select(_TABLE.c.prjid).where(_TABLE.c.prjid == prjid)).first() is None:
+            self._recount(conn, [prjid])
+            return
+        values = {}
+        if members:
+            values["membercount"] = _TABLE.c.membercount + members
+        if normal:
+            values["normalevents"] = _TABLE.c.normalevents + normal
+        if disabled:
+            values["disabledevents"] = _TABLE.c.disabledevents + disabled
+        if depth:
+            values["treedepth"] = case((_TABLE.c.treedepth < depth, depth), else_=_TABLE.c.treedepth)
+        if last is not None:
+            values["lasteventtime"] = case(
+                (or_(_TABLE.c.lasteventtime.is_(None), _TABLE.c.lasteventtime < last), last),
+                else_=_TABLE.c.lasteventtime
+            )
+        if values:
+            conn.execute(_TABLE.update().where(_TABLE.c.prjid == prjid).values(**values))
+            self._count("incremental")
+
+    def _after_flush(self, session, flush_context):
+        # prjid -> [成员数, 正常事件数, 停用事件数, 树层数, 最晚报告时间] 的增量
+        deltas = defaultdict(lambda: [0, 0, 0, 0, None])
+        recount = set()
+        new_nodes = []
+        event_status = {}  # eventid -> (原状态, 新状态)
+        touched_events = set()  # 需重算其所属项目的事件
+        deleted_projects = set()
+
+        for obj in session.new:
+            if isinstance(obj, ProjectMember):
+                if is_normal(obj.status):
+                    deltas[obj.prjid][0] += 1
+            elif isinstance(obj, ProjectEvent):
+                if is_normal(obj.status):
+                    new_nodes.append(obj)
+
+        for obj in session.dirty:
+            if isinstance(obj, ProjectMember):
+                if attr_changed(obj, "prjid"):
+                    recount.update((old_value(obj, "prjid"), obj.prjid))
+                elif attr_changed(obj, "status"):
+                    deltas[obj.prjid][0] += is_normal(obj.status) - is_normal(old_value(obj, "status"))
+            elif isinstance(obj, ProjectEvent):
+                if attr_changed(obj, "prjid", "eventid", "depth", "status"):
+                    recount.update((old_value(obj, "prjid"), obj.prjid))
+            elif isinstance(obj, Event):
+                if attr_changed(obj, "reportertime"):
+                    touched_events.add(obj.eventid)
+                elif attr_changed(obj, "status"):
+                    event_status[obj.eventid] = (is_normal(old_value(obj, "status")), is_normal(obj.status))
+
+        for obj in session.deleted:
+            if isinstance(obj, ProjectMember):
+                if is_normal(old_value(obj, "status")):
+                    deltas[obj.prjid][0] -= 1
+            elif isinstance(obj, ProjectEvent):
+                recount.add(obj.prjid)
+            elif isinstance(obj, Event):
+                touched_events.add(obj.eventid)
+            elif isinstance(obj, Project):
+                deleted_projects.add(obj.prjid)
+
+        if not (deltas or recount or new_nodes or event_status or touched_events or deleted_projects):
+            return
+        conn = session.connection()
+
+        if touched_events:
+            recount.update(row[0] for row in conn.execute(
+                select(ProjectEvent.prjid).where(ProjectEvent.eventid.in_(touched_events)).distinct()
+            ))
+
+        if new_nodes:
+            events = {row.eventid: row for row in conn.execute(
+                select(Event.eventid, Event.status, Event.reportertime)
+                .where(Event.eventid.in_({node.eventid for node in new_nodes}))
+            )}
+            for node in new_nodes:
+                linked = events.get(node.eventid)
+                if linked is None:
+                    recount.add(node.prjid)
+                    continue
+                delta = deltas[node.prjid]
+                delta[1 if is_normal(linked.status) else 2] += 1
+                delta[3] = max(delta[3], node.depth + 1)
+                if linked.reportertime is not None and (delta[4] is None or linked.reportertime > delta[4]):
+                    delta[4] = linked.reportertime
+
+        changed = {eventid: statuses for eventid, statuses in event_status.items() if statuses[0] != statuses[1]}
+        if changed:
+            # 本次新增的节点已按事件的新状态计数，这里排除
+            new_leafids = [node.leafid for node in new_nodes]
+            query = select(ProjectEvent.prjid, ProjectEvent.eventid, func.count()).where(
+                ProjectEvent.eventid.in_(changed), ProjectEvent.status == 0
+            ).group_by(ProjectEvent.prjid, ProjectEvent.eventid)
+            if new_leafids:
+                query = query.where(ProjectEvent.leafid.notin_(new_leafids))
+            for prjid, eventid, count in conn.execute(query):
+                sign = 1 if changed[eventid][1] else -1
+                deltas[prjid][1] += sign * count
+                deltas[prjid][2] -= sign * count
+
+        recount.discard(None)
+        recount -= deleted_projects
+        for prjid, (members, normal, disabled, depth, last) in deltas.items():
+            if prjid not in recount and prjid not in deleted_projects:
+                self._bump(conn, prjid, members, normal, disabled, depth, last)
+        prjids = sorted(recount)
+        for start in range(0, len(prjids), _CHUNK):
+            self._recount(conn, prjids[start:start + _CHUNK])
+        if deleted_projects:
+            conn.execute(_TABLE.delete().where(_TABLE.c.prjid.in_(deleted_projects)))
+
+    def stats(self):
+        """
+        返回增量更新、重算的项目数与全量重算次数，供监控使用
+        """
+        with self._lock:
+            return {
+                "name": "project_summary",
+                "incremental": self.incremental,
+                "recounted": self.recounted,
+                "rebuilds": self.rebuilds
+            }
+
+# 全局项目汇总维护
+project_summary = ProjectSummaryTracker()
+
+@click.command("rebuild-project-summary")
+def rebuild_summary_command():
+    """
+    全量重算项目汇总表（TBUSPRJSUMMARY）
+    """
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count = project_summary.rebuild(db)
+        db.commit()
+        click.echo(f"已重算 {count} 个项目的汇总，耗时 {time.perf_counter() - started:.1f} 秒")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,337 @@
+import threading
+import time
+from loguru import logger
+from app.config import Config
+from app.models import SessionLocal, RateLimitState
+
+# 单个限流键的状态字段：当前窗口起点、当前窗口计数、上一窗口计数、连续失败次数、已锁定次数、锁定截止时间、最后失败时间
+_FIELDS = ("window_start", "count", "prev_count", "failures", "lockouts", "locked_until", "last_failure")
+
+def _empty_state():
+    return {"window_start": 0.0, "count": 0, "prev_count": 0, "failures": 0, "lockouts": 0, "locked_until": 0.0,
+            "last_failure": 0.0}
+
+def _slide(state, window, now):
+    """
+    滑动窗口计数：按固定窗口记数，估算值 = 上一窗口计数 × 剩余重叠比例 + 当前窗口计数
+
+    说明:
+        每个键只需保存两个计数，内存与数据库存储都可以 O(1) 更新。
+        只滚动窗口、返回不含本次的估算值，放行后由调用方计入当前窗口，被拒绝的尝试不计数。
+    """
+    current = now - now % window
+    if state["window_start"] != current:
+        state["prev_count"] = state["count"] if current - state["window_start"] == window else 0
+        state["count"] = 0
+        state["window_start"] = current
+    overlap = 1 - (now - current) / window
+    return state["prev_count"] * overlap + state["count"]
+
+class MemoryRateLimitStore:
+    """
+    进程内限流状态存储
+
+    参数:
+        max_keys (int): 最多保留的键数，超出时清理长时间未更新的键
+        idle_seconds (int): 超过该时间未更新的键可被清理
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_keys=100000, idle_seconds=3600):
+        self.max_keys = max_keys
+        self.idle_seconds = idle_seconds
+        self._states = {}  # key -> (状态字典, 最后更新时间)
+        self._lock = threading.Lock()
+
+    def update(self, key, func, now):
+        """
+        在锁内读取、修改并保存一个键的状态
+
+        参数:
+            func (callable): 接收状态字典并原地修改，返回值原样返回
+        """
+        with self._lock:
+            item = self._states.get(key)
+            state = item[0] if item else _empty_state()
+            result = func(state)
+            self._states[key] = (state, now)
+            if len(self._states) > self.max_keys:
+                self._prune(now)
+            return result
+
+    def _prune(self, now):
+        stale = [k for k, (state, updated) in self._states.items()
+                 if now - updated > self.idle_seconds and state["locked_until"] < now]
+        for k in stale:
+            del self._states[k]
+
+    def size(self):
+        with self._lock:
+            return len(self._states)
+
+class DatabaseRateLimitStore:
+    """
+    数据库限流状态存储：TSYSRATELIMIT 表按键读写，多进程共享
+
+    说明:
+        读改写在一个事务内完成；SQLite 写入互斥，并发下计数最多有少量偏差。
+    """
+
+    backend = "database"
+
+    def __init__(self, session_factory, idle_seconds=3600):
+        self.session_factory = session_factory
+        self.idle_seconds = idle_seconds
+        self._ops = 0
+
+    def update(self, key, func, now):
+        db = self.session_factory()
+        try:
+            record = db.get(RateLimitState, key)
+            if record is None:
+                record = RateLimitState(rkey=key, **_empty_state())
+                db.add(record)
+            # 升级前写入的行没有新增列的值，按初始值处理
+            state = _empty_state()
+            state.update({field: getattr(record, field) for field in _FIELDS if getattr(record, field) is not None})
+            result = func(state)
+            for field in _FIELDS:
+                setattr(record, field, state[field])
+            record.updated_at = now
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        # 每 1000 次写入顺带清理一次长时间未更新的键
+        self._ops += 1
+        if self._ops % 1000 == 0:
+            self._prune(now)
+        return result
+
+    def _prune(self, now):
+        db = self.session_factory()
+        try:
+            db.query(RateLimitState).filter(
+                RateLimitState.updated_at < now - self.idle_seconds,
+                RateLimitState.locked_until < now
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"清理限流状态失败: {e}")
+        finally:
+            db.close()
+
+    def size(self):
+        db = self.session_factory()
+        try:
+            return db.query(RateLimitState).count()
+        finally:
+            db.close()
+
+class LoginRateLimiter:
+    """
+    登录限流器
+
+    功能:
+        在 RSA 解密与密码校验之前，按客户端 IP 与工号分别做滑动窗口限流；
+        连续失败达到阈值后锁定，锁定时长按次数翻倍直至上限。
+
+    说明:
+        失败次数在 failure_window 秒内没有新的失败时清零；锁定结束后每安静 lockout_decay 秒，
+        已锁定次数减一，锁定时长随之回落。登录成功只清零该工号的计数，IP 的计数只随时间衰减，
+        避免攻击者以自己的账号登录成功来清除同一出口 IP 上的失败记录；
+        共用出口 IP（办公网、NAT）的用户因此不会因长期累积的输错而被持续锁定。
+
+    参数:
+        store: 限流状态存储
+        ip_max_attempts (int): 每个 IP 在 ip_window 秒内的最大尝试次数
+        ip_window (int): IP 限流窗口（秒）
+        user_max_attempts (int): 每个工号在 user_window 秒内的最大尝试次数
+        user_window (int): 工号限流窗口（秒）
+        lockout_threshold (int): 工号连续失败多少次后锁定
+        ip_lockout_threshold (int): IP 连续失败多少次后锁定
+        lockout_base (int): 首次锁定时长（秒）
+        lockout_max (int): 锁定时长上限（秒）
+        failure_window (int): 超过该时长（秒）没有新的失败时清零失败次数
+        lockout_decay (int): 锁定结束后每安静该时长（秒），已锁定次数减一
+        enabled (bool): 为 False 时不做任何限制
+    """
+
+    def __init__(self, store, ip_max_attempts=30, ip_window=60, user_max_attempts=10, user_window=300,
+                 lockout_threshold=5, ip_lockout_threshold=20, lockout_base=60, lockout_max=3600,
+                 failure_window=900, lockout_decay=3600, enabled=True):
+        self.store = store
+        self.ip_max_attempts = ip_max_attempts
+        self.ip_window = ip_window
+        self.user_max_attempts = user_max_attempts
+        self.user_window = user_window
+        self.lockout_threshold = lockout_threshold
+        self.ip_lockout_threshold = ip_lockout_threshold
+        self.lockout_base = lockout_base
+        self.lockout_max = lockout_max
+        self.failure_window = failure_window
+        self.lockout_decay = lockout_decay
+        self.enabled = enabled
+        self._stats_lock = threading.Lock()
+        self.rejected = 0
+        self.lockouts = 0
+
+    def _keys(self, empcode, ip):
+        """
+        返回 [(键, 最大尝试次数, 窗口, 锁定阈值)]
+        """
+        return [
+            (f"ip:{ip}", self.ip_max_attempts, self.ip_window, self.ip_lockout_threshold),
+            (f"user:{empcode}", self.user_max_attempts, self.user_window, self.lockout_threshold)
+        ]
+
+    def _decay(self, state, now):
+        """
+        按安静时长衰减失败与锁定次数，在存储的读改写函数中调用
+        """
+        if state["failures"] and now - state["last_failure"] >= self.failure_window:
+            state["failures"] = 0
+        # 从锁定结束或最后一次失败（取较晚者）起算，每满 lockout_decay 秒减一次；
+        # 已扣减的时长记入 locked_until（仍早于当前时间，不影响锁定判断），避免重复扣减
+        anchor = max(state["locked_until"], state["last_failure"])
+        if state["lockouts"] and now > anchor:
+            steps = int((now - anchor) // self.lockout_decay)
+            if steps:
+                state["lockouts"] = max(0, state["lockouts"] - steps)
+                state["locked_until"] = anchor + steps * self.lockout_decay
+
+    def _check(self, key, max_attempts, window, empcode, ip):
+        """
+        记录一次登录尝试并判断是否放行，被拒绝的尝试不计入窗口
+
+        返回:
+            tuple: (是否放行, 建议重试等待秒数)
+        """
+        if not self.enabled:
+            return True, 0
+        now = time.time()
+
+        def attempt(state):
+            self._decay(state, now)
+            if state["locked_until"] > now:
+                return state["locked_until"] - now
+            if _slide(state, window, now) + 1 > max_attempts:
+                return state["window_start"] + window - now
+            state["count"] += 1
+            return 0
+        retry_after = self.store.update(key, attempt, now)
+
+        if retry_after > 0:
+            with self._stats_lock:
+                self.rejected += 1
+            logger.warning(f"登录尝试过于频繁: empcode={empcode} ip={ip}，{retry_after:.0f} 秒后重试")
+            return False, int(retry_after) + 1
+        return True, 0
+
+    def check_ip(self, empcode, ip):
+        """
+        按客户端 IP 限流，在验证码校验之前调用
+
+        返回:
+            tuple: (是否放行, 建议重试等待秒数)
+        """
+        return self._check(f"ip:{ip}", self.ip_max_attempts, self.ip_window, empcode, ip)
+
+    def check_user(self, empcode, ip):
+        """
+        按工号限流，在验证码校验通过之后、RSA 解密之前调用
+
+        说明:
+            验证码错误的请求不消耗工号的尝试次数，避免他人不经验证码即可持续锁住指定账号。
+
+        返回:
+            tuple: (是否放行, 建议重试等待秒数)
+        """
+        return self._check(f"user:{empcode}", self.user_max_attempts, self.user_window, empcode, ip)
+
+    def record_failure(self, empcode, ip):
+        """
+        记录一次登录失败，连续失败达到阈值时按次数翻倍锁定
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        for key, _, _, threshold in self._keys(empcode, ip):
+            def fail(state):
+                self._decay(state, now)
+                state["failures"] += 1
+                state["last_failure"] = now
+                if state["failures"] < threshold:
+                    return False
+                state["failures"] = 0
+                state["lockouts"] += 1
+                duration = min(self.lockout_base * 2 ** (state["lockouts"] - 1), self.lockout_max)
+                state["locked_until"] = now + duration
+                logger.warning(f"{key} 连续登录失败，锁定 {duration} 秒")
+                return True
+            if self.store.update(key, fail, now):
+                with self._stats_lock:
+                    self.lockouts += 1
+
+    def record_success(self, empcode, ip):
+        """
+        登录成功后清零该工号的尝试窗口、失败与锁定次数
+        """
+        if not self.enabled:
+            return
+
+        def reset(state):
+            state["count"] = 0
+            state["prev_count"] = 0
+            state["failures"] = 0
+            state["lockouts"] = 0
+        self.store.update(f"user:{empcode}", reset, time.time())
+
+    def stats(self):
+        """
+        返回拒绝与锁定次数，供监控使用
+        """
+        with self._stats_lock:
+            return {
+                "enabled": self.enabled,
+                "backend": self.store.backend,
+                "keys": self.store.size(),
+                "rejected": self.rejected,
+                "lockouts": self.lockouts
+            }
+
+def create_rate_limit_store(backend):
+    """
+    按配置创建限流状态存储
+
+    参数:
+        backend (str): memory 或 database
+    """
+    # 闲置键至少保留到最长锁定与窗口结束之后
+    idle_seconds = max(Config.LOGIN_LOCKOUT_MAX, Config.LOGIN_IP_WINDOW, Config.LOGIN_USER_WINDOW) * 2
+    if backend == "memory":
+        return MemoryRateLimitStore(idle_seconds=idle_seconds)
+    if backend == "database":
+        return DatabaseRateLimitStore(SessionLocal, idle_seconds=idle_seconds)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+# 全局登录限流器
+login_limiter = LoginRateLimiter(
+    create_rate_limit_store(Config.LOGIN_LIMIT_BACKEND),
+    ip_max_attempts=Config.LOGIN_IP_MAX_ATTEMPTS,
+    ip_window=Config.LOGIN_IP_WINDOW,
+    user_max_attempts=Config.LOGIN_USER_MAX_ATTEMPTS,
+    user_window=Config.LOGIN_USER_WINDOW,
+    lockout_threshold=Config.LOGIN_LOCKOUT_THRESHOLD,
+    ip_lockout_threshold=Config.LOGIN_IP_LOCKOUT_THRESHOLD,
+    lockout_base=Config.LOGIN_LOCKOUT_BASE,
+    lockout_max=Config.LOGIN_LOCKOUT_MAX,
+    failure_window=Config.LOGIN_FAILURE_WINDOW,
+    lockout_decay=Config.LOGIN_LOCKOUT_DECAY,
+    enabled=Config.LOGIN_LIMIT_ENABLED
+)
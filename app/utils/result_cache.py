@@ -0,0 +1,185 @@
+import hashlib
+import json
+import threading
+from functools import wraps
+from flask import Response, request
+from sqlalchemy import event
+from app.config import Config
+from app.models import SessionLocal
+from app.utils.cache import TTLCache
+
+# 会话中等待提交后递增版本号的表名
+_PENDING_KEY = "result_cache_tables"
+
+class TableVersions:
+    """
+    表级版本号：会话提交后，本次事务写过的每张表版本号加一
+
+    说明:
+        ORM 单元工作的新增、修改、删除由会话事件自动记录；bulk_insert_mappings 等批量写入
+        不经过单元工作，需调用 touch 标记。版本号只在本进程内有效，多进程部署时其他进程
+        的写入由查询缓存的 TTL 兜底。
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._session_factory = None
+
+    def start(self, session_factory=SessionLocal):
+        """
+        注册会话事件，重复调用无副作用
+        """
+        if self._session_factory is not None:
+            return
+        self._session_factory = session_factory
+        event.listen(session_factory, "after_flush", self._after_flush)
+        event.listen(session_factory, "after_commit", self._after_commit)
+        event.listen(session_factory, "after_transaction_end", self._after_transaction_end)
+
+    def _after_flush(self, session, flush_context):
+        tables = session.info.setdefault(_PENDING_KEY, set())
+        tables.update(obj.__tablename__ for obj in session.new)
+        tables.update(obj.__tablename__ for obj in session.deleted)
+        tables.update(obj.__tablename__ for obj in session.dirty if session.is_modified(obj))
+
+    def _after_commit(self, session):
+        tables = session.info.pop(_PENDING_KEY, None)
+        if not tables:
+            return
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def _after_transaction_end(self, session, transaction):
+        # 回滚或关闭会话时丢弃未提交的标记
+        if transaction.parent is None:
+            session.info.pop(_PENDING_KEY, None)
+
+    def touch(self, db, model):
+        """
+        标记当前事务写过 model 对应的表，提交后递增版本号，供批量写入调用
+        """
+        db.info.setdefault(_PENDING_KEY, set()).add(model.__tablename__)
+
+    def snapshot(self, models):
+        """
+        返回各模型对应表的当前版本号元组
+        """
+        with self._lock:
+            return tuple(self._versions.get(model.__tablename__, 0) for model in models)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._versions)
+
+class QueryResultCache:
+    """
+    查询接口结果缓存
+
+    功能:
+        以 接口名 + 校验后的查询参数 为键缓存 200 响应体，同时记录依赖表的版本号；
+        读取时版本号不一致即视为失效，写入接口无需逐个清理缓存。
+        响应附带 ETag，请求带 If-None-Match 且结果未变时返回 304 不带响应体。
+
+    说明:
+        缓存命中时不创建数据库会话。缓存未命中但查询结果的 ETag 与 If-None-Match 相同时同样返回 304。
+        查询接口都是 POST，这里按 GET 的条件请求语义处理，便于轮询的看板复用上次结果。
+
+    参数:
+        versions (TableVersions): 表级版本号
+        maxsize (int): 最大缓存条数
+        ttl (int): 条目有效期（秒），同时是多进程部署时其他进程写入的最长可见延迟
+        enabled (bool): 为 False 时不缓存，仍返回 ETag
+    """
+
+    def __init__(self, versions, maxsize=512, ttl=30, enabled=True):
+        self.versions = versions
+        self.enabled = enabled
+        self._cache = TTLCache("query_result", maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def make_key(name, kwargs):
+        """
+        接口名 + 按键排序的查询参数，日期等非 JSON 类型转字符串
+        """
+        return name + ":" + json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _respond(self, body, mimetype, etag):
+        """
+        If-None-Match 命中时返回 304，否则返回缓存的响应体
+        """
+        if request.if_none_match.contains(etag):
+            self._count("not_modified")
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    def cached(self, name, *models):
+        """
+        查询接口装饰器，放在 use_kwargs 之下以取得校验后的参数
+
+        参数:
+            name (str): 接口名，作为缓存键前缀
+            models: 查询结果依赖的 ORM 模型，任一对应表被写入即失效
+
+        说明:
+            流式输出（stream 为 true）与非 200 响应不缓存。
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if kwargs.get("stream"):
+                    self._count("bypassed")
+                    return func(*args, **kwargs)
+
+                key = self.make_key(name, kwargs)
+                versions = self.versions.snapshot(models)
+                if self.enabled:
+                    entry = self._cache.get(key)
+                    if entry is not None and entry[0] == versions:
+                        return self._respond(*entry[1:])
+
+                result = func(*args, **kwargs)
+                if not isinstance(result, Response) or result.status_code != 200:
+                    return result
+                body = result.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                if self.enabled:
+                    # 记录查询前的版本号，查询期间有写入提交时下次读取即失效
+                    self._cache.set(key, (versions, body, result.mimetype, etag))
+                return self._respond(body, result.mimetype, etag)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """
+        返回 304 与绕过次数及各表版本号，条目命中率见组件统计 cache 中的 query_result
+        """
+        with self._lock:
+            return {
+                "name": "result_cache",
+                "enabled": self.enabled,
+                "not_modified": self.not_modified,
+                "bypassed": self.bypassed,
+                "versions": self.versions.stats()
+            }
+
+# 全局表版本号与查询结果缓存
+table_versions = TableVersions()
+result_cache = QueryResultCache(
+    table_versions,
+    maxsize=Config.RESULT_CACHE_MAXSIZE,
+    ttl=Config.RESULT_CACHE_TTL,
+    enabled=Config.RESULT_CACHE_ENABLED
+)
@@ -0,0 +1,604 @@
+import base64
+import json
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict, namedtuple
+from sqlalchemy import event, inspect, text
+from loguru import logger
+from app.config import Config
+from app.models import SessionLocal, Event, Project
+from .errors import BusinessError
+from .pagination import encode_cursor
+
+# 按两字切分的文字：中日韩统一表意文字（含扩展 A、兼容区）、日文假名与韩文音节
+_CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_RUN_RE = re.compile(f"[{_CJK_CHARS}]+|[^\\W_{_CJK_CHARS}]+")
+_CJK_RE = re.compile(f"[{_CJK_CHARS}]")
+
+# 单次查询最多使用的检索词数
+MAX_TERMS = 16
+# 多字段文档中各字段的位置间隔，避免短语跨字段匹配
+_FIELD_GAP = 100000
+# 会话中等待提交后写入内存索引的变更
+_PENDING_KEY = "search_pending"
+
+# 检索词：原文（用于摘要高亮）、词元序列（按短语匹配）、是否前缀匹配
+SearchTerm = namedtuple("SearchTerm", ["text", "tokens", "prefix"])
+
+def _runs(value):
+    """
+    NFKC 规范化（全角转半角）并转小写后，切分为连续的中日韩文字串或字母数字串
+    """
+    return _RUN_RE.findall(unicodedata.normalize("NFKC", value or "").lower())
+
+def _is_cjk(token):
+    return _CJK_RE.match(token) is not None
+
+def tokenize(value):
+    """
+    分词
+
+    说明:
+        字母数字按连续串切分为词；中日韩文字没有分隔符，按相邻两字切分为二元组，
+        每段末尾再补一个单字，使任意单字都能以前缀方式命中。
+        如 "项目延期" -> 项目 目延 延期 期。
+
+    返回:
+        list: 词元序列，下标即位置
+    """
+    tokens = []
+    for run in _runs(value):
+        if _is_cjk(run):
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            tokens.append(run[-1])
+        else:
+            tokens.append(run)
+    return tokens
+
+def parse_query(query):
+    """
+    将搜索关键字解析为检索词，各检索词之间为“与”关系
+
+    说明:
+        两字及以上的中日韩文字串按二元组组成短语匹配，单字按前缀匹配，字母数字串按整词匹配。
+
+    返回:
+        list: SearchTerm 列表
+    """
+    terms = []
+    seen = set()
+    for run in _runs(query):
+        if run in seen:
+            continue
+        seen.add(run)
+        if _is_cjk(run) and len(run) > 1:
+            terms.append(SearchTerm(run, tuple(run[i:i + 2] for i in range(len(run) - 1)), False))
+        else:
+            terms.append(SearchTerm(run, (run,), _is_cjk(run)))
+        if len(terms) >= MAX_TERMS:
+            break
+    return terms
+
+def _fold(ch):
+    """
+    单字规范化（全角转半角、转小写），结果不是单字时保留原字
+    """
+    folded = unicodedata.normalize("NFKC", ch).lower()
+    return folded if len(folded) == 1 else ch
+
+def make_snippet(value, terms, length):
+    """
+    截取包含首个命中位置的摘要
+
+    返回:
+        tuple: (摘要文本, 高亮区间列表 [[起, 止], ...]，下标相对摘要文本)
+    """
+    if not value:
+        return "", []
+    # 逐字规范化以保持下标与原文对齐，摘要仍取自原文
+    folded = "".join(_fold(ch) for ch in value)
+
+    spans = []
+    for term in terms:
+        start = folded.find(term.text)
+        while start != -1:
+            spans.append((start, start + len(term.text)))
+            start = folded.find(term.text, start + len(term.text))
+    spans.sort()
+
+    first = spans[0][0] if spans else 0
+    begin = max(0, min(first - length // 4, len(value) - length))
+    end = min(len(value), begin + length)
+    head = "…" if begin > 0 else ""
+    snippet = head + value[begin:end] + ("…" if end < len(value) else "")
+
+    highlights = []
+    for start, stop in spans:
+        start, stop = max(start, begin), min(stop, end)
+        if start >= stop:
+            continue
+        start, stop = start - begin + len(head), stop - begin + len(head)
+        if highlights and start <= highlights[-1][1]:
+            highlights[-1][1] = max(highlights[-1][1], stop)
+        else:
+            highlights.append([start, stop])
+    return snippet, highlights
+
+class DocType:
+    """
+    可检索的文档类型
+
+    参数:
+        name (str): 类型名，如 event
+        model: ORM 模型类
+        pk (str): 主键字段名
+        fields (tuple): 参与检索的文本字段
+        table (str): FTS5 虚拟表名
+    """
+
+    def __init__(self, name, model, pk, fields, table):
+        self.name = name
+        self.model = model
+        self.pk = pk
+        self.fields = fields
+        self.table = table
+
+    def values(self, obj):
+        return tuple(getattr(obj, field) for field in self.fields)
+
+    def query(self, db, *criteria):
+        """
+        按条件读取 (主键, 各字段) 行
+        """
+        columns = [getattr(self.model, self.pk)] + [getattr(self.model, field) for field in self.fields]
+        return db.query(*columns).filter(*criteria)
+
+DOC_TYPES = {
+    "event": DocType("event", Event, "eventid", ("event",), "TSYSFTSEVENT"),
+    "project": DocType("project", Project, "prjid", ("desc", "goal"), "TSYSFTSPROJECT")
+}
+_BY_MODEL = {doc_type.model: doc_type for doc_type in DOC_TYPES.values()}
+
+class InvertedIndex:
+    """
+    进程内倒排索引：词元 -> {文档id: [位置]}，支持短语、前缀匹配与 BM25 排序
+
+    说明:
+        非线程安全，由 MemorySearchBackend 加锁访问。
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._doc_tokens = {}  # 文档id -> 该文档的词元（删除时定位倒排表）
+        self._lengths = {}  # 文档id -> 词元数
+        self._total_length = 0
+        self._prefixes = defaultdict(set)  # 首字 -> 以该字开头的中日韩词元
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, docid, values):
+        self.remove(docid)
+        positions = defaultdict(list)
+        length = 0
+        for i, value in enumerate(values):
+            for position, token in enumerate(tokenize(value)):
+                positions[token].append(i * _FIELD_GAP + position)
+                length += 1
+        for token, token_positions in positions.items():
+            self._postings[token][docid] = token_positions
+            if _is_cjk(token):
+                self._prefixes[token[0]].add(token)
+        self._doc_tokens[docid] = tuple(positions)
+        self._lengths[docid] = length
+        self._total_length += length
+
+    def remove(self, docid):
+        tokens = self._doc_tokens.pop(docid, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            docs = self._postings[token]
+            docs.pop(docid, None)
+            if not docs:
+                del self._postings[token]
+                if _is_cjk(token):
+                    self._prefixes[token[0]].discard(token)
+                    if not self._prefixes[token[0]]:
+                        del self._prefixes[token[0]]
+        self._total_length -= self._lengths.pop(docid)
+
+    def _match(self, term):
+        """
+        返回 {文档id: 命中次数}
+        """
+        if term.prefix:
+            matched = defaultdict(int)
+            for token in self._prefixes.get(term.tokens[0], ()):
+                for docid, token_positions in self._postings[token].items():
+                    matched[docid] += len(token_positions)
+            return matched
+
+        postings = [self._postings.get(token) for token in term.tokens]
+        if not all(postings):
+            return {}
+        if len(postings) == 1:
+            return {docid: len(token_positions) for docid, token_positions in postings[0].items()}
+
+        # 短语：从最短的倒排表取候选文档，再校验各词元位置是否连续
+        matched = {}
+        for docid in min(postings, key=len):
+            if not all(docid in docs for docs in postings):
+                continue
+            following = [set(docs[docid]) for docs in postings[1:]]
+            count = sum(1 for start in postings[0][docid]
+                        if all(start + i + 1 in token_positions for i, token_positions in enumerate(following)))
+            if count:
+                matched[docid] = count
+        return matched
+
+    def search(self, terms):
+        """
+        返回同时命中全部检索词的 [(文档id, 得分)]，按得分降序
+        """
+        total = len(self._lengths)
+        if not total or not terms:
+            return []
+        matches = [self._match(term) for term in terms]
+        if not all(matches):
+            return []
+
+        average = self._total_length / total or 1
+        candidates = set(min(matches, key=len))
+        for matched in matches:
+            candidates.intersection_update(matched)
+
+        # 与 FTS5 的 bm25() 相同：idf 下限为 1e-6，各检索词得分相加
+        idfs = [max(math.log((total - len(matched) + 0.5) / (len(matched) + 0.5)), 1e-6) for matched in matches]
+        scores = []
+        for docid in candidates:
+            norm = self.K1 * (1 - self.B + self.B * self._lengths[docid] / average)
+            score = 0.0
+            for idf, matched in zip(idfs, matches):
+                tf = matched[docid]
+                score += idf * tf * (self.K1 + 1) / (tf + norm)
+            scores.append((docid, score))
+        scores.sort(key=lambda item: (-item[1], item[0]))
+        return scores
+
+class MemorySearchBackend:
+    """
+    进程内倒排索引：启动时从数据库全量加载，事务提交后应用变更
+
+    说明:
+        索引只在当前进程可见，多进程部署时其他进程的写入要到重启后才可检索，此时应使用 fts5。
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._indexes = {name: InvertedIndex() for name in DOC_TYPES}
+        self._lock = threading.Lock()
+
+    def rebuild(self, session_factory, doc_type):
+        db = session_factory()
+        try:
+            index = InvertedIndex()
+            for row in doc_type.query(db).yield_per(1000):
+                index.add(row[0], row[1:])
+            with self._lock:
+                self._indexes[doc_type.name] = index
+        finally:
+            db.close()
+
+    def write(self, session, doc_type, docid, values):
+        session.info.setdefault(_PENDING_KEY, {})[(doc_type.name, docid)] = values
+
+    def after_commit(self, session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if not pending:
+            return
+        with self._lock:
+            for (name, docid), values in pending.items():
+                if values is None:
+                    self._indexes[name].remove(docid)
+                else:
+                    self._indexes[name].add(docid, values)
+
+    def search(self, db, doc_type, terms, status, offset, limit):
+        with self._lock:
+            ranked = self._indexes[doc_type.name].search(terms)
+        if status is None:
+            return ranked[offset:offset + limit]
+
+        # 按排名分块回表过滤状态，凑够所需条数即停止
+        pk = getattr(doc_type.model, doc_type.pk)
+        kept = []
+        for start in range(0, len(ranked), 500):
+            chunk = ranked[start:start + 500]
+            allowed = {docid for (docid,) in db.query(pk).filter(
+                pk.in_([docid for docid, _ in chunk]), doc_type.model.status == status)}
+            kept.extend(item for item in chunk if item[0] in allowed)
+            if len(kept) >= offset + limit:
+                break
+        return kept[offset:offset + limit]
+
+    def count(self, doc_type):
+        with self._lock:
+            return len(self._indexes[doc_type.name])
+
+class FtsSearchBackend:
+    """
+    SQLite FTS5 虚拟表：rowid 为业务主键，各列保存分词后以空格分隔的词元
+
+    说明:
+        中文分词在写入前由 tokenize 完成，FTS5 只按空格切分；索引写入与业务数据在同一事务内，
+        随事务一起提交或回滚，多进程共享。
+    """
+
+    name = "fts5"
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    @staticmethod
+    def available(engine):
+        """
+        判断数据库是否为支持 FTS5 的 SQLite
+        """
+        if engine.dialect.name != "sqlite":
+            return False
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)"))
+                conn.execute(text("DROP TABLE temp.fts5_probe"))
+            return True
+        except Exception:
+            return False
+
+    def rebuild(self, session_factory, doc_type):
+        """
+        创建缺失的虚拟表；与业务表行数不一致时（新建、曾切换为 memory 等）重建该表索引
+        """
+        columns = ", ".join(f'"{field}"' for field in doc_type.fields)
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {doc_type.table} "
+                f"USING fts5({columns}, tokenize = 'unicode61 remove_diacritics 0')"
+            ))
+
+        db = session_factory()
+        try:
+            indexed = db.execute(text(f"SELECT count(*) FROM {doc_type.table}")).scalar()
+            total = doc_type.query(db).count()
+            if indexed == total:
+                return
+            started = time.perf_counter()
+            db.execute(text(f"DELETE FROM {doc_type.table}"))
+            rows = []
+            for row in doc_type.query(db).yield_per(1000):
+                rows.append(self._params(row[0], row[1:]))
+                if len(rows) >= 1000:
+                    db.execute(text(self._insert_sql(doc_type)), rows)
+                    rows = []
+            if rows:
+                db.execute(text(self._insert_sql(doc_type)), rows)
+            db.commit()
+            logger.info(f"全文索引 {doc_type.table} 已重建: {total} 条，耗时 {time.perf_counter() - started:.1f}s")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _insert_sql(doc_type):
+        columns = ", ".join(f'"{field}"' for field in doc_type.fields)
+        params = ", ".join(f":c{i}" for i in range(len(doc_type.fields)))
+        return f"INSERT INTO {doc_type.table} (rowid, {columns}) VALUES (:docid, {params})"
+
+    @staticmethod
+    def _params(docid, values):
+        params = {"docid": docid}
+        for i, value in enumerate(values):
+            params[f"c{i}"] = " ".join(tokenize(value))
+        return params
+
+    def write(self, session, doc_type, docid, values):
+        conn = session.connection()
+        conn.execute(text(f"DELETE FROM {doc_type.table} WHERE rowid = :docid"), {"docid": docid})
+        if values is not None:
+            conn.execute(text(self._insert_sql(doc_type)), self._params(docid, values))
+
+    def after_commit(self, session):
+        pass
+
+    @staticmethod
+    def _expression(terms):
+        """
+        检索词转 FTS5 查询表达式；词元只含文字与数字，可直接放入双引号短语
+        """
+        parts = []
+        for term in terms:
+            phrase = '"' + " ".join(term.tokens) + '"'
+            parts.append(phrase + " *" if term.prefix else phrase)
+        return " AND ".join(parts)
+
+    def search(self, db, doc_type, terms, status, offset, limit):
+        base = doc_type.model.__tablename__
+        sql = (f"SELECT {doc_type.table}.rowid, bm25({doc_type.table}) AS score FROM {doc_type.table} "
+               f"JOIN {base} ON {base}.{doc_type.pk} = {doc_type.table}.rowid "
+               f"WHERE {doc_type.table} MATCH :expression")
+        params = {"expression": self._expression(terms), "limit": limit, "offset": offset}
+        if status is not None:
+            sql += f" AND {base}.status = :status"
+            params["status"] = status
+        sql += f" ORDER BY score, {doc_type.table}.rowid LIMIT :limit OFFSET :offset"
+        # bm25 越小越相关，取反后与 memory 一致为越大越相关
+        return [(docid, -score) for docid, score in db.execute(text(sql), params)]
+
+    def count(self, doc_type):
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT count(*) FROM {doc_type.table}")).scalar()
+
+class SearchIndex:
+    """
+    全文检索入口
+
+    功能:
+        启动时按配置选择 FTS5 或进程内倒排索引并补齐索引；通过会话事件跟踪事件内容、
+        项目说明与目标的新增、修改和删除；批量写入（bulk_insert_mappings 等不经过单元工作的写入）
+        需调用 refresh 同步。
+
+    参数:
+        backend (str): auto、fts5 或 memory
+        snippet_length (int): 结果摘要长度（字符）
+    """
+
+    def __init__(self, backend="auto", snippet_length=80):
+        if backend not in ("auto", "fts5", "memory"):
+            raise ValueError(f"Unknown search backend: {backend}")
+        self.configured = backend
+        self.snippet_length = snippet_length
+        self.backend = None
+
+    def start(self, engine, session_factory=SessionLocal):
+        """
+        选择后端、补齐索引并注册会话事件
+        """
+        if self.backend is not None:
+            return
+        use_fts = self.configured == "fts5" or (self.configured == "auto" and FtsSearchBackend.available(engine))
+        backend = FtsSearchBackend(engine) if use_fts else MemorySearchBackend()
+        started = time.perf_counter()
+        for doc_type in DOC_TYPES.values():
+            try:
+                backend.rebuild(session_factory, doc_type)
+            except Exception as e:
+                # 业务表结构异常等情况下不阻止启动，该类型的检索结果可能不完整
+                logger.error(f"全文索引 {doc_type.name} 初始化失败: {e}")
+        self.backend = backend
+
+        event.listen(session_factory, "after_flush", self._after_flush)
+        event.listen(session_factory, "after_commit", self._after_commit)
+        event.listen(session_factory, "after_transaction_end", self._after_transaction_end)
+        logger.info(f"全文检索已启动: {backend.name}，耗时 {time.perf_counter() - started:.1f}s")
+
+    def _after_flush(self, session, flush_context):
+        for obj in session.new:
+            doc_type = _BY_MODEL.get(type(obj))
+            if doc_type is not None:
+                self.backend.write(session, doc_type, getattr(obj, doc_type.pk), doc_type.values(obj))
+        for obj in session.dirty:
+            doc_type = _BY_MODEL.get(type(obj))
+            if doc_type is None:
+                continue
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in doc_type.fields):
+                self.backend.write(session, doc_type, getattr(obj, doc_type.pk), doc_type.values(obj))
+        for obj in session.deleted:
+            doc_type = _BY_MODEL.get(type(obj))
+            if doc_type is not None:
+                self.backend.write(session, doc_type, getattr(obj, doc_type.pk), None)
+
+    def _after_commit(self, session):
+        self.backend.after_commit(session)
+
+    def _after_transaction_end(self, session, transaction):
+        # 回滚或关闭会话时丢弃未提交的变更
+        if transaction.parent is None:
+            session.info.pop(_PENDING_KEY, None)
+
+    def refresh(self, db, model, *criteria):
+        """
+        在当前事务中按条件重新索引模型记录，供绕过 ORM 单元工作的批量写入调用
+
+        参数:
+            db: 数据库会话
+            model: ORM 模型类，非检索模型时直接返回
+            criteria: 过滤条件，如 Event.eventid.in_(ids)
+        """
+        doc_type = _BY_MODEL.get(model)
+        if doc_type is None or self.backend is None:
+            return
+        for row in doc_type.query(db, *criteria).all():
+            self.backend.write(db, doc_type, row[0], row[1:])
+
+    def search(self, db, name, query, status=None, offset=0, limit=20):
+        """
+        检索并按相关度排序
+
+        参数:
+            db: 数据库会话
+            name (str): 文档类型，event 或 project
+            query (str): 搜索关键字
+            status (int): 按业务表状态位过滤，为 None 时不过滤
+            offset (int): 跳过的条数
+            limit (int): 返回条数
+
+        返回:
+            tuple: (检索词列表, [(文档id, 得分)])
+        """
+        terms = parse_query(query)
+        if not terms:
+            raise BusinessError(
+                code=2401,
+                module="Search",
+                input_data={"q": query},
+                message="搜索关键字不包含可检索的文字或数字"
+            )
+        return terms, self.backend.search(db, DOC_TYPES[name], terms, status, offset, limit)
+
+    def search_page(self, db, name, kwargs):
+        """
+        按 SearchSchema 参数检索一页结果
+
+        返回:
+            tuple: (检索词列表, 当前页 [(文档id, 得分)], 下一页游标)
+        """
+        offset = decode_offset(kwargs["cursor"]) if kwargs.get("cursor") else 0
+        limit = kwargs["limit"]
+        # 多取一条用于判断是否还有下一页
+        terms, hits = self.search(db, name, kwargs["q"], kwargs.get("status"), offset, limit + 1)
+        next_cursor = encode_cursor([offset + limit]) if len(hits) > limit else None
+        return terms, hits[:limit], next_cursor
+
+    def snippet(self, value, terms):
+        return make_snippet(value, terms, self.snippet_length)
+
+    def stats(self):
+        """
+        返回后端类型与各类型已索引文档数，供监控使用
+        """
+        if self.backend is None:
+            return {"backend": None}
+        result = {"backend": self.backend.name}
+        for doc_type in DOC_TYPES.values():
+            result[f"{doc_type.name}_docs"] = self.backend.count(doc_type)
+        return result
+
+def decode_offset(cursor):
+    """
+    解析搜索结果游标（按相关度排序没有唯一的排序键，游标中保存下一页的偏移量）
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != 1 or not isinstance(values[0], int) or values[0] < 0:
+            raise ValueError("cursor must encode a non-negative offset")
+        return values[0]
+    except Exception as e:
+        raise BusinessError(
+            code=2001,
+            module="Search",
+            input_data={"cursor": cursor},
+            message=f"Invalid cursor: {str(e)}"
+        )
+
+# 全局全文检索
+search_index = SearchIndex(Config.SEARCH_BACKEND, snippet_length=Config.SEARCH_SNIPPET_LENGTH)
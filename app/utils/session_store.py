@@ -0,0 +1,411 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, or_
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from loguru import logger
+from app.config import Config
+from app.models import SessionLocal, UserSession
+
+def new_session_id():
+    """
+    生成随机会话id（256 位）
+    """
+    return secrets.token_urlsafe(32)
+
+class ServerSession(CallbackDict, SessionMixin):
+    """
+    服务端会话对象：Cookie 中只保存会话id，内容保存在会话存储中
+    """
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.previous_sid = None
+
+    def regenerate(self):
+        """
+        更换会话id并保留内容（登录成功时调用，防止会话固定）
+        """
+        if not self.new and self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = new_session_id()
+        self.modified = True
+
+class SessionStore:
+    """
+    会话存储基类
+
+    功能:
+        按会话id读写会话内容，按用户批量注销，并由后台线程定期清理超过空闲时间的会话。
+
+    参数:
+        idle_timeout (int): 空闲超时（秒），超过后会话失效
+        anonymous_timeout (int): 未登录会话（只保存验证码等）的空闲超时（秒）
+    """
+
+    backend = None
+
+    def __init__(self, idle_timeout=1800, anonymous_timeout=300):
+        self.idle_timeout = idle_timeout
+        self.anonymous_timeout = min(anonymous_timeout, idle_timeout)
+        self._sweeper = None
+        self._sweeper_lock = threading.Lock()
+
+    def get(self, sid):
+        """
+        读取会话内容并刷新最后访问时间，不存在或已过期时返回 None
+        """
+        raise NotImplementedError
+
+    def save(self, sid, data, empid):
+        """
+        写入会话内容，empid 为登录用户内码（未登录为 None）
+        """
+        raise NotImplementedError
+
+    def delete(self, sid):
+        """
+        删除会话
+        """
+        raise NotImplementedError
+
+    def revoke_user(self, empid, keep_sid=None):
+        """
+        注销指定用户的全部会话（keep_sid 除外）
+
+        返回:
+            int: 注销的会话数
+        """
+        raise NotImplementedError
+
+    def sweep(self):
+        """
+        清理空闲超时的会话
+
+        返回:
+            int: 清理的会话数
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        返回会话数与在线用户数，供监控使用
+        """
+        raise NotImplementedError
+
+    def start_sweeper(self, interval):
+        """
+        启动后台清理线程
+        """
+        with self._sweeper_lock:
+            if self._sweeper and self._sweeper.is_alive():
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, args=(interval,), name="session-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self, interval):
+        """
+        后台线程：按间隔清理空闲会话，异常只记录日志
+        """
+        while True:
+            time.sleep(interval)
+            try:
+                removed = self.sweep()
+                if removed:
+                    logger.info(f"已清理 {removed} 个空闲会话")
+            except Exception as e:
+                logger.error(f"清理空闲会话失败: {e}")
+
+class MemorySessionStore(SessionStore):
+    """
+    进程内会话存储：字典按会话id读写，另维护用户 -> 会话id 索引用于批量注销
+
+    参数:
+        max_sessions (int): 最多保留的会话数，超出时先淘汰最久未访问的未登录会话
+
+    说明:
+        速度最快，但会话只在当前进程可见，多进程部署请使用 database 存储。
+        匿名获取验证码也会创建会话，上限与较短的未登录超时保证内存不随未登录流量无限增长。
+    """
+
+    backend = "memory"
+
+    def __init__(self, idle_timeout=1800, anonymous_timeout=300, max_sessions=100000):
+        super().__init__(idle_timeout, anonymous_timeout)
+        self.max_sessions = max_sessions
+        self._sessions = {}  # sid -> [内容, empid, 最后访问时间]
+        self._by_user = {}  # empid -> {sid}
+        self._anonymous = OrderedDict()  # 未登录会话id，按最后访问时间从旧到新
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _timeout(self, item):
+        return self.idle_timeout if item[1] is not None else self.anonymous_timeout
+
+    def _remove(self, sid):
+        item = self._sessions.pop(sid, None)
+        if item is not None and item[1] is None:
+            self._anonymous.pop(sid, None)
+        if item is not None and item[1] is not None:
+            sids = self._by_user.get(item[1])
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self._by_user[item[1]]
+        return item
+
+    def get(self, sid):
+        now = time.monotonic()
+        with self._lock:
+            item = self._sessions.get(sid)
+            if item is None:
+                return None
+            if now - item[2] > self._timeout(item):
+                self._remove(sid)
+                return None
+            item[2] = now
+            if item[1] is None:
+                self._anonymous.move_to_end(sid)
+            return dict(item[0])
+
+    def save(self, sid, data, empid):
+        with self._lock:
+            self._remove(sid)
+            self._sessions[sid] = [dict(data), empid, time.monotonic()]
+            if empid is not None:
+                self._by_user.setdefault(empid, set()).add(sid)
+            else:
+                self._anonymous[sid] = None
+            if len(self._sessions) > self.max_sessions:
+                self._evict()
+
+    def _evict(self):
+        """
+        会话数超出上限时淘汰：先淘汰最久未访问的未登录会话，没有时再淘汰最久未访问的登录会话（调用方持有锁）
+        """
+        while len(self._sessions) > self.max_sessions:
+            if self._anonymous:
+                sid = next(iter(self._anonymous))
+            else:
+                sid = min(self._sessions, key=lambda s: self._sessions[s][2])
+                logger.warning(f"会话数超过上限 {self.max_sessions}，淘汰最久未访问的登录会话")
+            self._remove(sid)
+            self.evicted += 1
+
+    def delete(self, sid):
+        with self._lock:
+            self._remove(sid)
+
+    def revoke_user(self, empid, keep_sid=None):
+        with self._lock:
+            sids = [sid for sid in self._by_user.get(empid, ()) if sid != keep_sid]
+            for sid in sids:
+                self._remove(sid)
+        return len(sids)
+
+    def sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [sid for sid, item in self._sessions.items() if now - item[2] > self._timeout(item)]
+            for sid in expired:
+                self._remove(sid)
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "sessions": len(self._sessions),
+                "anonymous": len(self._anonymous),
+                "users": len(self._by_user),
+                "evicted": self.evicted,
+                "idle_timeout": self.idle_timeout,
+                "anonymous_timeout": self.anonymous_timeout
+            }
+
+class DatabaseSessionStore(SessionStore):
+    """
+    数据库会话存储：TSYSSESSION 表按主键读写，多进程共享
+
+    参数:
+        session_factory: 数据库会话工厂（独立于请求级会话，避免提交请求中未完成的事务）
+        idle_timeout (int): 空闲超时（秒）
+        anonymous_timeout (int): 未登录会话的空闲超时（秒）
+        touch_interval (int): 最后访问时间的最小更新间隔（秒），避免每个请求都写库
+    """
+
+    backend = "database"
+
+    def __init__(self, session_factory, idle_timeout=1800, anonymous_timeout=300, touch_interval=60):
+        super().__init__(idle_timeout, anonymous_timeout)
+        self.session_factory = session_factory
+        self.touch_interval = touch_interval
+
+    def get(self, sid):
+        now = datetime.now()
+        db = self.session_factory()
+        try:
+            record = db.get(UserSession, sid)
+            if record is None:
+                return None
+            timeout = self.idle_timeout if record.empid is not None else self.anonymous_timeout
+            if record.last_access < now - timedelta(seconds=timeout):
+                db.delete(record)
+                db.commit()
+                return None
+            if record.last_access < now - timedelta(seconds=self.touch_interval):
+                record.last_access = now
+                db.commit()
+            return dict(record.data)
+        finally:
+            db.close()
+
+    def save(self, sid, data, empid):
+        now = datetime.now()
+        db = self.session_factory()
+        try:
+            record = db.get(UserSession, sid)
+            if record is None:
+                db.add(UserSession(sid=sid, empid=empid, data=dict(data), created_at=now, last_access=now))
+            else:
+                record.empid = empid
+                record.data = dict(data)
+                record.last_access = now
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _delete_where(self, *criteria):
+        db = self.session_factory()
+        try:
+            count = db.query(UserSession).filter(*criteria).delete(synchronize_session=False)
+            db.commit()
+            return count
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def delete(self, sid):
+        self._delete_where(UserSession.sid == sid)
+
+    def revoke_user(self, empid, keep_sid=None):
+        criteria = [UserSession.empid == empid]
+        if keep_sid is not None:
+            criteria.append(UserSession.sid != keep_sid)
+        return self._delete_where(*criteria)
+
+    def sweep(self):
+        now = datetime.now()
+        return self._delete_where(or_(
+            UserSession.last_access < now - timedelta(seconds=self.idle_timeout),
+            and_(UserSession.empid.is_(None), UserSession.last_access < now - timedelta(seconds=self.anonymous_timeout))
+        ))
+
+    def stats(self):
+        db = self.session_factory()
+        try:
+            sessions, logged_in, users = db.query(
+                func.count(UserSession.sid), func.count(UserSession.empid), func.count(UserSession.empid.distinct())
+            ).one()
+            return {
+                "backend": self.backend,
+                "sessions": sessions,
+                "anonymous": sessions - logged_in,
+                "users": users,
+                "idle_timeout": self.idle_timeout,
+                "anonymous_timeout": self.anonymous_timeout
+            }
+        finally:
+            db.close()
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Flask 会话接口：Cookie 只携带会话id，内容读写委托给会话存储
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            try:
+                data = self.store.get(sid)
+            except Exception as e:
+                logger.error(f"读取会话失败: {e}")
+                data = None
+            if data is not None:
+                return ServerSession(data, sid=sid)
+        return ServerSession(sid=new_session_id(), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+
+        # 会话已被清空：删除存储与 Cookie
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            return
+
+        empid = session.get("empid") if session.get("login_status") else None
+        self.store.save(session.sid, dict(session), empid)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            partitioned=self.get_cookie_partitioned(app)
+        )
+
+def create_session_store(backend):
+    """
+    按配置创建会话存储
+
+    参数:
+        backend (str): memory 或 database
+    """
+    if backend == "memory":
+        return MemorySessionStore(
+            idle_timeout=Config.SESSION_IDLE_TIMEOUT,
+            anonymous_timeout=Config.SESSION_ANONYMOUS_TIMEOUT,
+            max_sessions=Config.SESSION_MAX_SESSIONS
+        )
+    if backend == "database":
+        return DatabaseSessionStore(
+            SessionLocal,
+            idle_timeout=Config.SESSION_IDLE_TIMEOUT,
+            anonymous_timeout=Config.SESSION_ANONYMOUS_TIMEOUT,
+            touch_interval=Config.SESSION_TOUCH_INTERVAL
+        )
+    raise ValueError(f"Unknown session backend: {backend}")
+
+# 全局会话存储
+session_store = create_session_store(Config.SESSION_BACKEND)
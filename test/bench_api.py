@@ -0,0 +1,381 @@
+"""
+API 热点路径基准测试
+
+说明:
+    在临时目录中生成独立的 SQLite 数据库与配置文件（通过 PRJEVENTSYS_CONFIG 指向），
+    按指定数据量批量造数后，用 Flask 测试客户端驱动登录、项目查询、项目事件查询、
+    项目成员查询、添加事件到项目与权限校验接口，输出吞吐与延迟分位数。
+    可保存为基线，之后与基线对比，p50/p95 劣化超过容差时以退出码 1 结束。
+
+用法:
+    python test/bench_api.py
+    python test/bench_api.py --users 5000 --projects 1000 --events 100000 --requests 500
+    python test/bench_api.py --save-baseline bench_baseline.json
+    python test/bench_api.py --baseline bench_baseline.json --tolerance 0.25
+"""
+import argparse
+import base64
+import configparser
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PASSWORD = "bench-pass-123"
+BENCH_PERMISSION = "BENCHPERM"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="API 热点路径基准测试")
+    parser.add_argument("--users", type=int, default=1000, help="用户数")
+    parser.add_argument("--projects", type=int, default=200, help="项目数")
+    parser.add_argument("--events", type=int, default=20000, help="事件数")
+    parser.add_argument("--tree-nodes", type=int, default=50, help="每个项目的事件树节点数")
+    parser.add_argument("--members", type=int, default=10, help="每个项目的成员数")
+    parser.add_argument("--oplogs", type=int, default=20000, help="操作日志条数")
+    parser.add_argument("--requests", type=int, default=200, help="每个场景的请求数")
+    parser.add_argument("--login-requests", type=int, default=20, help="登录场景的请求数（每次都做完整的密码校验）")
+    parser.add_argument("--warmup", type=int, default=10, help="每个场景正式计时前的预热请求数")
+    parser.add_argument("--scenarios", type=str, default="", help="只运行指定场景，逗号分隔")
+    parser.add_argument("--seed", type=int, default=20240101, help="随机数种子，保证造数与请求序列可重复")
+    parser.add_argument("--workdir", type=str, default="", help="临时数据库目录，默认自动创建并在结束后删除")
+    parser.add_argument("--output", type=str, default="", help="结果另存为 JSON 文件")
+    parser.add_argument("--save-baseline", type=str, default="", help="将本次结果保存为基线")
+    parser.add_argument("--baseline", type=str, default="", help="与基线对比")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="与基线对比时允许的 p50/p95 劣化比例")
+    return parser.parse_args()
+
+def write_config(workdir):
+    """
+    基于仓库 conf.ini 生成基准测试配置：临时数据库、关闭登录限流与请求分析、日志只输出警告
+
+    说明:
+        查询结果缓存也关闭，否则重复的查询条件直接命中缓存，测不到查询本身的耗时。
+    """
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT_DIR, "conf.ini"))
+    db_path = os.path.join(workdir, "bench.db")
+    config.set("database", "url", f"sqlite:///{db_path}")
+    config.set("logging", "level", "WARNING")
+    config.set("logging", "file", os.path.join(workdir, "bench.log"))
+    for section, values in {
+        "rate_limit": {"enabled": "False"},
+        "profiler": {"enabled": "False"},
+        "result_cache": {"enabled": "False"},
+        "captcha": {"pool_size": "50"}
+    }.items():
+        if not config.has_section(section):
+            config.add_section(section)
+        for key, value in values.items():
+            config.set(section, key, value)
+    path = os.path.join(workdir, "conf.ini")
+    with open(path, "w", encoding="utf-8") as f:
+        config.write(f)
+    return path
+
+def _insert(db, model, rows, chunk=10000):
+    for start in range(0, len(rows), chunk):
+        db.bulk_insert_mappings(model, rows[start:start + chunk])
+    db.commit()
+
+def seed(args, rng):
+    """
+    批量造数，返回场景需要的数据索引
+    """
+    from app.models import (SessionLocal, User, Project, Event, ProjectEvent, ProjectMember,
+                            OperationLog, PermissionGroup, UserPermission)
+    from app.utils.crypto import PasswordService
+    from app.utils.event_tree import node_path
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    today = date.today()
+    now = datetime.now()
+    # 所有用户共用一个密码哈希，避免造数阶段耗时在密码加密上
+    passwd = PasswordService.hash_password(BENCH_PASSWORD)
+
+    users = [{
+        "empid": 0, "empcode": "ADM0000", "empname": "系统管理员", "passwd": passwd, "sex": 0,
+        "createuser": 0, "createdate": today, "status": 0, "admin": 0
+    }]
+    for empid in range(1, args.users + 1):
+        users.append({
+            "empid": empid, "empcode": f"U{empid:06d}", "empname": f"用户{empid}", "passwd": passwd,
+            "sex": empid % 2, "createuser": 0, "createdate": today, "status": 0, "admin": 1
+        })
+    _insert(db, User, users)
+
+    projects = []
+    for prjid in range(1, args.projects + 1):
+        projects.append({
+            "prjid": prjid, "prjcode": f"P{prjid:06d}", "prjname": f"项目{prjid}",
+            "ownerid": rng.randint(1, max(args.users, 1)), "sponsorid": rng.randint(1, max(args.users, 1)),
+            "desc": f"项目{prjid}的说明", "goal": f"项目{prjid}的目标",
+            "approvetime": today - timedelta(days=rng.randint(0, 720)),
+            "expectedtime": today + timedelta(days=rng.randint(0, 720)),
+            "createuser": 0, "createdate": today, "status": 0
+        })
+    _insert(db, Project, projects)
+
+    events = []
+    for eventid in range(1, args.events + 1):
+        events.append({
+            "eventid": eventid, "reporter": rng.randint(1, max(args.users, 1)),
+            "reportertime": today - timedelta(days=rng.randint(0, 720)),
+            "event": f"事件{eventid}：第{rng.randint(1, 99)}周例会记录的问题与处理进展",
+            "createuser": 0, "createdate": today, "status": 0
+        })
+    _insert(db, Event, events)
+
+    # 事件树：每个节点随机挂到本项目已有节点下，约五分之一为根节点
+    nodes = []
+    leaves = {}
+    leafid = 0
+    for prjid in range(1, args.projects + 1):
+        project_nodes = []
+        for _ in range(args.tree_nodes):
+            leafid += 1
+            parent = rng.choice(project_nodes) if project_nodes and rng.random() > 0.2 else None
+            node = {
+                "leafid": leafid, "prjid": prjid, "eventid": rng.randint(1, max(args.events, 1)),
+                "parentid": parent["leafid"] if parent else 0,
+                "depth": parent["depth"] + 1 if parent else 0,
+                "path": node_path(parent["path"] if parent else None, leafid),
+                "createuser": 0, "createdate": today, "status": 0
+            }
+            project_nodes.append(node)
+        nodes.extend(project_nodes)
+        leaves[prjid] = [node["leafid"] for node in project_nodes]
+    _insert(db, ProjectEvent, nodes)
+
+    members = []
+    for prjid in range(1, args.projects + 1):
+        for empid in rng.sample(range(1, args.users + 1), min(args.members, args.users)):
+            members.append({"prjid": prjid, "empid": empid, "createuser": 0, "createdate": today, "status": 0})
+    _insert(db, ProjectMember, members)
+
+    oplogs = []
+    for i in range(args.oplogs):
+        oplogs.append({
+            "operation_name": "添加事件到项目", "api_path": "/api/v1.0/BUS/add_event_to_project",
+            "request_params": {"prjid": rng.randint(1, max(args.projects, 1))},
+            "operation_time": now - timedelta(seconds=i * 30), "operator_id": str(rng.randint(1, max(args.users, 1))),
+            "response_status": 200, "duration_ms": round(rng.uniform(1, 50), 3)
+        })
+    _insert(db, OperationLog, oplogs)
+
+    db.add(PermissionGroup(pgroupid=1, pgroupcode="BENCH", pgroupname=BENCH_PERMISSION, createuser=0, status=0))
+    db.add(UserPermission(empid=0, pgroupid=1, createuser=0, status=0))
+    db.commit()
+    db.close()
+
+    print(f"造数完成: 用户 {len(users)}，项目 {len(projects)}，事件 {len(events)}，事件树节点 {len(nodes)}，"
+          f"成员 {len(members)}，操作日志 {len(oplogs)}，耗时 {time.perf_counter() - started:.1f}s")
+    return {"leaves": leaves}
+
+def encrypt(password):
+    from Crypto.PublicKey import RSA
+    from Crypto.Cipher import PKCS1_OAEP
+    from Crypto.Hash import SHA256
+    from app.config import Config
+    with open(Config.RSA_PUBLIC_KEY_PATH) as f:
+        key = RSA.import_key(f.read())
+    return base64.b64encode(PKCS1_OAEP.new(key, hashAlgo=SHA256).encrypt(password.encode())).decode()
+
+def login(client, encrypted_password):
+    """
+    完整登录流程：获取验证码后提交工号、密码密文与验证码
+    """
+    client.get("/prjeventsys/v1/captcha")
+    with client.session_transaction() as session:
+        captcha = session.get("captcha")
+    return client.post("/prjeventsys/v1/login", json={
+        "empcode": "ADM0000", "password": encrypted_password, "captcha": captcha
+    })
+
+def build_scenarios(app, client, data, args, rng, encrypted_password):
+    """
+    返回 {场景名: (请求次数, 发出一次请求的函数)}，函数返回响应状态码
+    """
+    projects = args.projects
+
+    def do_login():
+        return login(app.test_client(), encrypted_password).status_code
+
+    def query_projects():
+        choice = rng.random()
+        if choice < 0.4:
+            body = {"limit": 50}
+        elif choice < 0.7:
+            body = {"prjname": f"项目{rng.randint(1, projects)}", "limit": 50}
+        else:
+            body = {"ownerid": rng.randint(1, max(args.users, 1)), "limit": 50}
+        return client.post("/api/v1.0/BUS/query_projects", json=body).status_code
+
+    def query_project_events():
+        body = {"prjcode": f"P{rng.randint(1, projects):06d}", "limit": 100}
+        return client.post("/api/v1.0/BUS/query_project_events", json=body).status_code
+
+    def query_project_members():
+        body = {"prjcode": f"P{rng.randint(1, projects):06d}", "limit": 100}
+        return client.post("/api/v1.0/BUS/query_project_members", json=body).status_code
+
+    def add_event_to_project():
+        prjid = rng.randint(1, projects)
+        leaves = data["leaves"][prjid]
+        body = {
+            "prjid": prjid,
+            "eventid": rng.randint(1, max(args.events, 1)),
+            "parentid": rng.choice(leaves) if leaves and rng.random() > 0.2 else 0
+        }
+        response = client.post("/api/v1.0/BUS/add_event_to_project", json=body)
+        if response.status_code == 200:
+            leaves.append(response.get_json()["project_event_id"])
+        return response.status_code
+
+    def permission_check():
+        return client.get("/bench/permission").status_code
+
+    return {
+        "login": (args.login_requests, do_login),
+        "query_projects": (args.requests, query_projects),
+        "query_project_events": (args.requests, query_project_events),
+        "query_project_members": (args.requests, query_project_members),
+        "add_event_to_project": (args.requests, add_event_to_project),
+        "permission_check": (args.requests, permission_check)
+    }
+
+def percentile(sorted_values, p):
+    """
+    最近秩法分位数
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def run_scenario(func, count, warmup):
+    for _ in range(warmup):
+        func()
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        status = func()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if status != 200:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0
+    }
+
+def print_report(results):
+    header = f"{'场景':<24}{'请求':>8}{'错误':>6}{'rps':>10}{'mean':>10}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(f"{name:<24}{r['requests']:>8}{r['errors']:>6}{r['rps']:>10}{r['mean_ms']:>10}{r['p50_ms']:>10}"
+              f"{r['p90_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+    print("（延迟单位: 毫秒）")
+
+def compare(results, baseline, tolerance):
+    """
+    与基线对比，返回劣化项列表
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if base[key] > 0 and current[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {base[key]} -> {current[key]} (+{(current[key] / base[key] - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="prjeventsys-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["PRJEVENTSYS_CONFIG"] = write_config(workdir)
+    sys.path.insert(0, ROOT_DIR)
+
+    try:
+        from loguru import logger
+        # 去掉 loguru 默认的 DEBUG 级控制台输出，只保留应用按配置添加的日志
+        logger.remove()
+        from app import app
+        from app.utils.decorators import permission_required
+
+        # 权限校验场景使用的测试路由，需在处理第一个请求之前注册
+        @permission_required(BENCH_PERMISSION)
+        def bench_permission():
+            return {"ok": True}
+        app.add_url_rule("/bench/permission", "bench_permission", bench_permission)
+
+        data = seed(args, rng)
+        encrypted_password = encrypt(BENCH_PASSWORD)
+        client = app.test_client()
+        response = login(client, encrypted_password)
+        if response.status_code != 200:
+            raise RuntimeError(f"登录失败: {response.status_code} {response.get_json()}")
+
+        scenarios = build_scenarios(app, client, data, args, rng, encrypted_password)
+        selected = [s.strip() for s in args.scenarios.split(",") if s.strip()] or list(scenarios)
+        results = {}
+        for name in selected:
+            count, func = scenarios[name]
+            results[name] = run_scenario(func, count, min(args.warmup, count))
+        print_report(results)
+
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "volumes": {
+                "users": args.users, "projects": args.projects, "events": args.events,
+                "tree_nodes": args.tree_nodes, "members": args.members, "oplogs": args.oplogs
+            },
+            "results": results
+        }
+        for path in (args.output, args.save_baseline):
+            if path:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+                print(f"结果已保存: {path}")
+
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+            if baseline.get("volumes") != report["volumes"]:
+                print("警告: 基线的数据量与本次不同，对比结果仅供参考")
+            regressions = compare(results, baseline, args.tolerance)
+            if regressions:
+                print(f"与基线相比劣化超过 {args.tolerance * 100:.0f}%:")
+                for line in regressions:
+                    print(f"  {line}")
+                return 1
+            print("与基线相比无明显劣化")
+        return 0
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
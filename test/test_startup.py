@@ -0,0 +1,76 @@
+"""
+应用启动冒烟测试
+
+说明:
+    在临时目录中生成独立的 SQLite 数据库与配置文件（通过 PRJEVENTSYS_CONFIG 指向），
+    以多进程密码加密（[hashing] workers >= 2）在子进程中导入 app 包，确认启动不会卡死，
+    请求一次验证码接口，并经进程池完成加密与校验。
+
+用法:
+    python test/test_startup.py
+    python test/test_startup.py --workers 4 --timeout 60
+"""
+import argparse
+import configparser
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 子进程中执行：导入 app 包（启动全部后台组件），再经进程池加密、校验一次密码
+CHILD_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from app import app
+from app.utils.hashing import hashing_service
+client = app.test_client()
+response = client.get("/prjeventsys/v1/captcha")
+assert response.status_code == 200, response.get_data(as_text=True)
+hashed = hashing_service.hash_password("startup-pass-123")
+assert hashing_service.verify_password("startup-pass-123", hashed)
+assert hashing_service.hash_passwords(["startup-pass-%d" % i for i in range(16)])
+stats = hashing_service.stats()
+assert stats["mode"] == "process", stats
+print("startup ok:", stats["workers"], "workers")
+"""
+
+def write_config(workdir, workers):
+    """
+    基于仓库 conf.ini 生成测试配置：临时数据库、指定密码加密进程数、日志只输出警告
+    """
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT_DIR, "conf.ini"))
+    config.set("database", "url", f"sqlite:///{os.path.join(workdir, 'startup.db')}")
+    config.set("logging", "level", "WARNING")
+    config.set("logging", "file", os.path.join(workdir, "startup.log"))
+    config.set("hashing", "workers", str(workers))
+    path = os.path.join(workdir, "conf.ini")
+    with open(path, "w", encoding="utf-8") as f:
+        config.write(f)
+    return path
+
+def test_startup_with_process_pool(workers=2, timeout=120):
+    """
+    workers >= 2 时导入 app 包应在超时前完成
+    """
+    workdir = tempfile.mkdtemp(prefix="prjeventsys-startup-")
+    try:
+        env = dict(os.environ, PRJEVENTSYS_CONFIG=write_config(workdir, workers))
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT, ROOT_DIR],
+            cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout
+        )
+        assert result.returncode == 0, result.stdout + result.stderr
+        print(result.stdout.strip())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="应用启动冒烟测试")
+    parser.add_argument("--workers", type=int, default=2, help="密码加密进程数，至少为 2")
+    parser.add_argument("--timeout", type=int, default=120, help="启动与校验的最长时间（秒）")
+    args = parser.parse_args()
+    test_startup_with_process_pool(max(2, args.workers), args.timeout)